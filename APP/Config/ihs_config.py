@@ -1,14 +1,25 @@
 from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.common.exceptions import WebDriverException
-from webdriver_manager.chrome import ChromeDriverManager
+from APP.Core.chromedriver import resolver_chromedriver
 from selenium.webdriver.support.ui import WebDriverWait
 from tkinter import messagebox
 from selenium import webdriver
 from dotenv import load_dotenv
+from APP.Core.driver_pool import obter_pool
+from APP.Core.perfil_navegador import (
+    aplicar_perfil_enxuto, bloquear_recursos, perfil_enxuto,
+    preparar_perfil_captcha, remover_perfil_ao_fechar, marcar_versao_modelo,
+)
+from functools import partial
+from APP.Config.settings import Config
 from pathlib import Path as P
+from time import time
+from concurrent.futures import Future
+import pandas as pd
 import threading
 import oracledb
+import shutil
 import os
 
 load_dotenv()
@@ -18,48 +29,81 @@ password = os.getenv('PASSWORD_ORACLE')
 dsn = os.getenv('DSN')
 
 
+def criar_driver_chrome(PASTA_DOWNLOADS=None, enxuto=False):
+    """
+    Abre um Chrome do IHS (preferências de download + extensão do captcha).
+    Usado como fábrica do pool de navegadores; a pasta de downloads de cada
+    execução é definida no empréstimo. Com `enxuto`, usa o perfil enxuto
+    (imagens, fontes e analytics bloqueados; headless se configurado).
+
+    A extensão vem da pasta descompactada ou do clone do perfil modelo
+    (ver preparar_perfil_captcha); só sem nenhum dos dois cai no fluxo
+    manual da Web Store (configurar_extensao).
+
+    Retorno:
+        webdriver.Chrome: Instância do navegador Chrome.
+    """
+    service = ChromeService(resolver_chromedriver())
+
+    options = ChromeOptions()
+    preferencias = {
+        "download.prompt_for_download": False,
+        "plugins.always_open_pdf_externally": True,
+        "download.directory_upgrade": True,
+        "safebrowsing.enabled": True
+    }
+    if PASTA_DOWNLOADS is not None:
+        preferencias["download.default_directory"] = str(P(PASTA_DOWNLOADS).resolve())
+    options.add_experimental_option("prefs", preferencias)
+    if enxuto:
+        aplicar_perfil_enxuto(options)
+    extensao_pronta, pasta_perfil = preparar_perfil_captcha(options)
+
+    try:
+        driver = webdriver.Chrome(service=service, options=options)
+    except Exception:
+        if pasta_perfil is not None:
+            shutil.rmtree(pasta_perfil, ignore_errors=True)
+        raise
+    remover_perfil_ao_fechar(driver, pasta_perfil)
+    try:
+        driver.maximize_window()
+        if not extensao_pronta:
+            configurar_extensao(driver)
+        if enxuto:
+            bloquear_recursos(driver)
+    except Exception:
+        driver.quit()
+        raise
+    return driver
+
+
 def config_webdriver_chrome(PASTA_DOWNLOADS):
     """
     Configura e inicializa o WebDriver do Chrome.
 
     Parâmetros:
-        None
+        PASTA_DOWNLOADS (str | Path): Pasta onde os downloads serão salvos.
 
     Retorno:
         tuple:
             driver (webdriver.Chrome): Instância do navegador Chrome.
-            wdw (WebDriverWait): Objeto para gerenciar esperas explícitas (timeout de 180s).
+            wdw (WebDriverWait): Objeto para gerenciar esperas explícitas (timeout de 300s).
+            PASTA_DOWNLOADS (Path): Pasta de downloads resolvida.
     """
-    try:
-        PASTA_DOWNLOADS = P(PASTA_DOWNLOADS).resolve()
-        PASTA_DOWNLOADS.mkdir(parents=True, exist_ok=True)
-        
-        service = ChromeService(ChromeDriverManager().install())
-
-        options = ChromeOptions()
-        options.add_experimental_option("prefs", {
-            "download.default_directory": str(PASTA_DOWNLOADS),
-            "download.prompt_for_download": False,
-            "plugins.always_open_pdf_externally": True,
-            "download.directory_upgrade": True,
-            "safebrowsing.enabled": True
-        })
-        
-        driver = webdriver.Chrome(service=service, options=options)
-        
-        wdw = WebDriverWait(driver, 300)
-        
-        driver.maximize_window()
-        
-        configurar_extensao(driver)
-        
-        return (driver, wdw, PASTA_DOWNLOADS)
-    except Exception:
-        driver.close()
+    PASTA_DOWNLOADS = P(PASTA_DOWNLOADS).resolve()
+    PASTA_DOWNLOADS.mkdir(parents=True, exist_ok=True)
+
+    driver = criar_driver_chrome(PASTA_DOWNLOADS)
+    wdw = WebDriverWait(driver, 300)
 
+    return (driver, wdw, PASTA_DOWNLOADS)
+
+
+URL_EXTENSAO_CAPTCHA = 'https://chromewebstore.google.com/detail/rektcaptcha-recaptcha-sol/bbdhfoclddncoaomddgkaaphcnddbpdh?hl=pt-BR&utm_source=ext_sidebar'
 
 def configurar_extensao(driver):
-    url = 'https://chromewebstore.google.com/detail/rektcaptcha-recaptcha-sol/bbdhfoclddncoaomddgkaaphcnddbpdh?hl=pt-BR&utm_source=ext_sidebar'
+    url = URL_EXTENSAO_CAPTCHA
     driver.get(url)
 
     resposta = True
@@ -68,49 +112,131 @@ def configurar_extensao(driver):
         if resposta: break
         continue
 
+def preparar_modelo_perfil():
+    """
+    Abre o Chrome direto no perfil modelo (IHS_PERFIL_MODELO_DIR) para instalar ou
+    atualizar a extensão do captcha. Ao confirmar, grava uma nova versão no modelo;
+    os próximos navegadores passam a clonar essa versão sem nenhuma interação.
+
+    Retorno:
+        str: Versão gravada no modelo.
+    """
+    modelo = P(Config.IHS_PERFIL_MODELO_DIR).resolve()
+    modelo.mkdir(parents=True, exist_ok=True)
+
+    options = ChromeOptions()
+    options.add_argument(f'--user-data-dir={modelo}')
+    driver = webdriver.Chrome(service=ChromeService(resolver_chromedriver()), options=options)
+    try:
+        driver.maximize_window()
+        configurar_extensao(driver)
+    finally:
+        driver.quit()
+    versao = marcar_versao_modelo(modelo)
+    print(f'🧬 Perfil modelo atualizado (versão {versao}): {modelo}')
+    return versao
+
 wdw = None
 PASTA_DOWNLOADS = None
 _driver = None
 _lock = threading.Lock()
 drivers = {}
 states = {}
+# wdw e pasta de downloads de cada sessão (várias sessões podem rodar ao mesmo tempo)
+recursos = {}
+# sessão filha (uma loja no modo paralelo) -> sessão que a disparou
+sessoes_pai = {}
+# pool de onde veio o navegador de cada sessão (perfil completo ou enxuto)
+pools_sessao = {}
+
+PASTA_DOWNLOADS_PADRAO = r"\\172.17.67.14\findev$\Automação - CNH\Baixa de Arquivos\Arquivos Baixados"
+
+def pool_ihs(enxuto=False):
+    """Pool compartilhado dos navegadores do IHS (um para cada perfil)."""
+    if enxuto:
+        return obter_pool('ihs-enxuto', partial(criar_driver_chrome, enxuto=True))
+    return obter_pool('ihs', criar_driver_chrome)
 
-def _ensure_driver(session_id: str, pasta_downlod=r"\\172.17.67.14\findev$\Automação - CNH\Baixa de Arquivos\Arquivos Baixados"):
-    """Garante que o driver global exista e esteja válido."""
+def _liberar_sessoes_ociosas():
+    """Devolve ao pool os navegadores de sessões paradas há mais de DRIVER_POOL_SESSAO_OCIOSA_MIN."""
+    limite = time() - Config.DRIVER_POOL_SESSAO_OCIOSA_MIN * 60
+    with _lock:
+        antigas = [
+            sid for sid, estado in states.items()
+            if sid in drivers and not estado.get("running") and estado.get("ultimo_uso", time()) < limite
+        ]
+    for sid in antigas:
+        encerrar_driver(sid)
+
+def _ensure_driver(session_id: str, pasta_downlod=None, automacao=None):
+    """
+    Garante que a sessão tenha um driver do pool, vivo e com a pasta de downloads definida.
+    `automacao` escolhe o perfil do navegador (enxuto, salvo exceção em NAVEGADOR_ENXUTO_EXCECOES).
+    """
     global wdw
     global PASTA_DOWNLOADS
     global _driver
-    global _lock
-    
+
+    pasta_downlod = P(pasta_downlod or PASTA_DOWNLOADS_PADRAO).resolve()
+    _liberar_sessoes_ociosas()
+
     with _lock:
-        if session_id not in drivers:
-            _driver, wdw, PASTA_DOWNLOADS = config_webdriver_chrome(pasta_downlod)
-            drivers[session_id] = _driver
-            states[session_id] = {
-                "running": False,
-                "stop": False,
-            }
-        else:
-            # Verifica se ainda está vivo
-            try:
-                drivers[session_id].title  # chamada simples para validar sessão
-            except WebDriverException:
-                _driver, wdw, PASTA_DOWNLOADS = config_webdriver_chrome(pasta_downlod)
-                drivers[session_id] = _driver
-                states[session_id] = {
-                    "running": False,
-                    "stop": False,
-                }
-    return (drivers[session_id], wdw, PASTA_DOWNLOADS)
+        existente = drivers.get(session_id)
+
+    if existente is not None:
+        # Verifica se ainda está vivo
+        try:
+            existente.title  # chamada simples para validar sessão
+            with _lock:
+                states[session_id]["ultimo_uso"] = time()
+                return (existente, *recursos[session_id])
+        except (WebDriverException, KeyError):
+            pools_sessao.get(session_id, pool_ihs()).devolver(existente, descartar=True)
+
+    # Empresta fora do lock: outras sessões não ficam esperando a abertura do Chrome
+    pool = pool_ihs(perfil_enxuto(automacao))
+    novo_driver = pool.emprestar(pasta_downlod)
+    novo_wdw = WebDriverWait(novo_driver, 300)
+
+    with _lock:
+        _driver, wdw, PASTA_DOWNLOADS = novo_driver, novo_wdw, pasta_downlod
+        drivers[session_id] = novo_driver
+        recursos[session_id] = (novo_wdw, pasta_downlod)
+        pools_sessao[session_id] = pool
+        states[session_id] = {
+            "running": False,
+            "stop": False,
+            "ultimo_uso": time(),
+        }
+    return (novo_driver, novo_wdw, pasta_downlod)
+
+def encerrar_driver(session_id: str):
+    """Devolve o navegador da sessão ao pool e descarta o estado."""
+    with _lock:
+        driver = drivers.pop(session_id, None)
+        recursos.pop(session_id, None)
+        pool = pools_sessao.pop(session_id, None) or pool_ihs()
+        states.pop(session_id, None)
+        sessoes_pai.pop(session_id, None)
+    if driver is not None:
+        pool.devolver(driver)
+
+def vincular_sessao(session_id: str, sessao_pai: str):
+    """Faz o stop da sessão pai valer também para a sessão filha."""
+    with _lock:
+        sessoes_pai[session_id] = sessao_pai
 
 def start_state(session_id: str):
     with _lock:
-        states[session_id]["running"] = True
-        states[session_id]["stop"] = False
+        estado = states.setdefault(session_id, {"running": False, "stop": False})
+        estado["running"] = True
+        estado["stop"] = False
 
 def finish_state(session_id: str):
     with _lock:
-        states[session_id]["running"] = False
+        if session_id in states:
+            states[session_id]["running"] = False
+            states[session_id]["ultimo_uso"] = time()
 
 def request_stop(session_id: str):
     with _lock:
@@ -119,12 +245,19 @@ def request_stop(session_id: str):
 
 def should_stop(session_id: str) -> bool:
     with _lock:
-        return states.get(session_id, {}).get("stop", False)
+        while session_id is not None:
+            if states.get(session_id, {}).get("stop", False):
+                return True
+            session_id = sessoes_pai.get(session_id)
+        return False
 
 def is_running(session_id: str) -> bool:
     with _lock:
         return states.get(session_id, {}).get("running", False)
 
+_cliente_oracle_iniciado = False
+_lock_db = threading.Lock()
+
 def connection():
     """
     Cria uma conexão com o banco de dados Oracle.
@@ -135,9 +268,16 @@ def connection():
     Retorno:
         oracledb.Connection: Objeto de conexão ativo com o banco de dados Oracle.
     """
-    oracledb.init_oracle_client(
-        lib_dir=r'C:\instantclient'
-    )
+    global _cliente_oracle_iniciado
+    with _lock_db:
+        if not _cliente_oracle_iniciado:
+            try:
+                oracledb.init_oracle_client(
+                    lib_dir=r'C:\instantclient'
+                )
+            except oracledb.ProgrammingError:
+                pass  # Client já inicializado
+            _cliente_oracle_iniciado = True
 
     # Conexão com o Oracle
     return oracledb.connect(
@@ -147,38 +287,83 @@ def connection():
     )
 
 
-def busca_dados_db():
+SQL_TITULOS_CDC = '''SELECT
+            A.REVENDA, A.TITULO, A.DUPLICATA, A.VAL_TITULO, A.DEPARTAMENTO, A.STATUS, A.CLIENTE, A.EMPRESA, B.NOME
+        FROM
+            FIN_TITULO  A
+        JOIN FAT_CLIENTE  B ON B.CLIENTE = A.CLIENTE 
+        WHERE
+            A.STATUS = 'EM'
+            AND A.TIPO = 'CR'
+            AND A.ORIGEM = 1252'''  # Origem = Venda com Financiamento
+
+
+def _frame_oracle(linhas, colunas):
+    """Linhas do cursor -> DataFrame; colunas com NULL ficam object (o inteiro 123 não vira 123.0)."""
+    df = pd.DataFrame(linhas, columns=colunas, dtype=object)
+    for coluna in df.columns:
+        if df[coluna].notna().all():
+            df[coluna] = df[coluna].infer_objects()
+    return df
+
+
+def _consulta_titulos_cdc(empresa=None):
+    conn = connection()
+    try:
+        cur = conn.cursor()
+        # busca em blocos grandes: menos idas e voltas ao banco
+        cur.arraysize = Config.ORACLE_ARRAYSIZE
+        cur.prefetchrows = Config.ORACLE_ARRAYSIZE + 1
+        try:
+            if empresa is None:
+                cur.execute(SQL_TITULOS_CDC)
+            else:
+                cur.execute(f'{SQL_TITULOS_CDC}\n            AND A.EMPRESA = :empresa', empresa=empresa)
+            colunas = [c[0] for c in cur.description]
+            return _frame_oracle(cur.fetchall(), colunas)
+        finally:
+            cur.close()
+    finally:
+        conn.close()
+
+
+def busca_dados_db(empresa=None, cache=None):
     """
     Busca dados financeiros no banco de dados Oracle.
 
     Executa uma query que retorna informações de títulos e clientes
-    com status 'EM', tipo 'CR', empresa = 2 e origem = 1252.
+    com status 'EM', tipo 'CR' e origem = 1252, filtrada pela empresa
+    da loja quando informada.
 
     Parâmetros:
-        None
+        empresa (int | None): Código da EMPRESA no Linx (None = todas).
+        cache (dict | None): Cache da execução; cada empresa é consultada uma
+            única vez, mesmo com lojas rodando em paralelo.
 
     Retorno:
-        list[tuple]: Lista de tuplas contendo os resultados da query:
-            (revenda, título, duplicata, valor_título, status, cliente, nome_cliente).
+        pandas.DataFrame: Colunas REVENDA, TITULO, DUPLICATA, VAL_TITULO,
+            DEPARTAMENTO, STATUS, CLIENTE, EMPRESA e NOME.
     """
-    conn = connection()
-
-    try:
-        cur = conn.cursor()
+    if cache is None:
+        return _consulta_titulos_cdc(empresa)
 
-        cur.execute(
-            f'''SELECT
-            A.REVENDA, A.TITULO, A.DUPLICATA, A.VAL_TITULO, A.DEPARTAMENTO, A.STATUS, A.CLIENTE, A.EMPRESA, B.NOME
-        FROM
-            FIN_TITULO  A
-        JOIN FAT_CLIENTE  B ON B.CLIENTE = A.CLIENTE 
-        WHERE
-            A.STATUS = 'EM'
-            AND A.TIPO = 'CR'
-            AND A.ORIGEM = 1252'''  # Origem = Venda com Financiamento
-        )
+    with _lock_db:
+        futuro = cache.get(empresa)
+        dono = futuro is None
+        if dono:
+            futuro = cache[empresa] = Future()
+    if not dono:
+        return futuro.result()
 
-        return cur.fetchall()
-    finally:
-        cur.close()
-        conn.close()
\ No newline at end of file
+    try:
+        inicio = time()
+        dados = _consulta_titulos_cdc(empresa)
+        print(f'🗄️ Títulos CDC (empresa {empresa if empresa is not None else "todas"}): '
+              f'{len(dados)} linhas em {time() - inicio:.2f}s')
+        futuro.set_result(dados)
+        return dados
+    except Exception as e:
+        futuro.set_exception(e)
+        with _lock_db:
+            cache.pop(empresa, None)
+        raise
@@ -0,0 +1,24 @@
+# lojas_linx.py - loja -> (banco, EMPRESA) no Linx; fonte única para as automações que filtram por loja
+# (sem dependências: importar não carrega selenium, tkinter nem o Oracle)
+
+# NOVA_ONDA é a loja de Aracati ("NOVA ONDA - MOTOS - ARACATI"), mesma empresa de ARACATI.
+MAPA_EMPRESA = {
+    "JUAZEIRO":     (21018, 2),
+    "TERRA_SANTA":  (21018, 2),
+    "CRATO":        (51017, 5),
+    "ARACATI":      (31049, 3),
+    "NOVA_ONDA":    (31049, 3),
+}
+
+
+def empresa_da_loja(loja):
+    """
+    Código da EMPRESA no Linx de uma loja.
+
+    Levanta KeyError para loja sem mapeamento: consultar todas as empresas
+    nesse caso misturaria os títulos de outras lojas.
+    """
+    try:
+        return MAPA_EMPRESA[loja.upper()][1]
+    except KeyError:
+        raise KeyError(f"Loja sem EMPRESA mapeada no Linx: {loja}") from None
@@ -12,12 +12,87 @@ class Config:
     
     # Diretório de rede base para os relatórios PAN
     BASE_DIR_REDE = r"\\172.17.67.14\Ares Motos\controladoria\financeiro\06.CONTAS A RECEBER\11.RELATÓRIOS BANCO PAN"
-    
+    PAN_NETWORK_PATH = os.getenv('PAN_NETWORK_PATH', BASE_DIR_REDE)
+
+    # Pipeline de busca PAN: threads que leem os arquivos da rede e processos que fazem o parse
+    PAN_WORKERS_IO = int(os.getenv('PAN_WORKERS_IO', '8'))
+    PAN_WORKERS_PARSE = int(os.getenv('PAN_WORKERS_PARSE', str(max(1, min(4, (os.cpu_count() or 1) - 1)))))
+
+    # Limite de memória do cache de planilhas PAN lidas em uma execução
+    PAN_CACHE_WORKBOOKS_MB = int(os.getenv('PAN_CACHE_WORKBOOKS_MB', '256'))
+
+    # Diretório local onde fica o índice de valores dos relatórios PAN (um JSON por pasta de data)
+    PAN_INDICE_DIR = os.getenv('PAN_INDICE_DIR', os.path.join(os.path.expanduser('~'), '.api_automation', 'pan_indice'))
+
+    # Cache compartilhado de planilhas Excel já convertidas (Parquet/pickle em disco + memória)
+    EXCEL_CACHE_DIR = os.getenv('EXCEL_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.api_automation', 'excel_cache'))
+    EXCEL_CACHE_DISCO_MB = int(os.getenv('EXCEL_CACHE_DISCO_MB', '1024'))
+    EXCEL_CACHE_MEMORIA_MB = int(os.getenv('EXCEL_CACHE_MEMORIA_MB', '256'))
+
+    # Motor de esperas do IHS: orçamento de "humanização" por execução (s), jitter por ação (s)
+    # e tempo máximo esperando uma condição (página ociosa, elemento, frame)
+    IHS_HUMANIZACAO_MIN_S = float(os.getenv('IHS_HUMANIZACAO_MIN_S', '20'))
+    IHS_HUMANIZACAO_MAX_S = float(os.getenv('IHS_HUMANIZACAO_MAX_S', '45'))
+    IHS_JITTER_MIN_S = float(os.getenv('IHS_JITTER_MIN_S', '0.3'))
+    IHS_JITTER_MAX_S = float(os.getenv('IHS_JITTER_MAX_S', '1.5'))
+    IHS_TIMEOUT_CONDICAO_S = float(os.getenv('IHS_TIMEOUT_CONDICAO_S', '30'))
+    # Janela mínima (s) de novas tentativas de uma ação que falha antes de desistir com erro
+    IHS_JANELA_TENTATIVAS_S = float(os.getenv('IHS_JANELA_TENTATIVAS_S', '30'))
+    # Tempo máximo (s) esperando a grade do GeneXus trocar de página depois do clique em IMAGE1/IMAGE2
+    IHS_TIMEOUT_PAGINA_S = float(os.getenv('IHS_TIMEOUT_PAGINA_S', '20'))
+
+    # Execução paralela por loja: navegadores simultâneos por portal e pasta base
+    # das pastas de download isoladas (uma por loja)
+    IHS_MAX_NAVEGADORES = int(os.getenv('IHS_MAX_NAVEGADORES', '4'))
+    IHS_PASTA_DOWNLOADS_PARALELO = os.getenv('IHS_PASTA_DOWNLOADS_PARALELO', os.path.join(os.path.expanduser('~'), '.api_automation', 'downloads'))
+
+    # Pool de navegadores: pré-abertos, máximo ocioso, reciclagem por execuções/memória
+    # e tempo para devolver ao pool o navegador de uma sessão parada
+    DRIVER_POOL_AQUECIDOS = int(os.getenv('DRIVER_POOL_AQUECIDOS', '0'))
+    DRIVER_POOL_MAX_OCIOSOS = int(os.getenv('DRIVER_POOL_MAX_OCIOSOS', '2'))
+    DRIVER_POOL_MAX_JOBS = int(os.getenv('DRIVER_POOL_MAX_JOBS', '20'))
+    DRIVER_POOL_LIMITE_MEMORIA_MB = int(os.getenv('DRIVER_POOL_LIMITE_MEMORIA_MB', '1500'))
+    DRIVER_POOL_SESSAO_OCIOSA_MIN = int(os.getenv('DRIVER_POOL_SESSAO_OCIOSA_MIN', '120'))
+
+    # chromedriver: caminho fixo (opcional) e cache dos binários resolvidos por versão do Chrome
+    CHROMEDRIVER_PATH = os.getenv('CHROMEDRIVER_PATH')
+    CHROMEDRIVER_CACHE_DIR = os.getenv('CHROMEDRIVER_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.api_automation', 'chromedriver'))
+
+    # Perfil enxuto do navegador (IHS/FIDC): bloqueio de imagens/fontes/analytics via CDP,
+    # limite de processos de renderização e headless opcional. As exceções são nomes de
+    # automação (conciliacao_cdc, solicitacao_carga, baixa_arquivos, fidc) separados por vírgula.
+    NAVEGADOR_ENXUTO = os.getenv('NAVEGADOR_ENXUTO', 'true').lower() == 'true'
+    NAVEGADOR_ENXUTO_EXCECOES = {a.strip() for a in os.getenv('NAVEGADOR_ENXUTO_EXCECOES', '').split(',') if a.strip()}
+    NAVEGADOR_HEADLESS = os.getenv('NAVEGADOR_HEADLESS', 'false').lower() == 'true'
+    NAVEGADOR_RENDERER_LIMITE = int(os.getenv('NAVEGADOR_RENDERER_LIMITE', '2'))
+    NAVEGADOR_URLS_BLOQUEADAS = [u.strip() for u in os.getenv('NAVEGADOR_URLS_BLOQUEADAS', '').split(',') if u.strip()]
+
+    # Extensão do captcha sem interação: extensão descompactada (--load-extension) ou
+    # user-data-dir modelo com a extensão instalada, clonado para cada navegador em
+    # IHS_PERFIS_DIR/<versão>. A versão vem de IHS_PERFIL_MODELO_VERSAO ou do VERSAO.txt do modelo.
+    IHS_EXTENSAO_DIR = os.getenv('IHS_EXTENSAO_DIR')
+    IHS_PERFIL_MODELO_DIR = os.getenv('IHS_PERFIL_MODELO_DIR')
+    IHS_PERFIL_MODELO_VERSAO = os.getenv('IHS_PERFIL_MODELO_VERSAO')
+    IHS_PERFIS_DIR = os.getenv('IHS_PERFIS_DIR', os.path.join(os.path.expanduser('~'), '.api_automation', 'perfis'))
+
+    # Linhas por ida ao Oracle (cursor.arraysize/prefetchrows) nas consultas grandes
+    ORACLE_ARRAYSIZE = int(os.getenv('ORACLE_ARRAYSIZE', '2000'))
+
+    # Entradas da conciliação CDC (Honda, títulos do banco, extrato e grade) salvas por
+    # loja e dia, para reprocessar a conciliação sem raspar o portal
+    CDC_ENTRADAS_DIR = os.getenv('CDC_ENTRADAS_DIR', r'\\172.17.67.14\findev$\Automação - CDC\Entradas_conciliacao')
+    # Tolerância (em centavos) ao procurar o valor de um lote no extrato do dia; 0 = centavo exato
+    CDC_TOLERANCIA_EXTRATO_CENTAVOS = int(os.getenv('CDC_TOLERANCIA_EXTRATO_CENTAVOS', '0'))
+    # Lojas seguintes cujo extrato e títulos do banco são lidos enquanto o navegador raspa a atual
+    CDC_PIPELINE_ANTECIPAR = int(os.getenv('CDC_PIPELINE_ANTECIPAR', '1'))
+
     # Configurações da aplicação
     UPLOAD_FOLDER = 'uploads'
     ALLOWED_EXTENSIONS = {'xlsx', 'xls'}
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
 
+config = Config()
+
 def get_oracle_connection():
     """Estabelece conexão com o Oracle"""
     try:
@@ -20,7 +20,8 @@ class BaixasCNHHonda(ProtectedResource):
         
         try:
             # chama seu orquestrador já com o parâmetro da rota
-            t = Thread(target=baixa_arquivos_cnh_honda_main, args=(session_id, lojas), kwargs={"max_retries": 5}, daemon=True)
+            paralelo = request.args.get('paralelo', default=1, type=int)  # lojas em navegadores simultâneos
+            t = Thread(target=baixa_arquivos_cnh_honda_main, args=(session_id, lojas), kwargs={"max_retries": 5, "paralelo": paralelo}, daemon=True)
             t.start()
             return jsonify({"ok": True, "resultado": "✔ Baixas dos arquivos iniciada e executando em segundo plano.."})
         except ValueError as ve:
@@ -1,6 +1,6 @@
 from flask import Flask, request, jsonify, make_response
 from flask_restx import Namespace, Resource
-from APP.Services.conciliacao_cdc_honda_service import conciliacao_cdc_honda_main
+from APP.Services.conciliacao_cdc_honda_service import conciliacao_cdc_honda_main, reprocessar_conciliacao_cdc
 from APP.common.protected_resource import ProtectedResource
 from threading import Thread
 from APP.Config.ihs_config import request_stop, is_running
@@ -20,7 +20,8 @@ class ConciliacaoCDCHonda(ProtectedResource):
 
         try:
             # chama seu orquestrador já com o parâmetro da rota
-            t = Thread(target=conciliacao_cdc_honda_main, args=(session_id, lojas), daemon=True)
+            paralelo = request.args.get('paralelo', default=1, type=int)  # lojas em navegadores simultâneos
+            t = Thread(target=conciliacao_cdc_honda_main, args=(session_id, lojas), kwargs={"paralelo": paralelo}, daemon=True)
             t.start()
             return jsonify({"ok": True, "resultado": "✔ Conciliação dos valores iniciada e executando em segundo plano.."})
         except ValueError as ve:
@@ -30,6 +31,23 @@ class ConciliacaoCDCHonda(ProtectedResource):
             # erros inesperados
             return make_response(jsonify({"ok": False, "erro": str(e)}), 500)
 
+@conciliacao_cdc_honda_ns.route("/reprocessar/<lojas>")
+class ConciliacaoCDCHondaReprocessar(ProtectedResource):
+    def post(self, lojas: str):
+        # refaz só a conciliação com as entradas salvas (sem portal e sem banco); ?data=dd-mm-aaaa
+        data = request.args.get('data')
+        tolerancias = {}
+        for chave, tipo in (('tol_abs', float), ('tol_pct', float), ('thr_exato', int), ('thr_parcial', int)):
+            valor = request.args.get(chave, type=tipo)
+            if valor is not None:
+                tolerancias[chave] = valor
+
+        try:
+            ok, resultado = reprocessar_conciliacao_cdc(lojas, data, **tolerancias)
+            return make_response(jsonify({"ok": ok, "resultado": resultado}), 200 if ok else 400)
+        except Exception as e:
+            return make_response(jsonify({"ok": False, "erro": str(e)}), 500)
+
 @conciliacao_cdc_honda_ns.route("/stop")
 class ConciliacaoCDCHondaStop(ProtectedResource):
     def post(self):
@@ -19,7 +19,8 @@ class SolicitacaoCarga(Resource):
         
         try:
             # chama seu orquestrador já com o parâmetro da rota
-            t = Thread(target=solicitacao_carga_main, args=(session_id, lojas), daemon=True)
+            paralelo = request.args.get('paralelo', default=1, type=int)  # lojas em navegadores simultâneos
+            t = Thread(target=solicitacao_carga_main, args=(session_id, lojas), kwargs={"paralelo": paralelo}, daemon=True)
             t.start()
             return jsonify({"ok": True, "resultado": "✔ Solicitação de carga iniciada e executando em segundo plano.."})
         except ValueError as ve:
@@ -0,0 +1,133 @@
+# chromedriver.py - resolve o binário do chromedriver sem consultar a internet a cada execução
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from APP.Config.settings import Config
+
+logger = logging.getLogger(__name__)
+
+_RE_VERSAO = re.compile(r'(\d+)\.(\d+)\.(\d+)\.(\d+)')
+_ARQUIVO_CACHE = 'chromedriver.json'
+
+_lock = threading.Lock()
+_resolvidos: Dict[str, str] = {}
+
+
+def _versao_de_texto(texto: str) -> Optional[str]:
+    achado = _RE_VERSAO.search(texto or '')
+    return achado.group(0) if achado else None
+
+
+def _major(versao: Optional[str]) -> Optional[str]:
+    return versao.split('.', 1)[0] if versao else None
+
+
+def _executar_versao(binario: str) -> Optional[str]:
+    try:
+        saida = subprocess.run([binario, '--version'], capture_output=True, text=True, timeout=10)
+        return _versao_de_texto(saida.stdout or saida.stderr)
+    except Exception:
+        return None
+
+
+def versao_chrome(chrome_bin: Optional[str] = None) -> Optional[str]:
+    """Versão do Chrome instalado (registro no Windows, `--version` nos demais)."""
+    if sys.platform.startswith('win'):
+        try:
+            import winreg
+            for raiz in (winreg.HKEY_CURRENT_USER, winreg.HKEY_LOCAL_MACHINE):
+                try:
+                    with winreg.OpenKey(raiz, r'Software\Google\Chrome\BLBeacon') as chave:
+                        return _versao_de_texto(winreg.QueryValueEx(chave, 'version')[0])
+                except OSError:
+                    continue
+        except ImportError:
+            pass
+
+    candidatos = [chrome_bin, os.getenv('CHROME_BIN'), 'google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser']
+    for candidato in filter(None, candidatos):
+        binario = shutil.which(candidato) or (candidato if os.path.isfile(candidato) else None)
+        if binario:
+            versao = _executar_versao(binario)
+            if versao:
+                return versao
+    return None
+
+
+def _carregar_cache() -> Dict[str, str]:
+    caminho = Path(Config.CHROMEDRIVER_CACHE_DIR) / _ARQUIVO_CACHE
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _salvar_cache(cache: Dict[str, str]) -> None:
+    pasta = Path(Config.CHROMEDRIVER_CACHE_DIR)
+    try:
+        pasta.mkdir(parents=True, exist_ok=True)
+        temporario = pasta / f'{_ARQUIVO_CACHE}.{os.getpid()}.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, indent=2)
+        os.replace(temporario, pasta / _ARQUIVO_CACHE)
+    except OSError as e:
+        logger.warning(f"⚠️ Não foi possível gravar o cache do chromedriver: {e}")
+
+
+def _compativel(caminho: Optional[str], major_chrome: Optional[str]) -> bool:
+    if not caminho or not os.path.isfile(caminho):
+        return False
+    if major_chrome is None:
+        return True
+    return _major(_executar_versao(caminho)) == major_chrome
+
+
+def resolver_chromedriver(chrome_bin: Optional[str] = None) -> str:
+    """
+    Caminho do chromedriver a usar, nesta ordem:
+      1. CHROMEDRIVER_PATH (variável de ambiente/configuração), se existir;
+      2. binário já resolvido para a versão (major) do Chrome instalado, guardado
+         em CHROMEDRIVER_CACHE_DIR;
+      3. chromedriver no PATH, se for da mesma versão do Chrome;
+      4. ChromeDriverManager().install() — só aqui há acesso à internet.
+    O resultado fica memorizado no processo.
+    """
+    inicio = time.perf_counter()
+    configurado = Config.CHROMEDRIVER_PATH
+    if configurado and os.path.isfile(configurado):
+        logger.info(f"🧭 chromedriver configurado: {configurado}")
+        return configurado
+
+    with _lock:
+        versao = versao_chrome(chrome_bin)
+        chave = _major(versao) or 'desconhecida'
+        if chave in _resolvidos and os.path.isfile(_resolvidos[chave]):
+            return _resolvidos[chave]
+
+        cache = _carregar_cache()
+        origem = 'cache'
+        caminho = cache.get(chave)
+        if not _compativel(caminho, _major(versao)):
+            origem = 'PATH'
+            caminho = shutil.which('chromedriver')
+            if not _compativel(caminho, _major(versao)):
+                origem = 'ChromeDriverManager'
+                from webdriver_manager.chrome import ChromeDriverManager
+                caminho = ChromeDriverManager().install()
+            cache[chave] = caminho
+            _salvar_cache(cache)
+
+        _resolvidos[chave] = caminho
+        logger.info(f"🧭 chromedriver ({origem}, Chrome {versao or '?'}) resolvido em "
+                    f"{(time.perf_counter() - inicio) * 1000:.0f} ms: {caminho}")
+        return caminho
@@ -0,0 +1,257 @@
+# driver_pool.py - pool de navegadores Chrome reaproveitados entre execuções
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+import psutil
+
+from APP.Config.settings import Config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DriverPool:
+    """Um navegador do pool e a sua contabilidade de uso."""
+    driver: object
+    criado_em: float = field(default_factory=time.time)
+    jobs: int = 0
+    pasta_downloads: Optional[Path] = None
+
+
+class PoolDrivers:
+    """
+    Pool de WebDrivers pré-abertos com empréstimo/devolução.
+
+    - `aquecer()` abre navegadores antes de serem pedidos (a partida a frio do
+      Chrome leva de 5 a 15 s por execução).
+    - Ao emprestar, o navegador passa por uma checagem de vida; os mortos são
+      descartados e substituídos.
+    - Ao devolver, é limpo (cookies, abas extras, about:blank) e reciclado depois
+      de `max_jobs` execuções ou se a árvore de processos do Chrome passar de
+      `limite_memoria_mb`.
+    - Cada empréstimo pode ter a sua pasta de downloads (via CDP).
+    """
+
+    def __init__(self, nome: str, fabrica: Callable[[], object],
+                 aquecidos: int = Config.DRIVER_POOL_AQUECIDOS,
+                 max_ociosos: int = Config.DRIVER_POOL_MAX_OCIOSOS,
+                 max_jobs: int = Config.DRIVER_POOL_MAX_JOBS,
+                 limite_memoria_mb: int = Config.DRIVER_POOL_LIMITE_MEMORIA_MB):
+        self.nome = nome
+        self.fabrica = fabrica
+        self.aquecidos = aquecidos
+        self.max_ociosos = max(max_ociosos, aquecidos)
+        self.max_jobs = max_jobs
+        self.limite_memoria_mb = limite_memoria_mb
+
+        self._lock = threading.Lock()
+        self._ociosos: List[DriverPool] = []
+        self._emprestados: Dict[int, DriverPool] = {}
+        self._aquecendo = 0
+
+        self.criados = 0
+        self.reaproveitados = 0
+        self.reciclados = 0
+
+    # ---------- Empréstimo ----------
+    def emprestar(self, pasta_downloads: Union[str, Path, None] = None):
+        """Devolve um driver vivo (ocioso se houver, senão um novo)."""
+        while True:
+            with self._lock:
+                item = self._ociosos.pop() if self._ociosos else None
+            if item is None:
+                item = self._criar()
+                break
+            if self._vivo(item):
+                with self._lock:
+                    self.reaproveitados += 1
+                break
+            self._descartar(item, 'não respondeu à checagem de vida')
+
+        item.jobs += 1
+        if pasta_downloads is not None:
+            self._definir_pasta_downloads(item, Path(pasta_downloads))
+        with self._lock:
+            self._emprestados[id(item.driver)] = item
+        self._repor_aquecidos()
+        return item.driver
+
+    def devolver(self, driver, descartar: bool = False) -> None:
+        """Devolve o driver ao pool (ou o fecha se estiver velho, pesado ou morto)."""
+        with self._lock:
+            item = self._emprestados.pop(id(driver), None)
+        if item is None:
+            self._fechar(driver)
+            return
+
+        motivo = 'descartado por quem usou' if descartar else self._motivo_reciclagem(item)
+        if motivo is None and not self._limpar(item):
+            motivo = 'falhou ao limpar a sessão'
+
+        with self._lock:
+            cheio = len(self._ociosos) >= self.max_ociosos
+        if motivo is None and cheio:
+            motivo = 'pool cheio'
+
+        if motivo:
+            self._descartar(item, motivo)
+            self._repor_aquecidos()
+        else:
+            with self._lock:
+                self._ociosos.append(item)
+
+    @contextmanager
+    def usar(self, pasta_downloads: Union[str, Path, None] = None):
+        driver = self.emprestar(pasta_downloads)
+        descartar = False
+        try:
+            yield driver
+        except Exception:
+            descartar = not self._vivo(DriverPool(driver))
+            raise
+        finally:
+            self.devolver(driver, descartar=descartar)
+
+    # ---------- Aquecimento ----------
+    def aquecer(self) -> None:
+        """Abre em segundo plano os navegadores que faltam para `aquecidos` ociosos."""
+        self._repor_aquecidos()
+
+    def _repor_aquecidos(self) -> None:
+        with self._lock:
+            faltam = self.aquecidos - len(self._ociosos) - self._aquecendo
+            if faltam <= 0:
+                return
+            self._aquecendo += faltam
+        for _ in range(faltam):
+            threading.Thread(target=self._aquecer_um, daemon=True, name=f'pool-{self.nome}').start()
+
+    def _aquecer_um(self) -> None:
+        try:
+            item = self._criar()
+            with self._lock:
+                self._ociosos.append(item)
+        except Exception as e:
+            logger.warning(f"⚠️ Pool {self.nome}: falha ao pré-abrir navegador: {e}")
+        finally:
+            with self._lock:
+                self._aquecendo -= 1
+
+    # ---------- Ciclo de vida ----------
+    def _criar(self) -> DriverPool:
+        inicio = time.perf_counter()
+        driver = self.fabrica()
+        with self._lock:
+            self.criados += 1
+        logger.info(f"🚀 Pool {self.nome}: navegador aberto em {time.perf_counter() - inicio:.1f}s")
+        return DriverPool(driver)
+
+    @staticmethod
+    def _vivo(item: DriverPool) -> bool:
+        try:
+            item.driver.execute_script('return 1')
+            return True
+        except Exception:
+            return False
+
+    def _motivo_reciclagem(self, item: DriverPool) -> Optional[str]:
+        if not self._vivo(item):
+            return 'navegador morto'
+        if self.max_jobs and item.jobs >= self.max_jobs:
+            return f'{item.jobs} execuções'
+        memoria = self._memoria_mb(item.driver)
+        if self.limite_memoria_mb and memoria > self.limite_memoria_mb:
+            return f'{memoria:.0f} MB de memória'
+        return None
+
+    @staticmethod
+    def _memoria_mb(driver) -> float:
+        """Soma da memória residente do chromedriver e de todos os processos do Chrome."""
+        try:
+            processo = psutil.Process(driver.service.process.pid)
+            processos = [processo] + processo.children(recursive=True)
+            return sum(p.memory_info().rss for p in processos if p.is_running()) / 1024 / 1024
+        except Exception:
+            return 0.0
+
+    @staticmethod
+    def _limpar(item: DriverPool) -> bool:
+        driver = item.driver
+        try:
+            abas = driver.window_handles
+            for aba in abas[1:]:
+                driver.switch_to.window(aba)
+                driver.close()
+            driver.switch_to.window(abas[0])
+            driver.delete_all_cookies()
+            driver.get('about:blank')
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _definir_pasta_downloads(item: DriverPool, pasta: Path) -> None:
+        pasta = pasta.resolve()
+        pasta.mkdir(parents=True, exist_ok=True)
+        parametros = {'behavior': 'allow', 'downloadPath': str(pasta)}
+        try:
+            item.driver.execute_cdp_cmd('Browser.setDownloadBehavior', parametros)
+        except Exception:
+            item.driver.execute_cdp_cmd('Page.setDownloadBehavior', parametros)
+        item.pasta_downloads = pasta
+
+    def _descartar(self, item: DriverPool, motivo: str) -> None:
+        with self._lock:
+            self.reciclados += 1
+        logger.info(f"♻️ Pool {self.nome}: navegador reciclado ({motivo})")
+        self._fechar(item.driver)
+
+    @staticmethod
+    def _fechar(driver) -> None:
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def encerrar(self) -> None:
+        """Fecha todos os navegadores ociosos (os emprestados são fechados na devolução)."""
+        with self._lock:
+            ociosos, self._ociosos = self._ociosos, []
+            self.aquecidos = 0
+        for item in ociosos:
+            self._fechar(item.driver)
+
+    def estatisticas(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'ociosos': len(self._ociosos),
+                'emprestados': len(self._emprestados),
+                'criados': self.criados,
+                'reaproveitados': self.reaproveitados,
+                'reciclados': self.reciclados,
+            }
+
+
+# Um pool por perfil de navegador (IHS, FIDC, runner headless)
+_pools: Dict[str, PoolDrivers] = {}
+_lock_pools = threading.Lock()
+
+
+def obter_pool(nome: str, fabrica: Callable[[], object], **kwargs) -> PoolDrivers:
+    """Pool compartilhado do perfil `nome` (criado na primeira chamada)."""
+    with _lock_pools:
+        if nome not in _pools:
+            _pools[nome] = PoolDrivers(nome, fabrica, **kwargs)
+        return _pools[nome]
+
+
+def encerrar_pools() -> None:
+    with _lock_pools:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.encerrar()
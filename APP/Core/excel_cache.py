@@ -0,0 +1,296 @@
+# excel_cache.py - cache compartilhado de planilhas Excel já convertidas em DataFrame
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+import pandas as pd
+
+from APP.Config.settings import Config
+
+logger = logging.getLogger(__name__)
+
+# Parquet é opcional: sem pyarrow as planilhas são gravadas em pickle do pandas
+try:
+    import pyarrow  # type: ignore  # noqa: F401
+    PARQUET_DISPONIVEL = True
+except ImportError:
+    PARQUET_DISPONIVEL = False
+
+VERSAO_CACHE = 1
+_ARQUIVO_META = "meta.json"
+
+
+class CacheExcel:
+    """
+    Cache de planilhas endereçado pelo conteúdo do arquivo.
+
+    A chave é o hash SHA-1 dos bytes do arquivo mais os parâmetros de leitura,
+    então o mesmo relatório copiado para outro caminho (ex.: upload) também é
+    um acerto. Para não recalcular o hash, o resultado fica memorizado por
+    (caminho, mtime, tamanho).
+
+    Há duas camadas: memória (LRU por bytes) e disco (uma pasta por entrada,
+    uma planilha por arquivo Parquet/pickle), com remoção das entradas menos
+    usadas quando o diretório passa do limite.
+    """
+
+    def __init__(self, diretorio: Union[str, Path], limite_disco_bytes: int, limite_memoria_bytes: int):
+        self.diretorio = Path(diretorio)
+        self.limite_disco_bytes = limite_disco_bytes
+        self.limite_memoria_bytes = limite_memoria_bytes
+
+        self._lock = threading.RLock()
+        self._memoria: "OrderedDict[str, Tuple[Dict[str, pd.DataFrame], bool, int]]" = OrderedDict()
+        self._bytes_memoria = 0
+        self._bytes_disco: Optional[int] = None  # total em disco, varrido uma vez e mantido a cada gravação
+        self._hashes: Dict[Tuple[str, int, int], str] = {}
+
+        self.acertos_memoria = 0
+        self.acertos_disco = 0
+        self.falhas = 0
+
+    # ---------- API ----------
+    def ler(self, caminho: Union[str, Path], persistir: bool = True, **kwargs) -> Union[pd.DataFrame, Dict[str, pd.DataFrame]]:
+        """
+        Equivalente a pd.read_excel(caminho, **kwargs), usando o cache.
+
+        persistir=False mantém a planilha só em memória (para arquivos com
+        dados sensíveis, como senhas, que não devem ir para o disco local).
+        """
+        caminho = Path(caminho)
+        chave, conteudo = self._chave(caminho, kwargs)
+
+        with self._lock:
+            item = self._memoria.get(chave)
+            if item is not None:
+                self._memoria.move_to_end(chave)
+                self.acertos_memoria += 1
+                return self._copiar(item[0], item[1])
+
+        planilhas = unica = None
+        if persistir:
+            carregado = self._carregar_disco(chave)
+            if carregado is not None:
+                planilhas, unica = carregado
+                with self._lock:
+                    self.acertos_disco += 1
+
+        if planilhas is None:
+            with self._lock:
+                self.falhas += 1
+            if conteudo is None:  # hash memorizado: o arquivo ainda não foi lido nesta chamada
+                conteudo = caminho.read_bytes()
+            # Parse dos bytes já lidos para o hash: o arquivo (muitas vezes no SMB) é lido uma vez só
+            resultado = pd.read_excel(BytesIO(conteudo), **kwargs)
+            unica = isinstance(resultado, pd.DataFrame)
+            planilhas = {'': resultado} if unica else resultado
+            if persistir:
+                self._gravar_disco(chave, caminho, planilhas, unica)
+
+        self._guardar_memoria(chave, planilhas, unica)
+        return self._copiar(planilhas, unica)
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.acertos_memoria + self.acertos_disco + self.falhas
+            return {
+                'acertos_memoria': self.acertos_memoria,
+                'acertos_disco': self.acertos_disco,
+                'falhas': self.falhas,
+                'taxa_acerto': round((self.acertos_memoria + self.acertos_disco) / total, 4) if total else 0.0,
+                'bytes_memoria': self._bytes_memoria,
+                'bytes_disco': self._somar_disco(0),
+            }
+
+    def limpar_memoria(self) -> None:
+        with self._lock:
+            self._memoria.clear()
+            self._bytes_memoria = 0
+
+    # ---------- Chave ----------
+    def _chave(self, caminho: Path, kwargs: Dict[str, Any]) -> Tuple[str, Optional[bytes]]:
+        """
+        Chave da leitura e os bytes do arquivo, quando foi preciso lê-los para
+        o hash (None se o hash já estava memorizado).
+        """
+        stat = caminho.stat()
+        assinatura = (str(caminho.resolve()), stat.st_mtime_ns, stat.st_size)
+
+        conteudo = None
+        with self._lock:
+            hash_conteudo = self._hashes.get(assinatura)
+        if hash_conteudo is None:
+            conteudo = caminho.read_bytes()
+            hash_conteudo = hashlib.sha1(conteudo).hexdigest()
+            with self._lock:
+                self._hashes[assinatura] = hash_conteudo
+
+        parametros = json.dumps(kwargs, sort_keys=True, default=str)
+        chave = hashlib.sha1(f"{VERSAO_CACHE}|{hash_conteudo}|{parametros}".encode('utf-8')).hexdigest()
+        return chave, conteudo
+
+    # ---------- Memória ----------
+    @staticmethod
+    def _copiar(planilhas: Dict[str, pd.DataFrame], unica: bool) -> Union[pd.DataFrame, Dict[str, pd.DataFrame]]:
+        # Quem chama costuma alterar o DataFrame (colunas, filtros); o cache não pode ser afetado
+        if unica:
+            return planilhas[''].copy()
+        return {nome: df.copy() for nome, df in planilhas.items()}
+
+    def _guardar_memoria(self, chave: str, planilhas: Dict[str, pd.DataFrame], unica: bool) -> None:
+        tamanho = sum(int(df.memory_usage(deep=True).sum()) for df in planilhas.values())
+        if tamanho > self.limite_memoria_bytes:
+            return
+        with self._lock:
+            if chave in self._memoria:
+                return
+            self._memoria[chave] = (planilhas, unica, tamanho)
+            self._bytes_memoria += tamanho
+            while self._bytes_memoria > self.limite_memoria_bytes and self._memoria:
+                _, (_, _, tamanho_antigo) = self._memoria.popitem(last=False)
+                self._bytes_memoria -= tamanho_antigo
+
+    # ---------- Disco ----------
+    def _pasta_entrada(self, chave: str) -> Path:
+        return self.diretorio / chave[:2] / chave
+
+    def _carregar_disco(self, chave: str) -> Optional[Tuple[Dict[str, pd.DataFrame], bool]]:
+        pasta = self._pasta_entrada(chave)
+        meta_path = pasta / _ARQUIVO_META
+        if not meta_path.exists():
+            return None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            planilhas = {}
+            for item in meta['planilhas']:
+                arquivo = pasta / item['arquivo']
+                if item['formato'] == 'parquet':
+                    planilhas[item['nome']] = pd.read_parquet(arquivo)
+                else:
+                    planilhas[item['nome']] = pd.read_pickle(arquivo)
+            # Marca o uso para a política de remoção (menos usados saem primeiro)
+            os.utime(meta_path, None)
+            return planilhas, meta['unica']
+        except Exception as e:
+            logger.warning(f"⚠️ Entrada de cache inválida ({chave}), será descartada: {e}")
+            tamanho = self._tamanho_pasta(pasta)
+            shutil.rmtree(pasta, ignore_errors=True)
+            self._somar_disco(-tamanho)
+            return None
+
+    def _gravar_disco(self, chave: str, origem: Path, planilhas: Dict[str, pd.DataFrame], unica: bool) -> None:
+        pasta = self._pasta_entrada(chave)
+        temporaria = pasta.with_name(f"{chave}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            temporaria.mkdir(parents=True, exist_ok=True)
+            itens = []
+            for i, (nome, df) in enumerate(planilhas.items()):
+                formato = self._gravar_planilha(df, temporaria / f"planilha_{i}")
+                itens.append({'nome': nome, 'arquivo': f"planilha_{i}.{formato}", 'formato': formato})
+
+            with open(temporaria / _ARQUIVO_META, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'versao': VERSAO_CACHE,
+                    'origem': str(origem),
+                    'criado_em': time.time(),
+                    'unica': unica,
+                    'planilhas': itens,
+                }, f, ensure_ascii=False)
+
+            if pasta.exists():
+                shutil.rmtree(temporaria, ignore_errors=True)
+                return
+            tamanho = self._tamanho_pasta(temporaria)
+            os.replace(temporaria, pasta)
+        except Exception as e:
+            logger.warning(f"⚠️ Não foi possível gravar {origem.name} no cache: {e}")
+            shutil.rmtree(temporaria, ignore_errors=True)
+            return
+
+        # A pasta do cache só é varrida quando o total passa do limite
+        if self._somar_disco(tamanho) > self.limite_disco_bytes:
+            self._remover_excedente()
+
+    @staticmethod
+    def _gravar_planilha(df: pd.DataFrame, base: Path) -> str:
+        """Grava em Parquet quando possível; colunas mistas ou sem nome em texto caem no pickle."""
+        if PARQUET_DISPONIVEL and all(isinstance(c, str) for c in df.columns):
+            try:
+                df.to_parquet(base.with_suffix('.parquet'))
+                return 'parquet'
+            except Exception:
+                base.with_suffix('.parquet').unlink(missing_ok=True)
+        df.to_pickle(base.with_suffix('.pkl'), protocol=pickle.HIGHEST_PROTOCOL)
+        return 'pkl'
+
+    @staticmethod
+    def _tamanho_pasta(pasta: Path) -> int:
+        try:
+            return sum(arq.stat().st_size for arq in pasta.iterdir())
+        except OSError:
+            return 0
+
+    def _entradas_disco(self):
+        if not self.diretorio.exists():
+            return []
+        entradas = []
+        for meta_path in self.diretorio.glob(f"*/*/{_ARQUIVO_META}"):
+            pasta = meta_path.parent
+            try:
+                tamanho = sum(arq.stat().st_size for arq in pasta.iterdir())
+                entradas.append((meta_path.stat().st_mtime, tamanho, pasta))
+            except OSError:
+                continue
+        return entradas
+
+    def _somar_disco(self, delta: int) -> int:
+        """
+        Ajusta o total de bytes em disco e o devolve. Na primeira vez o total
+        vem de uma varredura da pasta (que já inclui a alteração recém-feita).
+        """
+        with self._lock:
+            if self._bytes_disco is None:
+                self._bytes_disco = sum(tamanho for _, tamanho, _ in self._entradas_disco())
+            else:
+                self._bytes_disco = max(0, self._bytes_disco + delta)
+            return self._bytes_disco
+
+    def _remover_excedente(self) -> None:
+        # Varre a pasta de novo: o total também se corrige com o que outros processos gravaram.
+        # Desce até 90% do limite, para a próxima gravação não disparar outra varredura.
+        alvo = int(self.limite_disco_bytes * 0.9)
+        with self._lock:
+            entradas = self._entradas_disco()
+            total = sum(tamanho for _, tamanho, _ in entradas)
+            if total <= self.limite_disco_bytes:
+                self._bytes_disco = total
+                return
+            for _, tamanho, pasta in sorted(entradas, key=lambda e: e[0]):
+                if total <= alvo:
+                    break
+                shutil.rmtree(pasta, ignore_errors=True)
+                total -= tamanho
+                logger.info(f"🧹 Cache Excel: entrada removida ({tamanho} bytes)")
+            self._bytes_disco = total
+
+
+cache_excel = CacheExcel(
+    Config.EXCEL_CACHE_DIR,
+    limite_disco_bytes=Config.EXCEL_CACHE_DISCO_MB * 1024 * 1024,
+    limite_memoria_bytes=Config.EXCEL_CACHE_MEMORIA_MB * 1024 * 1024,
+)
+
+
+def ler_excel_cacheado(caminho: Union[str, Path], persistir: bool = True, **kwargs):
+    """Atalho para o cache compartilhado por todas as automações."""
+    return cache_excel.ler(caminho, persistir=persistir, **kwargs)
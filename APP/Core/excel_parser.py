@@ -1 +1,112 @@
-# Parser de Excel
\ No newline at end of file
+# excel_parser.py - ponto único de leitura de planilhas Excel
+import logging
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Sequence, Union
+
+import pandas as pd
+
+from APP.Core.excel_cache import ler_excel_cacheado
+
+logger = logging.getLogger(__name__)
+
+# calamine (Rust) é opcional: sem ele a leitura cai no openpyxl (.xlsx) / xlrd (.xls)
+try:
+    import python_calamine  # type: ignore  # noqa: F401
+    CALAMINE_DISPONIVEL = True
+except ImportError:
+    CALAMINE_DISPONIVEL = False
+
+# Linhas examinadas na detecção automática do cabeçalho
+LINHAS_BUSCA_CABECALHO = 30
+
+
+def _engine_padrao(caminho: Union[str, Path, BytesIO]) -> Optional[str]:
+    """calamine quando disponível; senão o engine nativo da extensão."""
+    if CALAMINE_DISPONIVEL:
+        return "calamine"
+    if isinstance(caminho, (str, Path)) and str(caminho).lower().endswith(".xls"):
+        return "xlrd"
+    return "openpyxl"
+
+
+def _normalizar(texto: Any) -> str:
+    return str(texto).strip().lower()
+
+
+def detectar_linha_cabecalho(caminho: Union[str, Path, BytesIO], colunas: Iterable[str],
+                             sheet_name: Union[str, int] = 0, engine: Optional[str] = None,
+                             cache: bool = True, persistir: bool = True) -> Optional[int]:
+    """
+    Índice (base 0) da primeira linha que contém todas as colunas informadas.
+    Retorna None se nenhuma das primeiras LINHAS_BUSCA_CABECALHO linhas servir.
+    """
+    esperadas = {_normalizar(c) for c in colunas}
+    topo = _ler(caminho, engine=engine, cache=cache, persistir=persistir,
+                sheet_name=sheet_name, header=None, nrows=LINHAS_BUSCA_CABECALHO)
+
+    for idx, linha in topo.iterrows():
+        valores = {_normalizar(v) for v in linha.dropna()}
+        if esperadas.issubset(valores):
+            return int(idx)
+    return None
+
+
+def ler_excel(caminho: Union[str, Path, BytesIO],
+              sheet_name: Union[str, int, None] = 0,
+              header: Optional[int] = 0,
+              usecols: Union[str, Sequence[Any], None] = None,
+              dtype: Any = None,
+              cabecalho_com: Optional[Sequence[str]] = None,
+              engine: Optional[str] = None,
+              cache: bool = True,
+              persistir: bool = True,
+              **kwargs) -> Union[pd.DataFrame, Dict[str, pd.DataFrame]]:
+    """
+    Lê uma planilha Excel (.xlsx/.xls) com o engine mais rápido disponível.
+
+    Parâmetros:
+        caminho: arquivo ou BytesIO já lido da rede.
+        sheet_name / header / usecols / dtype: mesmos de pd.read_excel
+                       (usecols aceita letras "K:L" ou lista de nomes de colunas).
+        cabecalho_com: nomes de colunas que identificam a linha de cabeçalho;
+                       quando informado, substitui o `header` fixo.
+        engine: força um engine (None = calamine com fallback para openpyxl/xlrd).
+        cache: usa o cache compartilhado de planilhas (APP.Core.excel_cache).
+        persistir: False mantém o cache só em memória (arquivos sensíveis).
+
+    Retorno:
+        DataFrame, ou dict de DataFrames quando sheet_name=None.
+    """
+    if cabecalho_com:
+        linha = detectar_linha_cabecalho(caminho, cabecalho_com,
+                                         sheet_name=sheet_name if sheet_name is not None else 0,
+                                         engine=engine, cache=cache, persistir=persistir)
+        if linha is not None:
+            header = linha
+        else:
+            logger.warning(f"⚠️ Cabeçalho com {list(cabecalho_com)} não encontrado; usando header={header}")
+
+    return _ler(caminho, engine=engine, cache=cache, persistir=persistir,
+                sheet_name=sheet_name, header=header, usecols=usecols, dtype=dtype, **kwargs)
+
+
+def _ler(caminho, engine: Optional[str], cache: bool, persistir: bool, **kwargs):
+    engine_escolhido = engine or _engine_padrao(caminho)
+    try:
+        return _read_excel(caminho, cache, persistir, engine=engine_escolhido, **kwargs)
+    except Exception as e:
+        if engine or engine_escolhido != "calamine":
+            raise
+        # Arquivos que o calamine não entende voltam para o engine nativo da extensão
+        fallback = "xlrd" if str(getattr(caminho, "name", caminho)).lower().endswith(".xls") else "openpyxl"
+        logger.warning(f"⚠️ calamine falhou ({e}); lendo com {fallback}")
+        return _read_excel(caminho, cache, persistir, engine=fallback, **kwargs)
+
+
+def _read_excel(caminho, cache: bool, persistir: bool, **kwargs):
+    if cache and isinstance(caminho, (str, Path)):
+        return ler_excel_cacheado(caminho, persistir=persistir, **kwargs)
+    if isinstance(caminho, BytesIO):
+        caminho.seek(0)  # o mesmo buffer pode ser lido mais de uma vez (cabeçalho, fallback)
+    return pd.read_excel(caminho, **kwargs)
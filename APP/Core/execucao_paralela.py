@@ -0,0 +1,94 @@
+# execucao_paralela.py - roda uma automação do IHS em várias lojas ao mesmo tempo
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple, Union
+
+from APP.Config.ihs_config import encerrar_driver, should_stop, vincular_sessao
+from APP.Config.settings import Config
+
+logger = logging.getLogger(__name__)
+
+# Um limite de navegadores por portal, compartilhado por todas as automações que o acessam
+_semaforos: Dict[str, threading.BoundedSemaphore] = {}
+_lock_semaforos = threading.Lock()
+
+
+def _semaforo_portal(portal: str) -> threading.BoundedSemaphore:
+    with _lock_semaforos:
+        if portal not in _semaforos:
+            _semaforos[portal] = threading.BoundedSemaphore(max(1, Config.IHS_MAX_NAVEGADORES))
+        return _semaforos[portal]
+
+
+def _nome_pasta(texto: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]+", "_", texto.strip().upper()) or "LOJA"
+
+
+def executar_lojas_em_paralelo(session_id: str,
+                               lojas: Iterable[str],
+                               executar_loja: Callable[[str, str, Path], Tuple[bool, str]],
+                               portal: str = 'IHS',
+                               max_paralelo: Optional[int] = None,
+                               pasta_base: Union[str, Path, None] = None) -> Dict[str, Dict]:
+    """
+    Executa `executar_loja` para cada loja em navegadores separados.
+
+    Cada loja roda em uma sessão filha ("<session_id> | <loja>"), com driver e
+    pasta de downloads próprios; o stop da sessão pai vale para todas. O número
+    de lojas simultâneas é limitado por `max_paralelo` e pelo limite do portal
+    (Config.IHS_MAX_NAVEGADORES), que vale entre execuções diferentes.
+
+    Parâmetros:
+        executar_loja: função (sessao_loja, loja, pasta_downloads) -> (ok, mensagem).
+        pasta_base: onde criar as pastas de download por loja.
+
+    Retorno:
+        dict: loja -> {'ok', 'mensagem', 'duracao_s', 'pasta_downloads'}.
+    """
+    lojas = list(dict.fromkeys(lojas))
+    base = Path(pasta_base or Config.IHS_PASTA_DOWNLOADS_PARALELO)
+    semaforo = _semaforo_portal(portal)
+    resultados: Dict[str, Dict] = {}
+
+    def _rodar(loja: str) -> None:
+        pasta = base / _nome_pasta(session_id) / _nome_pasta(loja)
+        resultado = {'ok': False, 'mensagem': '', 'duracao_s': 0.0, 'pasta_downloads': str(pasta)}
+        resultados[loja] = resultado
+
+        with semaforo:
+            if should_stop(session_id):
+                resultado['mensagem'] = 'Cancelada (stop solicitado)'
+                return
+
+            sessao_loja = f'{session_id} | {loja}'
+            vincular_sessao(sessao_loja, session_id)
+            inicio = time.perf_counter()
+            try:
+                pasta.mkdir(parents=True, exist_ok=True)
+                retorno = executar_loja(sessao_loja, loja, pasta)
+                ok, mensagem = retorno if isinstance(retorno, tuple) else (True, str(retorno))
+                resultado.update(ok=bool(ok), mensagem=mensagem)
+            except Exception as e:
+                logger.exception(f"❌ Loja {loja}: {e}")
+                resultado['mensagem'] = f'Erro na loja {loja}.\nDescrição: {str(e)}'
+            finally:
+                encerrar_driver(sessao_loja)
+                resultado['duracao_s'] = round(time.perf_counter() - inicio, 1)
+                print(f"{'✅' if resultado['ok'] else '❌'} [{session_id}] {loja}: {resultado['duracao_s']}s")
+
+    workers = max(1, min(max_paralelo or Config.IHS_MAX_NAVEGADORES, len(lojas) or 1))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='loja') as executor:
+        list(executor.map(_rodar, lojas))
+
+    return {loja: resultados[loja] for loja in lojas}
+
+
+def resumir_resultados(resultados: Dict[str, Dict]) -> Tuple[bool, str]:
+    """Converte o resultado por loja no (ok, mensagem) que as automações devolvem."""
+    falhas = [loja for loja, r in resultados.items() if not r['ok']]
+    linhas = [f"{'✅' if r['ok'] else '❌'} {loja} ({r['duracao_s']}s): {r['mensagem']}" for loja, r in resultados.items()]
+    return not falhas, '\n'.join(linhas)
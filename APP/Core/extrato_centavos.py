@@ -0,0 +1,99 @@
+# extrato_centavos.py - valores do extrato em centavos inteiros, com consulta exata ou com tolerância
+import math
+import re
+from bisect import bisect_left
+from numbers import Number
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+
+from APP.Core.pan_indice import valor_em_centavos
+
+_RE_LIMPEZA = re.compile(r'[R$\s]')
+
+
+def centavos(valor) -> Optional[int]:
+    """
+    Centavos inteiros de um valor do extrato, em qualquer formato das planilhas:
+    número (int/float/numpy), '1.234,56', 'R$ -1.234,56', '1234.56' ou '(12,30)'.
+
+    Retorno:
+        int | None: None para célula vazia, NaN ou texto que não é valor.
+    """
+    if valor is None or isinstance(valor, bool):
+        return None
+    if isinstance(valor, Number):
+        valor = float(valor)
+        return None if math.isnan(valor) or math.isinf(valor) else valor_em_centavos(valor)
+
+    texto = _RE_LIMPEZA.sub('', str(valor))
+    negativo = texto.startswith('(') and texto.endswith(')')
+    texto = texto.strip('()')
+    if not texto:
+        return None
+    if ',' in texto:
+        texto = texto.replace('.', '').replace(',', '.')
+    elif texto.count('.') > 1 or (texto.count('.') == 1 and len(texto.rsplit('.', 1)[1]) == 3):
+        texto = texto.replace('.', '')  # só separador de milhar: 1.234 / 1.234.567
+    try:
+        resultado = valor_em_centavos(float(texto))
+    except ValueError:
+        return None
+    return -resultado if negativo else resultado
+
+
+class ValoresExtrato:
+    """
+    Valores do extrato de uma loja normalizados para centavos na carga.
+
+    `valor in extrato` é uma consulta num set (O(1)) e não sofre com a
+    representação do float (0.1 + 0.2 == 0.3 em centavos). Com
+    `tolerancia_centavos` > 0 a consulta aceita ±N centavos, por busca binária
+    na lista ordenada.
+    """
+
+    def __init__(self, valores: Iterable = (), tolerancia_centavos: int = 0):
+        self.tolerancia_centavos = int(tolerancia_centavos)
+        self.invalidos = 0
+        convertidos = []
+        for valor in valores:
+            c = centavos(valor)
+            if c is None:
+                self.invalidos += 1
+            else:
+                convertidos.append(c)
+        self._ordenados = np.array(sorted(convertidos), dtype=np.int64)
+        self._conjunto = frozenset(convertidos)
+
+    def __len__(self) -> int:
+        return len(self._ordenados)
+
+    def __iter__(self) -> Iterator[float]:
+        """Valores em reais (float), na ordem crescente."""
+        return (int(c) / 100 for c in self._ordenados)
+
+    def __contains__(self, valor) -> bool:
+        return self.contem(valor)
+
+    def contem(self, valor, tolerancia_centavos: Optional[int] = None) -> bool:
+        """True se `valor` (qualquer formato aceito por centavos) está no extrato, a até ±N centavos."""
+        c = centavos(valor)
+        if c is None:
+            return False
+        n = self.tolerancia_centavos if tolerancia_centavos is None else int(tolerancia_centavos)
+        if n <= 0:
+            return c in self._conjunto
+        i = bisect_left(self._ordenados, c - n)
+        return bool(i < len(self._ordenados) and self._ordenados[i] <= c + n)
+
+    def contem_lote(self, valores: Iterable, tolerancia_centavos: Optional[int] = None) -> np.ndarray:
+        """`contem` para uma coluna inteira (array de bool na mesma ordem)."""
+        n = self.tolerancia_centavos if tolerancia_centavos is None else int(tolerancia_centavos)
+        convertidos = [centavos(v) for v in valores]
+        validos = np.array([c is not None for c in convertidos], dtype=bool)
+        alvo = np.array([c if c is not None else 0 for c in convertidos], dtype=np.int64)
+        if not len(self._ordenados):
+            return np.zeros(len(alvo), dtype=bool)
+        i = np.searchsorted(self._ordenados, alvo - max(n, 0), side='left')
+        achou = (i < len(self._ordenados)) & (self._ordenados[np.minimum(i, len(self._ordenados) - 1)] <= alvo + max(n, 0))
+        return achou & validos
@@ -8,6 +8,8 @@ from pathlib import Path
 import pandas as pd
 from collections import OrderedDict
 
+from APP.Core.excel_parser import ler_excel
+
 XLSX_PATH = r"C:\Users\sousa.lima\Documents\Projetos\EmissaoBoletoFIDC\FIDC CAP DIARIO.xlsx"
 
 
@@ -17,8 +19,8 @@ def load_login_from_excel(sheet: str = "Para pagamento -->") -> LoginDTO:
     if not XLSX_PATH.exists():
         raise FileNotFoundError(f"Arquivo não encontrado: {XLSX_PATH}")
 
-    # ✅ Lê apenas as colunas K e L (10 e 11)
-    df = pd.read_excel(XLSX_PATH, sheet_name=sheet, usecols="K:L")
+    # ✅ Lê apenas as colunas K e L (10 e 11); credenciais não passam pelo cache de planilhas
+    df = ler_excel(XLSX_PATH, sheet_name=sheet, usecols="K:L", cache=False)
 
     # ✅ Linha 6 (índice 5), coluna 0 = K6 → usuário
     usuario = str(df.iat[4, 0]).strip()
@@ -81,7 +83,7 @@ def selecionar_emp_e_primeira_nf(
     real_sheet = _find_sheet_case_insensitive(xlsx, sheet_name)
 
     # Lê só as colunas necessárias (se souber os nomes). Caso contrário, lê tudo.
-    df = pd.read_excel(xlsx, sheet_name=real_sheet, engine="openpyxl")
+    df = ler_excel(xlsx, sheet_name=real_sheet)
 
     # Normaliza colunas (para matching)
     df.columns = [str(c).strip() for c in df.columns]
@@ -136,7 +138,7 @@ def notas_fiscais_do_emp(xlsx_path: str | Path,
     x = Path(xlsx_path)
     if not x.exists():
         raise FileNotFoundError(f"Arquivo não encontrado: {x}")
-    df = pd.read_excel(x, sheet_name=sheet_name, engine="openpyxl")
+    df = ler_excel(x, sheet_name=sheet_name)
     df.columns = [str(c).strip() for c in df.columns]
 
     # localizar colunas
@@ -175,7 +177,7 @@ def carregar_dataframe(xlsx_path: str | Path, sheet_name: str) -> pd.DataFrame:
     x = Path(xlsx_path)
     if not x.exists():
         raise FileNotFoundError(f"Arquivo não encontrado: {x}")
-    df = pd.read_excel(x, sheet_name=sheet_name)
+    df = ler_excel(x, sheet_name=sheet_name)
     df.columns = [str(c).strip() for c in df.columns]
     return df
 
@@ -195,7 +197,7 @@ def mapear_emps_para_nfs(caminho_arquivo, sheet_name):
         logger.info(f"📖 Lendo arquivo Excel: {caminho_arquivo}")
         logger.info(f"📋 Planilha: {sheet_name}")
         
-        df = pd.read_excel(caminho_arquivo, sheet_name=sheet_name)
+        df = ler_excel(caminho_arquivo, sheet_name=sheet_name)
         logger.info(f"✅ Excel carregado. Colunas: {list(df.columns)}")
         logger.info(f"📊 Total de linhas: {len(df)}")
         
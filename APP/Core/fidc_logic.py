@@ -1,7 +1,9 @@
 from time import sleep
 
 from APP.Config.fidc_trata_emp import TrataEmpresa
+from APP.Core.metricas_rede import medir_etapa
 
+@medir_etapa('pesquisa')
 def fazer_pesquisa_com_autocomplete(bot, emp: str):
     """Faz a pesquisa incluindo a seleção do autocomplete - VERSÃO CORRIGIDA"""
     print("🔄 FAZENDO PESQUISA COM AUTOCOMPLETE...")
@@ -151,6 +153,7 @@ def fazer_pesquisa_com_autocomplete(bot, emp: str):
     else:
         return {'sucesso': False, 'motivo': 'Botão Pesquisar não encontrado'}
 
+@medir_etapa('paginacao')
 def verificar_proxima_pagina(bot):
     """Verifica se há próxima página - MESMA LÓGICA QUE JÁ FUNCIONA"""
     info_paginacao = bot.driver.execute_script("""
@@ -190,6 +193,7 @@ def verificar_proxima_pagina(bot):
     return False
 
 
+@medir_etapa('paginacao')
 def ir_para_primeira_pagina_sempre(bot):
     """Vai para a primeira página - MESMA LÓGICA DA PAGINAÇÃO"""
     print("   🔄 Indo para PRIMEIRA página...")
@@ -656,6 +660,7 @@ def marcar_nf_especifica(bot, nf):
     
     return resultado
 
+@medir_etapa('gerar_boleto')
 def gerar_boleto(bot):
     """Clica no botão para gerar boleto dos itens selecionados"""
     print("   🖨️  Clicando no botão de gerar boleto...")
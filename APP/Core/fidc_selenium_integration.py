@@ -5,8 +5,12 @@ import psutil
 import os
 
 from selenium import webdriver
+from APP.Core.driver_pool import obter_pool
+from APP.Core.perfil_navegador import aplicar_perfil_enxuto, bloquear_recursos, perfil_enxuto
+from functools import partial
 from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
+from APP.Core.chromedriver import resolver_chromedriver
+from APP.Core.metricas_rede import MetricasEtapas, medir_etapa
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.remote.webelement import WebElement
@@ -159,13 +163,14 @@ class SeleniumIntegration:
         # ⭐ NOVO: Timeouts específicos para operações críticas
         self.page_load_timeout = 30
         self.script_timeout = 20
+        # Tempo e tráfego de rede por etapa (lidos do log de performance do Chrome)
+        self.metricas = MetricasEtapas()
 
     # ---------- Infra ----------
-    def start(self) -> None:
-        if self.driver is not None:
-            return
-    
-        service = Service(ChromeDriverManager().install())
+    @staticmethod
+    def _criar_driver(enxuto: bool = False) -> webdriver.Chrome:
+        """Fábrica dos navegadores do pool 'fidc' (ou 'fidc-enxuto')."""
+        service = Service(resolver_chromedriver())
         options = webdriver.ChromeOptions()
     
     # ⭐ CONFIGURAÇÕES OTIMIZADAS PARA CARREGAMENTOS LENTOS
@@ -191,25 +196,45 @@ class SeleniumIntegration:
         
         # Capture performance logs
         options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+        # Perfil enxuto: imagens/fontes/analytics bloqueados, headless se configurado
+        if enxuto:
+            aplicar_perfil_enxuto(options)
     
         try:
-            self.driver = webdriver.Chrome(service=service, options=options)
-            self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+            driver = webdriver.Chrome(service=service, options=options)
+            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+            if enxuto:
+                bloquear_recursos(driver)
             
             # ⭐ AUMENTAR TIMEOUTS PARA CARREGAMENTOS LENTOS
-            self.driver.set_page_load_timeout(60)  # Aumentado para 60 segundos
-            self.driver.set_script_timeout(30)
+            driver.set_page_load_timeout(60)  # Aumentado para 60 segundos
+            driver.set_script_timeout(30)
             
             logging.info("Driver Chrome iniciado com sucesso")
+            return driver
         except Exception as e:
             logging.error(f"Erro crítico ao iniciar driver: {e}")
             raise
 
+    def start(self) -> None:
+        if self.driver is not None:
+            return
+        # Navegador do pool: reaproveita um Chrome já aberto quando houver
+        self.driver = self._pool().emprestar()
+
+    @staticmethod
+    def _pool():
+        if perfil_enxuto('fidc'):
+            return obter_pool('fidc-enxuto', partial(SeleniumIntegration._criar_driver, enxuto=True))
+        return obter_pool('fidc', SeleniumIntegration._criar_driver)
+
     def close(self) -> None:
         if self.driver:
-            self.driver.quit()
+            self.metricas.drenar(self.driver)  # esvazia o log antes de devolver ao pool
+            self._pool().devolver(self.driver)
             self.driver = None
-            logging.info("Driver Chrome fechado")
+            logging.info("Driver Chrome devolvido ao pool")
 
     def _check_driver_alive(self) -> bool:
         """Verifica se o driver ainda está responsivo"""
@@ -334,6 +359,7 @@ class SeleniumIntegration:
             raise e
 
     # ---------- Fluxos ----------
+    @medir_etapa('login')
     def login(self, dto: LoginDTO, url: Optional[str] = None, timeout: Optional[int] = None) -> None:
         if self.driver is None:
             self.start()
@@ -495,6 +521,7 @@ class SeleniumIntegration:
 
     ##################################################################################################################    
 
+    @medir_etapa('clica_no_modulo_fidc')
     def clica_no_modulo_fidc(self, locators: Optional[Locator] = None, text_hint: Optional[str] = "FIDC") -> None:
         d = self.driver
         assert d is not None, "Driver não inicializado"
@@ -671,6 +698,7 @@ class SeleniumIntegration:
         except Exception as e:
             print(f"❌ Erro ao inserir revenda: {e}")
 
+    @medir_etapa('clica_em_pesquisa')
     def clica_em_pesquisa(self) -> None:
         """Clica no botão Pesquisar (se Paths existir), com fallback brando."""
         try:
@@ -685,6 +713,7 @@ class SeleniumIntegration:
                 pass
 
     # ---------- Paginator helpers ----------
+    @medir_etapa('paginacao')
     def _goto_first_page(self) -> None:
         d = self.driver
         assert d is not None, "Driver não inicializado"
@@ -757,6 +786,7 @@ class SeleniumIntegration:
             logging.warning(f"Erro ao executar script: {e}")
             return False
 
+    @medir_etapa('paginacao')
     def _safe_paginator_next(self) -> bool:
         """Tenta avançar página com múltiplas estratégias"""
         strategies = [
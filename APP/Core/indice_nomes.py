@@ -0,0 +1,125 @@
+# indice_nomes.py - índice de nomes para o casamento fuzzy Linx x Honda
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:  # scorer em C; sem ele, cai no fuzzywuzzy (varredura completa em Python)
+    from rapidfuzz import fuzz as _rf_fuzz, process as _rf_process
+except ImportError:
+    _rf_fuzz = _rf_process = None
+    from fuzzywuzzy import fuzz as _fw_fuzz
+
+
+def normalizar_nome(nome: str) -> str:
+    """Mesma normalização que a comparação fazia a cada par (strip, upper e lower)."""
+    return nome.strip().upper().lower()
+
+
+class IndiceNomes:
+    """
+    Índice dos nomes de clientes da Honda de uma loja, montado uma vez e
+    consultado para cada linha do banco.
+
+    - Os nomes são normalizados na montagem (não a cada comparação).
+    - Nome idêntico depois de normalizado sai direto com 100%.
+    - Os demais passam por uma única varredura no rapidfuzz (C) com corte
+      mínimo: quem não pode chegar ao corte é descartado cedo (filtro por
+      tamanho e Levenshtein bit-paralelo).
+
+    O resultado segue a regra do laço original: maior score inteiro (fuzz.ratio
+    arredondado) e, no empate, o primeiro nome na ordem de `nomes`. Scores
+    abaixo de `score_cutoff` não interessam e voltam como (None, 0).
+
+    O score é o do rapidfuzz (distância Indel), igual ao do fuzzywuzzy com
+    python-Levenshtein. O fuzzywuzzy que rodava em produção não tinha essa
+    dependência e pontuava com o difflib (SequenceMatcher), que difere em
+    alguns pares (5 de 2.000 na conferência do benchmark); nesses casos o
+    score e, perto dos limites, a classificação podem mudar. A mudança foi
+    aceita: o Indel é a distância de edição que o fuzz.ratio pretende medir.
+    """
+
+    def __init__(self, nomes: Iterable[str]):
+        self.nomes: List[str] = list(nomes)
+        self.normalizados: List[str] = [normalizar_nome(n) for n in self.nomes]
+        self._exatos: Dict[str, int] = {}
+        for i, nome in enumerate(self.normalizados):
+            self._exatos.setdefault(nome, i)
+
+    def __len__(self) -> int:
+        return len(self.nomes)
+
+    def melhor(self, nome: str, score_cutoff: float = 0) -> Tuple[Optional[str], int]:
+        """
+        Nome mais parecido com `nome` e o seu score (0–100).
+
+        Parâmetros:
+            nome (str): Nome a procurar (é normalizado aqui).
+            score_cutoff (float): Score mínimo que interessa a quem chama.
+
+        Retorno:
+            tuple: (nome original do índice | None, score inteiro).
+        """
+        if not self.nomes:
+            return None, 0
+        alvo = normalizar_nome(nome)
+
+        exato = self._exatos.get(alvo)
+        if exato is not None:
+            return self.nomes[exato], 100
+
+        if _rf_fuzz is None:
+            return self._melhor_sem_indice(alvo, score_cutoff)
+
+        # corte - 0.5: scores que ainda arredondam para o corte entram no desempate
+        achados = _rf_process.extract(
+            alvo, self.normalizados, scorer=_rf_fuzz.ratio,
+            score_cutoff=max(score_cutoff - 0.5, 0), limit=None,
+        )
+        if not achados:
+            return None, 0
+        melhor_score, menos_indice = max((int(round(score)), -indice) for _, score, indice in achados)
+        if melhor_score < score_cutoff:
+            return None, 0
+        return self.nomes[-menos_indice], melhor_score
+
+    def melhores(self, nomes: Sequence[str], score_cutoff: float = 0,
+                 bloco: int = 2000) -> Tuple[List[Optional[str]], np.ndarray]:
+        """
+        `melhor` para vários nomes de uma vez (matriz de scores do rapidfuzz,
+        em blocos de `bloco` linhas). Mesmo resultado de chamar `melhor` um a um.
+
+        Retorno:
+            tuple: (lista com o nome do índice ou None, array de scores inteiros).
+        """
+        if not self.nomes or not len(nomes):
+            return [None] * len(nomes), np.zeros(len(nomes), dtype=int)
+
+        if _rf_process is None:
+            pares = [self.melhor(nome, score_cutoff) for nome in nomes]
+            return [p[0] for p in pares], np.array([p[1] for p in pares], dtype=int)
+
+        alvos = [normalizar_nome(n) for n in nomes]
+        achados: List[Optional[str]] = []
+        scores = np.zeros(len(alvos), dtype=int)
+        for inicio in range(0, len(alvos), bloco):
+            matriz = _rf_process.cdist(
+                alvos[inicio:inicio + bloco], self.normalizados, scorer=_rf_fuzz.ratio,
+                score_cutoff=max(score_cutoff - 0.5, 0), dtype=np.float64, workers=-1,
+            )
+            inteiros = np.rint(matriz).astype(int)  # round() do Python também arredonda .5 para o par
+            posicoes = inteiros.argmax(axis=1)      # primeiro índice no empate
+            melhores = inteiros[np.arange(len(posicoes)), posicoes]
+            for posicao, score in zip(posicoes, melhores):
+                achados.append(self.nomes[posicao] if score >= score_cutoff else None)
+            scores[inicio:inicio + len(posicoes)] = np.where(melhores >= score_cutoff, melhores, 0)
+        return achados, scores
+
+    def _melhor_sem_indice(self, alvo: str, score_cutoff: float) -> Tuple[Optional[str], int]:
+        melhor_nome, melhor_score = None, -1
+        for nome, normalizado in zip(self.nomes, self.normalizados):
+            score = _fw_fuzz.ratio(alvo, normalizado)
+            if score > melhor_score:
+                melhor_nome, melhor_score = nome, score
+        if melhor_score < score_cutoff:
+            return None, 0
+        return melhor_nome, melhor_score
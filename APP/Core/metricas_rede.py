@@ -0,0 +1,189 @@
+# metricas_rede.py - métricas de rede por etapa a partir do log de performance do Chrome
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Etapa que recebe o tráfego registrado fora de qualquer etapa nomeada
+FORA_DAS_ETAPAS = '(fora das etapas)'
+
+
+def drenar_log(driver) -> List[dict]:
+    """Lê (e esvazia) o log de performance do driver; [] se não houver log."""
+    if driver is None:
+        return []
+    try:
+        return driver.get_log('performance')
+    except Exception:
+        return []
+
+
+def _uniao_intervalos(intervalos: Iterable[tuple]) -> float:
+    """Tempo total coberto por intervalos (início, fim) possivelmente sobrepostos."""
+    total, fim_atual, inicio_atual = 0.0, None, None
+    for inicio, fim in sorted(intervalos):
+        if fim_atual is None or inicio > fim_atual:
+            if fim_atual is not None:
+                total += fim_atual - inicio_atual
+            inicio_atual, fim_atual = inicio, fim
+        else:
+            fim_atual = max(fim_atual, fim)
+    if fim_atual is not None:
+        total += fim_atual - inicio_atual
+    return total
+
+
+def resumir_log(entradas: Iterable[dict], top: int = 5) -> dict:
+    """
+    Resume entradas do log de performance (eventos Network.* do CDP).
+
+    Retorno:
+        dict: requisicoes, falhas, bytes, tempo_rede_s (tempo em que havia ao
+        menos uma requisição em andamento) e as `top` URLs mais lentas.
+    """
+    requisicoes: Dict[str, dict] = {}
+    for entrada in entradas:
+        try:
+            mensagem = json.loads(entrada['message'])['message']
+        except (KeyError, TypeError, ValueError):
+            continue
+        metodo = mensagem.get('method', '')
+        if not metodo.startswith('Network.'):
+            continue
+        params = mensagem.get('params', {})
+        req = requisicoes.setdefault(params.get('requestId'), {})
+
+        if metodo == 'Network.requestWillBeSent':
+            url = params.get('request', {}).get('url', '')
+            req.setdefault('inicio', params.get('timestamp'))
+            req['url'] = url
+        elif metodo == 'Network.responseReceived':
+            resposta = params.get('response', {})
+            req['status'] = resposta.get('status')
+            req.setdefault('url', resposta.get('url', ''))
+        elif metodo == 'Network.loadingFinished':
+            req['fim'] = params.get('timestamp')
+            req['bytes'] = params.get('encodedDataLength', 0)
+        elif metodo == 'Network.loadingFailed':
+            req['fim'] = params.get('timestamp')
+            req['falhou'] = True
+
+    validas = [r for r in requisicoes.values() if r.get('url') and not r['url'].startswith('data:')]
+    completas = [r for r in validas if r.get('inicio') is not None and r.get('fim') is not None]
+    for r in completas:
+        r['duracao_s'] = max(0.0, r['fim'] - r['inicio'])
+
+    mais_lentas = sorted(completas, key=lambda r: r['duracao_s'], reverse=True)[:top]
+    return {
+        'requisicoes': len(validas),
+        'falhas': sum(1 for r in validas if r.get('falhou')),
+        'bytes': int(sum(r.get('bytes', 0) for r in validas)),
+        'tempo_rede_s': round(_uniao_intervalos((r['inicio'], r['fim']) for r in completas), 3),
+        'mais_lentas': [
+            {'url': r['url'][:200], 'duracao_s': round(r['duracao_s'], 3), 'status': r.get('status')}
+            for r in mais_lentas
+        ],
+    }
+
+
+class MetricasEtapas:
+    """
+    Acumula, por etapa nomeada (login, módulo FIDC, pesquisa, paginação...), o
+    tempo total da etapa e o tráfego de rede do log de performance do Chrome.
+
+    O log é drenado ao entrar (o que sobrou vai para FORA_DAS_ETAPAS) e ao sair
+    de cada etapa. A diferença entre o tempo da etapa e o tempo de rede mostra
+    quanto foi backend do portal e quanto foram as nossas próprias esperas.
+    Etapas aninhadas contam para a mais externa.
+    """
+
+    def __init__(self, top: int = 5):
+        self.top = top
+        self._etapas: Dict[str, dict] = {}
+        self._local = threading.local()
+
+    def _acumular(self, nome: str, entradas: List[dict], duracao_s: Optional[float]) -> None:
+        resumo = resumir_log(entradas, self.top)
+        etapa = self._etapas.setdefault(nome, {
+            'execucoes': 0, 'tempo_total_s': 0.0, 'tempo_rede_s': 0.0,
+            'requisicoes': 0, 'falhas': 0, 'bytes': 0, 'mais_lentas': [],
+        })
+        if duracao_s is not None:
+            etapa['execucoes'] += 1
+            etapa['tempo_total_s'] += duracao_s
+        etapa['tempo_rede_s'] += resumo['tempo_rede_s']
+        etapa['requisicoes'] += resumo['requisicoes']
+        etapa['falhas'] += resumo['falhas']
+        etapa['bytes'] += resumo['bytes']
+        etapa['mais_lentas'] = sorted(
+            etapa['mais_lentas'] + resumo['mais_lentas'], key=lambda r: r['duracao_s'], reverse=True
+        )[:self.top]
+
+    def drenar(self, driver, nome: str = FORA_DAS_ETAPAS) -> None:
+        """Drena o log atribuindo o tráfego a `nome` (sem contar execução)."""
+        entradas = drenar_log(driver)
+        if entradas:
+            self._acumular(nome, entradas, None)
+
+    @contextmanager
+    def etapa(self, nome: str, obter_driver: Callable[[], object]):
+        profundidade = getattr(self._local, 'profundidade', 0)
+        if profundidade:
+            yield
+            return
+
+        self.drenar(obter_driver())
+        self._local.profundidade = 1
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._local.profundidade = 0
+            self._acumular(nome, drenar_log(obter_driver()), time.perf_counter() - inicio)
+
+    def resumo(self) -> Dict[str, dict]:
+        """Métricas por etapa (tempos em s, bytes em KB) prontas para o resultado da execução."""
+        saida = {}
+        for nome, etapa in self._etapas.items():
+            tempo_rede = min(etapa['tempo_rede_s'], etapa['tempo_total_s']) if etapa['execucoes'] else etapa['tempo_rede_s']
+            saida[nome] = {
+                'execucoes': etapa['execucoes'],
+                'tempo_total_s': round(etapa['tempo_total_s'], 2),
+                'tempo_rede_s': round(tempo_rede, 2),
+                'tempo_fora_rede_s': round(max(0.0, etapa['tempo_total_s'] - tempo_rede), 2),
+                'requisicoes': etapa['requisicoes'],
+                'falhas': etapa['falhas'],
+                'kb': round(etapa['bytes'] / 1024, 1),
+                'mais_lentas': etapa['mais_lentas'],
+            }
+        return saida
+
+    def registrar_resumo(self) -> None:
+        for nome, etapa in self.resumo().items():
+            logger.info(
+                f"🌐 {nome}: {etapa['execucoes']}x | total {etapa['tempo_total_s']:.1f}s | "
+                f"rede {etapa['tempo_rede_s']:.1f}s | fora da rede {etapa['tempo_fora_rede_s']:.1f}s | "
+                f"{etapa['requisicoes']} req | {etapa['kb']:.0f} KB"
+            )
+
+
+def medir_etapa(nome: str):
+    """
+    Decorador para métodos do SeleniumIntegration e funções que recebem o `bot`
+    como primeiro argumento: mede a chamada como a etapa `nome` em `bot.metricas`.
+    """
+    def decorador(funcao):
+        @wraps(funcao)
+        def envolvida(bot, *args, **kwargs):
+            metricas = getattr(bot, 'metricas', None)
+            if metricas is None:
+                return funcao(bot, *args, **kwargs)
+            with metricas.etapa(nome, lambda: getattr(bot, 'driver', None)):
+                return funcao(bot, *args, **kwargs)
+        return envolvida
+    return decorador
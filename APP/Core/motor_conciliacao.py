@@ -0,0 +1,208 @@
+# motor_conciliacao.py - conciliação Linx x Honda (CDC) em lote, separada da raspagem do portal
+import logging
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from unidecode import unidecode
+
+from APP.Core.extrato_centavos import ValoresExtrato
+from APP.Core.indice_nomes import IndiceNomes
+
+logger = logging.getLogger(__name__)
+
+COLUNAS_CONSOLIDADO = ['TITULO', 'DUPLICATA', 'VALOR']
+COLUNAS_RESUMO = ['NOME', 'TITULO', 'DUPLICATA', 'VALOR', 'SITUACAO']
+SEPARADOR_LOG = f"{'=' * 60}\n"
+
+
+@dataclass
+class ResultadoConciliacao:
+    consolidado: pd.DataFrame  # CSV: títulos casados com a Honda (TITULO, DUPLICATA, VALOR)
+    resumo: pd.DataFrame       # Excel: os mesmos títulos com NOME e SITUACAO
+    logs: List[str] = field(default_factory=list)
+    casamentos: Optional[pd.DataFrame] = None  # uma linha por título do banco com o nome/score/valor da Honda
+
+
+def frame_honda(dados: Dict[str, float]) -> pd.DataFrame:
+    """Valores líquidos lidos nos lotes da Honda (nome -> valor) como DataFrame [NOME, VALOR]."""
+    return pd.DataFrame({'NOME': list(dados), 'VALOR': list(dados.values())}, columns=['NOME', 'VALOR'])
+
+
+def frame_grade(linhas_grid: Iterable[dict]) -> pd.DataFrame:
+    """Linhas da grade "consultar cc concessionaria" (snapshot_grid_cc_todas_paginas) como DataFrame."""
+    return pd.DataFrame(list(linhas_grid), columns=['pagina', 'linha', 'lote', 'documento', 'valor', 'valor_parseado'])
+
+
+def formatar_valor_br(valores: pd.Series) -> pd.Series:
+    """1234.5 -> '1.234,50'."""
+    return valores.map(lambda v: f'{v:,.2f}'.replace('.', '_').replace(',', '.').replace('_', ','))
+
+
+def _normalizar_linx(nome: str) -> str:
+    return unidecode(nome.strip().upper())
+
+
+def documentos_nao_pagos(grade: Optional[pd.DataFrame], valores_extrato: Optional[Iterable]) -> List[str]:
+    """
+    Documentos que aparecem uma única vez na grade (ainda não pagos), com lote e
+    cujo valor não está no extrato, na ordem da grade.
+    """
+    if grade is None or grade.empty:
+        return []
+    if not isinstance(valores_extrato, ValoresExtrato):
+        valores_extrato = ValoresExtrato(valores_extrato or [])
+    unicos = grade['documento'].map(grade['documento'].value_counts()) == 1
+    no_extrato = valores_extrato.contem_lote(grade['valor_parseado'])
+    return grade.loc[unicos & (grade['lote'] != '0') & ~no_extrato, 'documento'].tolist()
+
+
+def conciliar(
+    honda: pd.DataFrame,
+    titulos: pd.DataFrame,
+    valores_extrato: Optional[Iterable] = None,
+    grade: Optional[pd.DataFrame] = None,
+    *,
+    tol_abs: float = 50.0,
+    tol_pct: Optional[float] = None,
+    thr_exato: int = 92,
+    thr_parcial: int = 80,
+) -> ResultadoConciliacao:
+    """
+    Concilia os títulos do banco (Linx) com os valores líquidos da Honda de uma loja.
+
+    Mesmas regras de compara_valores, aplicadas à tabela inteira: cada nome
+    distinto do banco é casado uma vez com o nome mais parecido da Honda e a
+    comparação de valores (tol_abs e/ou tol_pct) é feita em colunas.
+      - score >= thr_exato: título exportado ("Compatível" ou "Incompatível por
+        causa do valor") e log ✅/⚠️/❌;
+      - thr_parcial <= score < thr_exato: só o log de nome incompatível;
+      - abaixo de thr_parcial: ignorado.
+
+    Parâmetros:
+        honda (DataFrame): Colunas NOME e VALOR (nome repetido: vale o último).
+        titulos (DataFrame): Saída de busca_dados_db (NOME, VAL_TITULO, EMPRESA, TITULO, DUPLICATA).
+        valores_extrato (ValoresExtrato | Iterable | None): Valores do extrato do dia.
+        grade (DataFrame | None): Grade da Honda (frame_grade), para o bloco de documentos não pagos.
+
+    Retorno:
+        ResultadoConciliacao: DataFrames do CSV e do Excel e as linhas de log, na ordem do banco.
+    """
+    logs: List[str] = []
+    nao_pagos = documentos_nao_pagos(grade, valores_extrato)
+    if grade is not None and (grade['documento'].value_counts() == 1).any():
+        logs.append(SEPARADOR_LOG)
+        logs += [f'❌ Documento não pago: {documento}' for documento in nao_pagos]
+        logs.append(SEPARADOR_LOG)
+
+    valores_honda = honda.groupby('NOME', sort=False)['VALOR'].last().astype(float)
+
+    base = titulos.loc[:, ['NOME', 'VAL_TITULO', 'EMPRESA', 'TITULO', 'DUPLICATA']].copy()
+    base['VAL_TITULO'] = pd.to_numeric(base['VAL_TITULO'], errors='coerce')
+    base = base[base['NOME'].map(lambda n: isinstance(n, str)) & base['VAL_TITULO'].notna()]
+    if base.empty or valores_honda.empty:
+        vazio = base.iloc[0:0]
+        return ResultadoConciliacao(
+            pd.DataFrame(columns=COLUNAS_CONSOLIDADO), pd.DataFrame(columns=COLUNAS_RESUMO), logs, vazio
+        )
+
+    # Casamento de nomes: uma consulta por nome distinto do banco
+    base['NOME_LINX'] = base['NOME'].map(_normalizar_linx)
+    distintos = pd.Index(base['NOME_LINX'].unique())
+    achados, scores = IndiceNomes(valores_honda.index).melhores(list(distintos), score_cutoff=thr_parcial)
+    posicoes = distintos.get_indexer(base['NOME_LINX'])
+    base['NOME_HONDA'] = np.array(achados, dtype=object)[posicoes]
+    base['SCORE'] = scores[posicoes]
+    base = base[base['NOME_HONDA'].notna()].copy()
+
+    # Comparação de valores em colunas
+    valor_db = base['VAL_TITULO'].to_numpy(dtype=float)
+    valor_honda = valores_honda.reindex(base['NOME_HONDA']).to_numpy(dtype=float)
+    diff = np.abs(valor_db - valor_honda)
+    ok = diff <= tol_abs
+    if tol_pct is not None:
+        ok |= diff <= np.maximum(np.maximum(np.abs(valor_db), np.abs(valor_honda)), 1e-9) * tol_pct
+    base['VAL_TITULO'] = valor_db
+    base['VALOR_HONDA'] = valor_honda
+    base['DIFERENCA'] = diff
+    base['FORTE'] = base['SCORE'].to_numpy() >= thr_exato
+    base['OK'] = ok
+
+    for nome_db, vd, mn, vh, dif, sc, forte, certo, titulo, empresa in zip(
+        base['NOME_LINX'], valor_db.tolist(), base['NOME_HONDA'], valor_honda.tolist(), diff.tolist(),
+        base['SCORE'].tolist(), base['FORTE'], ok, base['TITULO'].tolist(), base['EMPRESA'].tolist(),
+    ):
+        if not forte:
+            logs.append(
+                f"❌ Nome incompatível: Linx ('{nome_db}') x Honda ('{mn}') "
+                f"com título {titulo}: valores incompatíveis — Linx: {vd} | Honda: {vh} "
+                f"(match {sc}%). Empresa: {empresa}"
+            )
+        elif not certo:
+            logs.append(
+                f"❌ Cliente '{mn}' (match com {nome_db} de {sc}%) "
+                f"com título {titulo}: valores incompatíveis — Linx: {vd} | Honda: {vh} "
+                f"(diferença {dif:.2f}). Empresa: {empresa}"
+            )
+        elif vd == vh:
+            logs.append(
+                f"✅ Cliente '{mn}' (match com {nome_db} de {sc}%) "
+                f"com título {titulo}: valor ok ({vd}). Empresa: {empresa}"
+            )
+        else:
+            tipo_ajuste = "acréscimo" if vh > vd else "decréscimo"
+            logs.append(
+                f"⚠️ Cliente '{mn}' (match com {nome_db} de {sc}%) com título {titulo}: "
+                f"valor precisa ser ajustado por {tipo_ajuste} de R$ {abs(vh - vd):.2f}. "
+                f"Empresa: {empresa}"
+            )
+
+    exportados = base[base['FORTE']]
+    valor_br = formatar_valor_br(exportados['VAL_TITULO'])
+    consolidado = pd.DataFrame({
+        'TITULO': exportados['TITULO'], 'DUPLICATA': exportados['DUPLICATA'], 'VALOR': valor_br,
+    }, columns=COLUNAS_CONSOLIDADO).reset_index(drop=True)
+    resumo = pd.DataFrame({
+        'NOME': exportados['NOME'], 'TITULO': exportados['TITULO'], 'DUPLICATA': exportados['DUPLICATA'],
+        'VALOR': valor_br,
+        'SITUACAO': np.where(exportados['OK'], 'Compatível', 'Incompatível por causa do valor'),
+    }, columns=COLUNAS_RESUMO).reset_index(drop=True)
+    return ResultadoConciliacao(consolidado, resumo, logs, base.reset_index(drop=True))
+
+
+# ---------- Entradas salvas (reprocessamento sem o portal) ----------
+def _arquivo_entradas(pasta: str, loja: str, dia: str) -> Path:
+    return Path(pasta) / dia / f'entradas_{loja}.pkl'
+
+
+def salvar_entradas(pasta: str, loja: str, dia: str, honda: pd.DataFrame, titulos: pd.DataFrame,
+                    valores_extrato: Optional[Iterable] = None, grade: Optional[pd.DataFrame] = None) -> Path:
+    """
+    Guarda as três entradas da conciliação de uma loja (e a grade) em
+    <pasta>/<dd-mm-aaaa>/entradas_<loja>.pkl, para reprocessar sem raspar o portal.
+    """
+    arquivo = _arquivo_entradas(pasta, loja, dia)
+    os.makedirs(arquivo.parent, exist_ok=True)
+    temporario = arquivo.with_suffix('.tmp')
+    pd.to_pickle({
+        'loja': loja,
+        'dia': dia,
+        'honda': honda,
+        'titulos': titulos,
+        'valores_extrato': list(valores_extrato or []),
+        'grade': grade,
+    }, temporario)
+    os.replace(temporario, arquivo)
+    logger.info(f"💾 Entradas da conciliação salvas em {arquivo}")
+    return arquivo
+
+
+def carregar_entradas(pasta: str, loja: str, dia: str) -> dict:
+    """Entradas salvas por salvar_entradas; FileNotFoundError se a loja não rodou no dia."""
+    arquivo = _arquivo_entradas(pasta, loja, dia)
+    if not arquivo.exists():
+        raise FileNotFoundError(f"Sem entradas salvas da loja {loja} em {dia} ({arquivo})")
+    return pd.read_pickle(arquivo)
@@ -0,0 +1,240 @@
+# motor_espera.py - esperas por condição para as automações do IHS (Selenium)
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from APP.Config.settings import Config
+
+logger = logging.getLogger(__name__)
+
+# Página pronta: documento carregado, sem AJAX do GeneXus/jQuery em andamento
+JS_PAGINA_OCIOSA = """
+if (document.readyState !== 'complete') return false;
+if (window.jQuery && window.jQuery.active > 0) return false;
+const aviso = document.getElementById('gx_ajax_notification');
+if (aviso && aviso.offsetParent !== null && getComputedStyle(aviso).visibility !== 'hidden') return false;
+return true;
+"""
+
+
+class AcaoNaoConcluida(Exception):
+    """As ações não tiveram sucesso dentro da janela de tentativas."""
+
+
+def condicao_elemento(locator: Tuple[str, str]) -> Callable[[Any], Any]:
+    """Condição: elemento presente no DOM (no contexto/frame atual)."""
+    return EC.presence_of_element_located(locator)
+
+
+def condicao_frame(frame: Any = 0) -> Callable[[Any], Any]:
+    """Condição: o frame existe a partir do documento principal (e o driver entra nele)."""
+    def _condicao(driver):
+        driver.switch_to.default_content()
+        return EC.frame_to_be_available_and_switch_to_it(frame)(driver)
+    return _condicao
+
+
+class MotorEspera:
+    """
+    Substitui os sleeps aleatórios (espera_personalizada) por esperas em condições reais.
+
+    - Antes de cada ação espera a página ficar ociosa (documento completo e sem
+      AJAX do GeneXus), em vez de dormir 3–8 s fixos.
+    - A "humanização" é um orçamento por execução: um total de segundos sorteado
+      uma vez e gasto em pequenos jitters por ação até acabar.
+    - Só há nova tentativa quando a ação (ou a condição dela) falha, com backoff
+      crescente, até esgotar `tentativas` E a janela de `janela` segundos — o
+      mesmo tempo total que os laços antigos de 3–8 s davam a um portal lento.
+    - Esgotadas as tentativas, levanta AcaoNaoConcluida (ou devolve None com
+      opcional=True), em vez de seguir como se a ação tivesse acontecido.
+    - Contabiliza quanto tempo foi gasto dormindo x esperando condições.
+    """
+
+    def __init__(self, driver=None, tentativas: int = 3,
+                 timeout: float = Config.IHS_TIMEOUT_CONDICAO_S,
+                 janela: float = Config.IHS_JANELA_TENTATIVAS_S,
+                 orcamento_min: float = Config.IHS_HUMANIZACAO_MIN_S,
+                 orcamento_max: float = Config.IHS_HUMANIZACAO_MAX_S,
+                 jitter_min: float = Config.IHS_JITTER_MIN_S,
+                 jitter_max: float = Config.IHS_JITTER_MAX_S,
+                 intervalo: float = 0.25):
+        self.driver = driver
+        self.tentativas = tentativas
+        self.timeout = timeout
+        self.janela = janela
+        self.jitter_min = jitter_min
+        self.jitter_max = jitter_max
+        self.intervalo = intervalo
+        self.orcamento_restante = random.uniform(orcamento_min, max(orcamento_min, orcamento_max))
+
+        self.tempo_jitter = 0.0
+        self.tempo_backoff = 0.0
+        self.tempo_condicoes = 0.0
+        self.tempo_acoes = 0.0
+        self.acoes = 0
+        self.retentativas = 0
+        self.falhas = 0
+        self.timeouts_condicao = 0
+
+    # ---------- Condições ----------
+    def aguardar(self, condicao: Callable[[Any], Any], timeout: Optional[float] = None) -> Any:
+        """Espera até `condicao(driver)` ser verdadeira. Retorna o valor da condição ou None no timeout."""
+        if self.driver is None:
+            return None
+        inicio = time.perf_counter()
+        try:
+            return WebDriverWait(self.driver, timeout or self.timeout, poll_frequency=self.intervalo).until(condicao)
+        except Exception:
+            self.timeouts_condicao += 1
+            return None
+        finally:
+            self.tempo_condicoes += time.perf_counter() - inicio
+
+    def pagina_ociosa(self, timeout: Optional[float] = None) -> bool:
+        return bool(self.aguardar(lambda d: d.execute_script(JS_PAGINA_OCIOSA), timeout))
+
+    def elemento_presente(self, locator: Tuple[str, str], timeout: Optional[float] = None):
+        return self.aguardar(EC.presence_of_element_located(locator), timeout)
+
+    def frame_carregado(self, frame: Any = 0, timeout: Optional[float] = None) -> bool:
+        """Espera o frame existir e entra nele."""
+        return bool(self.aguardar(EC.frame_to_be_available_and_switch_to_it(frame), timeout))
+
+    # ---------- Sleeps contabilizados ----------
+    def humanizar(self) -> None:
+        """Jitter curto, descontado do orçamento da execução (zero quando o orçamento acaba)."""
+        if self.orcamento_restante <= 0:
+            return
+        pausa = min(random.uniform(self.jitter_min, self.jitter_max), self.orcamento_restante)
+        self.orcamento_restante -= pausa
+        self.tempo_jitter += pausa
+        time.sleep(pausa)
+
+    def _backoff(self, tentativa: int) -> None:
+        pausa = min(0.5 * tentativa, 3.0)
+        self.tempo_backoff += pausa
+        time.sleep(pausa)
+
+    # ---------- Ações ----------
+    def executar(self, *acoes: Callable[[], Any], retorno: bool = False,
+                 condicao: Optional[Callable[[Any], Any]] = None, aguardar_depois: bool = False,
+                 janela: Optional[float] = None, opcional: bool = False) -> Any:
+        """
+        Executa as ações em sequência quando a página estiver pronta.
+
+        Parâmetros:
+            *acoes: funções/lambdas; com retorno=True o valor da última é devolvido.
+            condicao: condição (driver -> valor verdadeiro) esperada antes das ações;
+                      não ser atendida conta como tentativa falha.
+            aguardar_depois: espera a página ficar ociosa depois das ações (paginação, submits).
+            janela: segundos mínimos de tentativas (padrão: o do motor; 0 = só `tentativas`).
+            opcional: devolve None em vez de levantar AcaoNaoConcluida.
+
+        Retorno:
+            Valor da última ação (retorno=True) ou None.
+        """
+        janela = self.janela if janela is None else janela
+        inicio_total = time.perf_counter()
+        tentativa = 0
+        while True:
+            tentativa += 1
+            self.pagina_ociosa(timeout=min(self.timeout, 10))
+            erro: Optional[Exception] = None
+
+            if condicao is not None and self.driver is not None:
+                restante = max(janela - (time.perf_counter() - inicio_total), 1.0)
+                if self.aguardar(condicao, timeout=min(self.timeout, restante)) is None:
+                    erro = TimeoutError('condição não atendida')
+
+            if erro is None:
+                self.humanizar()
+                inicio = time.perf_counter()
+                try:
+                    for acao in acoes[:-1] if retorno else acoes:
+                        acao()
+                    resultado = acoes[-1]() if retorno else None
+                except Exception as e:
+                    erro = e
+                self.tempo_acoes += time.perf_counter() - inicio
+
+            if erro is None:
+                self.acoes += 1
+                if aguardar_depois:
+                    self.pagina_ociosa()
+                return resultado
+
+            decorrido = time.perf_counter() - inicio_total
+            if tentativa >= self.tentativas and decorrido >= janela:
+                self.falhas += 1
+                mensagem = f"Ação não concluída após {tentativa} tentativas em {decorrido:.1f}s: {erro}"
+                if opcional:
+                    logger.debug(mensagem)
+                    return None
+                raise AcaoNaoConcluida(mensagem) from erro
+            self.retentativas += 1
+            self._backoff(tentativa)
+
+    def resumo(self) -> Dict[str, Any]:
+        return {
+            'acoes': self.acoes,
+            'retentativas': self.retentativas,
+            'falhas': self.falhas,
+            'timeouts_condicao': self.timeouts_condicao,
+            'tempo_jitter_s': round(self.tempo_jitter, 2),
+            'tempo_backoff_s': round(self.tempo_backoff, 2),
+            'tempo_condicoes_s': round(self.tempo_condicoes, 2),
+            'tempo_acoes_s': round(self.tempo_acoes, 2),
+        }
+
+
+# Um motor por thread (cada automação roda com o seu driver)
+_local = threading.local()
+
+
+def iniciar_motor(driver, **kwargs) -> MotorEspera:
+    """Cria o motor da execução atual (um por driver/thread)."""
+    _local.motor = MotorEspera(driver, **kwargs)
+    return _local.motor
+
+
+def motor_atual() -> MotorEspera:
+    motor = getattr(_local, 'motor', None)
+    if motor is None:
+        motor = _local.motor = MotorEspera()
+    return motor
+
+
+def finalizar_motor() -> Dict[str, Any]:
+    """Remove o motor da thread e devolve a contabilidade de tempo."""
+    motor = getattr(_local, 'motor', None)
+    _local.motor = None
+    if motor is None:
+        return {}
+    resumo = motor.resumo()
+    logger.info(f"⏱️ Esperas: {resumo}")
+    return resumo
+
+
+def espera_personalizada(*acoes, retorno=False, condicao=None, aguardar_depois=False, janela=None, opcional=False):
+    """
+    Executa uma ou mais ações com o motor da execução atual. Caso tenha retorno, adicione a função que deve receber retorno como a última.
+    Sem ações, apenas espera a página ficar pronta (com o jitter do orçamento).
+
+    Parâmetros:
+        *acoes (callable): Funções ou lambdas que executam ações.
+        retorno (bool): Se True, devolve o resultado da última ação.
+        condicao (callable): Condição extra (driver -> bool) esperada antes das ações.
+        aguardar_depois (bool): Espera a página ficar ociosa depois das ações.
+        janela (float): Segundos mínimos de tentativas (None = o do motor).
+        opcional (bool): Devolve None em vez de levantar AcaoNaoConcluida quando falha.
+
+    Retorno:
+        Resultado da última ação quando retorno=True; senão None.
+    """
+    return motor_atual().executar(*acoes, retorno=retorno, condicao=condicao, aguardar_depois=aguardar_depois,
+                                  janela=janela, opcional=opcional)
@@ -0,0 +1,338 @@
+# pan_indice.py - índice persistente de valores dos relatórios PAN
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from APP.Core.excel_parser import ler_excel
+
+logger = logging.getLogger(__name__)
+
+VERSAO_INDICE = 1
+
+# Valores escritos no formato brasileiro dentro de um texto: 1234,56 / 1.234,56 / -12,30
+_RE_VALOR_BR = re.compile(r'-?(?:\d{1,3}(?:\.\d{3})+|\d+),\d{2}')
+_RE_DIGITOS = re.compile(r'\d+')
+_VAZIOS = {'nan', 'None', 'NaT', ''}
+
+
+def valor_em_centavos(valor: float) -> int:
+    """Normaliza um valor monetário para centavos inteiros (chave do índice)."""
+    return int(round(float(valor) * 100))
+
+
+def _centavos_de_texto_br(texto: str) -> List[int]:
+    centavos = []
+    for token in _RE_VALOR_BR.findall(texto):
+        try:
+            centavos.append(valor_em_centavos(float(token.replace('.', '').replace(',', '.'))))
+        except ValueError:
+            continue
+    return centavos
+
+
+def _inteiros_no_nome(nome: str) -> List[int]:
+    """
+    Todas as substrings numéricas do nome (ex.: '1235' gera 1235, 123, 235, 12, ...).
+    Reproduz a busca por `str(int(valor)) in nome` com uma consulta em conjunto.
+    """
+    inteiros = set()
+    for bloco in _RE_DIGITOS.findall(nome):
+        for i in range(len(bloco)):
+            if bloco[i] == '0':
+                continue
+            for j in range(i + 1, len(bloco) + 1):
+                inteiros.add(int(bloco[i:j]))
+    return sorted(inteiros)
+
+
+class CacheWorkbooks:
+    """
+    Cache LRU das planilhas lidas numa execução, limitado pelo tamanho em bytes
+    dos DataFrames. Um mesmo relatório é lido uma única vez, tanto para a
+    indexação dos valores quanto para a extração do chassi.
+    """
+
+    def __init__(self, limite_bytes: int):
+        self.limite_bytes = limite_bytes
+        self.bytes_em_uso = 0
+        self._itens: "OrderedDict[str, Tuple[Dict[str, pd.DataFrame], int]]" = OrderedDict()
+
+    def ler(self, arquivo: Path) -> Dict[str, pd.DataFrame]:
+        chave = str(arquivo)
+        if chave in self._itens:
+            self._itens.move_to_end(chave)
+            return self._itens[chave][0]
+
+        planilhas = ler_planilhas(arquivo)
+        tamanho = sum(int(df.memory_usage(deep=True).sum()) for df in planilhas.values())
+        self._itens[chave] = (planilhas, tamanho)
+        self.bytes_em_uso += tamanho
+
+        # Descarta os menos usados, mas mantém sempre o arquivo recém-lido
+        while self.bytes_em_uso > self.limite_bytes and len(self._itens) > 1:
+            _, (_, tamanho_antigo) = self._itens.popitem(last=False)
+            self.bytes_em_uso -= tamanho_antigo
+        return planilhas
+
+    def limpar(self) -> None:
+        self._itens.clear()
+        self.bytes_em_uso = 0
+
+
+def ler_planilhas(arquivo: Path) -> Dict[str, pd.DataFrame]:
+    """Lê todas as planilhas do arquivo; se falhar, tenta apenas a primeira."""
+    try:
+        return ler_excel(arquivo, sheet_name=None)
+    except Exception as e:
+        logger.warning(f"⚠️ Erro ao ler todas as planilhas de {arquivo.name}: {e}")
+        return {'Sheet1': ler_excel(arquivo)}
+
+
+class IndicePasta:
+    """
+    Índice de uma pasta de data do diretório PAN.
+
+    Cada arquivo é indexado pela chave (nome, mtime, tamanho). Só os arquivos
+    novos ou alterados são relidos; o restante vem do JSON salvo em disco.
+    """
+
+    def __init__(self, pasta: Path, caminho_indice: Path, conversor: Callable[[Any], Optional[float]],
+                 tolerancia_centavos: int = 10,
+                 leitor: Callable[[Path], Dict[str, pd.DataFrame]] = ler_planilhas):
+        self.pasta = Path(pasta)
+        self.caminho_indice = Path(caminho_indice)
+        self.conversor = conversor
+        self.tolerancia_centavos = tolerancia_centavos
+        self.leitor = leitor
+
+        self.arquivos: List[Path] = []
+        self._entradas: Dict[str, Dict[str, Any]] = {}
+        self._alterado = False
+
+    # ---------- Persistência ----------
+    def carregar(self) -> None:
+        if not self.caminho_indice.exists():
+            return
+        try:
+            with open(self.caminho_indice, 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+            if dados.get('versao') == VERSAO_INDICE and dados.get('pasta') == str(self.pasta):
+                self._entradas = dados.get('arquivos', {})
+        except Exception as e:
+            logger.warning(f"⚠️ Índice corrompido em {self.caminho_indice}, será reconstruído: {e}")
+            self._entradas = {}
+
+    def salvar(self) -> None:
+        if not self._alterado:
+            return
+        self.caminho_indice.parent.mkdir(parents=True, exist_ok=True)
+        # Nome por processo/thread: duas execuções na mesma pasta não gravam no mesmo temporário
+        temporario = self.caminho_indice.with_name(
+            f"{self.caminho_indice.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        try:
+            with open(temporario, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'versao': VERSAO_INDICE,
+                    'pasta': str(self.pasta),
+                    'arquivos': self._entradas,
+                }, f, ensure_ascii=False)
+            os.replace(temporario, self.caminho_indice)
+        except Exception:
+            temporario.unlink(missing_ok=True)
+            raise
+        self._alterado = False
+
+    # ---------- Atualização incremental ----------
+    def listar_arquivos(self) -> List[Path]:
+        arquivos = list(self.pasta.glob("*.xlsx")) + list(self.pasta.glob("*.xls"))
+        return [arq for arq in arquivos if not arq.name.startswith('~$')]
+
+    def sincronizar_listagem(self) -> List[Path]:
+        """Relista a pasta e descarta do índice os arquivos que não existem mais."""
+        self.arquivos = self.listar_arquivos()
+        nomes_atuais = {arq.name for arq in self.arquivos}
+        for nome in list(self._entradas):
+            if nome not in nomes_atuais:
+                del self._entradas[nome]
+                self._alterado = True
+        return self.arquivos
+
+    def atualizar(self) -> "IndicePasta":
+        self.sincronizar_listagem()
+
+        for arquivo in self.arquivos:
+            self.entrada(arquivo)
+        return self
+
+    def entrada(self, arquivo: Path) -> Dict[str, Any]:
+        """Retorna a entrada do arquivo, relendo-o apenas se mtime/tamanho mudaram."""
+        stat = arquivo.stat()
+        entrada = self._entradas.get(arquivo.name)
+        if entrada and entrada['mtime'] == stat.st_mtime and entrada['size'] == stat.st_size:
+            return entrada
+
+        logger.info(f"📇 Indexando: {arquivo.name}")
+        entrada = {
+            'mtime': stat.st_mtime,
+            'size': stat.st_size,
+            'nome_centavos': sorted(set(_centavos_de_texto_br(arquivo.stem))),
+            'nome_inteiros': _inteiros_no_nome(arquivo.stem),
+            'conteudo': self._indexar_conteudo(arquivo),
+        }
+        self._entradas[arquivo.name] = entrada
+        self._alterado = True
+        return entrada
+
+    def _indexar_conteudo(self, arquivo: Path) -> Dict[str, List[List[Any]]]:
+        """
+        Mapeia centavos -> [[planilha, linha_excel, coluna], ...].
+        Indexa o valor convertido da célula inteira e os valores no formato
+        brasileiro que aparecem dentro de textos.
+        """
+        conteudo: Dict[str, List[List[Any]]] = {}
+        try:
+            planilhas = self.leitor(arquivo)
+        except Exception as e:
+            logger.error(f"❌ Erro crítico ao ler {arquivo.name}: {e}")
+            return conteudo
+
+        for nome_planilha, df in planilhas.items():
+            if df.empty:
+                continue
+            df_str = df.astype(str)
+            for col_idx, coluna in enumerate(df.columns):
+                for linha_idx, celula in enumerate(df_str.iloc[:, col_idx]):
+                    if celula in _VAZIOS:
+                        continue
+
+                    encontrados = set(_centavos_de_texto_br(celula))
+                    valor_limpo = re.sub(r'[^\d,\-\.]', '', celula)
+                    if valor_limpo:
+                        valor_float = self.conversor(valor_limpo)
+                        if valor_float is not None and abs(valor_float) < 1e13:
+                            encontrados.add(valor_em_centavos(valor_float))
+
+                    for centavos in encontrados:
+                        conteudo.setdefault(str(centavos), []).append(
+                            [str(nome_planilha), linha_idx + 2, str(coluna)]  # +2: header + base 1 do Excel
+                        )
+        return conteudo
+
+    # ---------- Consulta ----------
+    def valores_no_arquivo(self, arquivo: Path, valores: List[float]) -> Dict[float, Dict[str, Any]]:
+        """
+        Confere vários valores contra um único arquivo (lido no máximo uma vez).
+        Retorna valor -> {'origem', 'local'} para os valores presentes no arquivo.
+        """
+        entrada = self.entrada(arquivo)
+        nome_centavos = set(entrada['nome_centavos'])
+        nome_inteiros = set(entrada['nome_inteiros'])
+        conteudo = entrada['conteudo']
+
+        # Valor exato primeiro; depois os vizinhos, do mais próximo ao mais distante
+        # (a linha encontrada é a que dá o chassi)
+        deltas = sorted(range(-self.tolerancia_centavos, self.tolerancia_centavos + 1), key=abs)
+
+        encontrados: Dict[float, Dict[str, Any]] = {}
+        for valor in valores:
+            centavos = valor_em_centavos(valor)
+            if centavos in nome_centavos or (valor >= 0 and int(round(valor)) in nome_inteiros):
+                encontrados[valor] = {'origem': 'nome', 'local': None}
+                continue
+            for delta in deltas:
+                locais = conteudo.get(str(centavos + delta))
+                if locais:
+                    planilha, linha, coluna = locais[0]
+                    encontrados[valor] = {
+                        'origem': 'conteudo',
+                        'local': {'planilha': planilha, 'linha': linha, 'coluna': coluna},
+                    }
+                    break
+        return encontrados
+
+
+class IndiceValoresPan:
+    """
+    Índice em disco dos valores dos relatórios PAN, um JSON por pasta de data.
+    Evita reler todas as planilhas do compartilhamento a cada valor buscado.
+    """
+
+    def __init__(self, diretorio_indice: str, conversor: Callable[[Any], Optional[float]],
+                 tolerancia: float = 0.10):
+        self.diretorio_indice = Path(diretorio_indice)
+        self.conversor = conversor
+        self.tolerancia_centavos = valor_em_centavos(tolerancia)
+        self._pastas: Dict[str, IndicePasta] = {}
+        # Cache de planilhas da execução corrente (definido por quem usa o índice)
+        self.cache: Optional[CacheWorkbooks] = None
+
+    def ler_planilhas(self, arquivo: Path) -> Dict[str, pd.DataFrame]:
+        if self.cache is not None:
+            return self.cache.ler(arquivo)
+        return ler_planilhas(arquivo)
+
+    def _caminho_indice(self, pasta: Path) -> Path:
+        chave = hashlib.sha1(str(pasta).encode('utf-8')).hexdigest()[:16]
+        return self.diretorio_indice / f"{pasta.name}_{chave}.json"
+
+    def pasta(self, pasta: Path, atualizar: bool = True) -> IndicePasta:
+        """Índice da pasta, carregado do disco e atualizado apenas nos arquivos alterados."""
+        pasta = Path(pasta)
+        indice = self._pastas.get(str(pasta))
+        if indice is None:
+            indice = IndicePasta(pasta, self._caminho_indice(pasta), self.conversor, self.tolerancia_centavos,
+                                 self.ler_planilhas)
+            indice.carregar()
+            self._pastas[str(pasta)] = indice
+
+        if atualizar:
+            indice.atualizar()
+            self.salvar(indice)
+        return indice
+
+    def salvar(self, indice: IndicePasta) -> None:
+        try:
+            indice.salvar()
+        except Exception as e:
+            logger.warning(f"⚠️ Não foi possível salvar o índice de {indice.pasta}: {e}")
+
+    def varrer(self, pastas: List[Path], valores: List[float]) -> Dict[float, Dict[str, Any]]:
+        """
+        Varredura única: percorre as pastas e arquivos na ordem, confere cada
+        arquivo contra todos os valores ainda pendentes e para quando não
+        sobra nenhum. Arquivos depois do último acerto nem chegam a ser lidos.
+
+        Retorna valor -> {'arquivo', 'origem', 'local'} (mesma escolha da
+        busca valor a valor: o primeiro arquivo que contém o valor).
+        """
+        pendentes = list(dict.fromkeys(valores))
+        encontrados: Dict[float, Dict[str, Any]] = {}
+
+        for pasta in pastas:
+            if not pendentes:
+                break
+            pasta = Path(pasta)
+            if not pasta.exists():
+                continue
+
+            indice = self.pasta(pasta, atualizar=False)
+            try:
+                for arquivo in indice.sincronizar_listagem():
+                    for valor, achado in indice.valores_no_arquivo(arquivo, pendentes).items():
+                        encontrados[valor] = {'arquivo': arquivo, **achado}
+                    pendentes = [v for v in pendentes if v not in encontrados]
+                    if not pendentes:
+                        break
+            finally:
+                self.salvar(indice)
+
+        return encontrados
@@ -8,11 +8,50 @@ from datetime import datetime
 import os
 import re
 import unicodedata
+import atexit
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
 
 from ..Config.settings import config
+from .excel_parser import ler_excel
 
 logger = logging.getLogger(__name__)
 
+# Pool de processos do parse, criado na primeira busca e reaproveitado entre as
+# chamadas (subir os processos custa mais que o parse de um relatório pequeno)
+_pool_parse: Optional[ProcessPoolExecutor] = None
+_workers_pool_parse = 0
+_lock_pool_parse = threading.Lock()
+
+
+def _obter_pool_parse(workers: int) -> ProcessPoolExecutor:
+    """Pool de processos compartilhado; recriado se o número de workers mudou."""
+    global _pool_parse, _workers_pool_parse
+    with _lock_pool_parse:
+        if _pool_parse is None or _workers_pool_parse != workers:
+            if _pool_parse is not None:
+                _pool_parse.shutdown(wait=False)
+            _pool_parse = ProcessPoolExecutor(max_workers=workers)
+            _workers_pool_parse = workers
+        return _pool_parse
+
+
+def encerrar_pool_parse() -> None:
+    """Encerra o pool de processos do parse (chamado também na saída do programa)."""
+    global _pool_parse, _workers_pool_parse
+    with _lock_pool_parse:
+        if _pool_parse is not None:
+            _pool_parse.shutdown(wait=False, cancel_futures=True)
+        _pool_parse = None
+        _workers_pool_parse = 0
+
+
+atexit.register(encerrar_pool_parse)
+
+
 class PanProcessor:
     def __init__(self):
         self.pan_network_path = config.PAN_NETWORK_PATH
@@ -40,31 +79,37 @@ class PanProcessor:
             logger.info(f"🎯 VALORES EXTRAÍDOS: {sorted(valores_alvo)}")
             logger.info(f"📅 BUSCANDO NAS DATAS: {datas_para_buscar}")
             
-            todos_resultados = []
-            
-            # 2. Buscar em cada data
+            # 2. Listar os arquivos de todas as datas (na ordem das datas)
+            tarefas = []
             for data_str in datas_para_buscar:
                 pasta_data = Path(base_dir_rede) / data_str
                 logger.info(f"🔍 Verificando pasta: {pasta_data}")
                 
                 if pasta_data.exists():
                     logger.info(f"   ✅ Pasta encontrada: {data_str}")
-                    
-                    # Buscar valores nas planilhas da pasta
-                    resultados_data = self._buscar_nas_planilhas(pasta_data, valores_alvo)
-                    
-                    if resultados_data:
-                        # Adicionar data de origem a cada resultado
-                        for resultado in resultados_data:
-                            resultado["data_origem"] = data_str
-                        
-                        todos_resultados.extend(resultados_data)
-                        logger.info(f"   📊 Encontrados {len(resultados_data)} registros na data {data_str}")
-                    else:
-                        logger.info(f"   ❌ Nenhum resultado na data {data_str}")
+                    tarefas.extend((data_str, arquivo) for arquivo in self._listar_arquivos(pasta_data))
                 else:
                     logger.info(f"   ⚠️ Pasta não existe: {data_str}")
             
+            logger.info(f"🔍 Procurando em {len(tarefas)} arquivos...")
+            
+            # 3. Leitura na rede (threads) + parse e busca (processos) em pipeline
+            resultados_por_data = {data_str: [] for data_str in datas_para_buscar}
+            for data_str, resultados_arquivo in self._pipeline_busca(tarefas, valores_alvo, atol):
+                # Adicionar data de origem a cada resultado
+                for resultado in resultados_arquivo:
+                    resultado["data_origem"] = data_str
+                resultados_por_data[data_str].extend(resultados_arquivo)
+            
+            todos_resultados = []
+            for data_str in datas_para_buscar:
+                resultados_data = resultados_por_data[data_str]
+                if resultados_data:
+                    todos_resultados.extend(resultados_data)
+                    logger.info(f"   📊 Encontrados {len(resultados_data)} registros na data {data_str}")
+                elif (Path(base_dir_rede) / data_str).exists():
+                    logger.info(f"   ❌ Nenhum resultado na data {data_str}")
+            
             logger.info(f"📈 PROCESSAMENTO CONCLUÍDO: {len(todos_resultados)} registros encontrados")
             return todos_resultados
             
@@ -79,7 +124,7 @@ class PanProcessor:
         Extrai valores numéricos de um arquivo Excel
         """
         try:
-            df = pd.read_excel(caminho_arquivo)
+            df = ler_excel(caminho_arquivo)
             logger.info(f"📊 Arquivo lido: {len(df)} linhas, colunas: {df.columns.tolist()}")
             
             # Procurar todas as colunas numéricas
@@ -103,80 +148,172 @@ class PanProcessor:
             logger.error(f"❌ Erro ao extrair valores do Excel: {e}")
             return []
     
-    def _buscar_nas_planilhas(self, pasta: Path, valores_alvo: List[float]) -> List[Dict[str, Any]]:
+    def _listar_arquivos(self, pasta: Path) -> List[Path]:
         """
-        Busca valores nas planilhas de uma pasta
+        Arquivos Excel de uma pasta (inclui subpastas), em ordem determinística
         """
-        resultados = []
-        
-        # Encontrar todos os arquivos Excel
         arquivos = list(pasta.glob("**/*.xlsx")) + list(pasta.glob("**/*.xls"))
-        arquivos = [arq for arq in arquivos if not arq.name.startswith('~$')]
+        return sorted(arq for arq in arquivos if not arq.name.startswith('~$'))
+    
+    def _pipeline_busca(self, tarefas: List[tuple], valores_alvo: List[float],
+                        atol: float) -> Iterable[tuple]:
+        """
+        Pipeline limitado: um pool de threads lê os bytes dos arquivos da rede
+        enquanto o pool de processos do módulo faz o parse e a busca. Os resultados saem
+        na ordem das tarefas (data, arquivo), independente de quem termina antes.
         
-        logger.info(f"🔍 Procurando em {len(arquivos)} arquivos...")
+        Gera (data, resultados_do_arquivo) para cada tarefa.
+        """
+        if not tarefas:
+            return
+        
+        workers_io = max(1, config.PAN_WORKERS_IO)
+        workers_parse = max(1, config.PAN_WORKERS_PARSE)
+        # Limita quantos arquivos ficam em memória ao mesmo tempo
+        janela = workers_io + workers_parse
+        
+        compartilhado = workers_parse > 1
+        parsers = _obter_pool_parse(workers_parse) if compartilhado else ThreadPoolExecutor(max_workers=1)
         
-        for arquivo in arquivos:
-            try:
-                logger.info(f"📖 Processando: {arquivo.name}")
+        try:
+            with ThreadPoolExecutor(max_workers=workers_io) as leitores:
+                pendentes = iter(tarefas)
+                leituras = deque()
+                buscas = deque()
+                
+                def agendar_leitura():
+                    proxima = next(pendentes, None)
+                    if proxima is not None:
+                        data_str, arquivo = proxima
+                        leituras.append((data_str, arquivo, leitores.submit(Path(arquivo).read_bytes)))
+                
+                def coletar_busca():
+                    data_str, arquivo, futuro = buscas.popleft()
+                    try:
+                        return data_str, futuro.result()
+                    except BrokenProcessPool:
+                        # Um processo morreu: o pool não aceita mais tarefas, a próxima chamada cria outro
+                        encerrar_pool_parse()
+                        raise
+                    except Exception as e:
+                        logger.error(f"   💥 Erro no arquivo {arquivo.name}: {e}")
+                        return data_str, []
                 
-                # Ler todas as planilhas do arquivo
-                planilhas = pd.read_excel(arquivo, sheet_name=None, engine='openpyxl')
+                for _ in range(janela):
+                    agendar_leitura()
                 
-                for nome_planilha, df in planilhas.items():
-                    if df.empty:
+                while leituras:
+                    data_str, arquivo, futuro = leituras.popleft()
+                    agendar_leitura()
+                    try:
+                        conteudo = futuro.result()
+                    except Exception as e:
+                        logger.error(f"   💥 Erro ao ler {arquivo.name}: {e}")
                         continue
                     
-                    # Buscar valores em todas as colunas numéricas
-                    encontros_planilha = self._buscar_valores_na_dataframe(df, valores_alvo, arquivo.name, nome_planilha)
-                    resultados.extend(encontros_planilha)
+                    logger.info(f"📖 Processando: {arquivo.name}")
+                    try:
+                        busca = parsers.submit(_buscar_em_bytes, arquivo.name, conteudo, valores_alvo, atol)
+                    except BrokenProcessPool:
+                        encerrar_pool_parse()
+                        raise
+                    buscas.append((data_str, arquivo, busca))
                     
-            except Exception as e:
-                logger.error(f"   💥 Erro no arquivo {arquivo.name}: {e}")
-                continue
-        
-        return resultados
+                    if len(buscas) > workers_parse:
+                        yield coletar_busca()
+                
+                while buscas:
+                    yield coletar_busca()
+        finally:
+            if not compartilhado:
+                parsers.shutdown()
     
     def _buscar_valores_na_dataframe(self, df: pd.DataFrame, valores_alvo: List[float], 
-                                   nome_arquivo: str, nome_planilha: str) -> List[Dict[str, Any]]:
+                                   nome_arquivo: str, nome_planilha: str, atol: float = 0.10) -> List[Dict[str, Any]]:
         """
-        Busca valores alvo em um DataFrame
+        Busca valores alvo em um DataFrame.
+        A planilha vira uma matriz float uma única vez e os alvos ordenados são
+        consultados com np.searchsorted na janela de ± atol.
         """
         encontros = []
+        if df.empty or not valores_alvo:
+            return encontros
         
-        # Procurar em todas as colunas
-        for col_idx, coluna in enumerate(df.columns):
-            for linha_idx, valor in enumerate(df[coluna]):
-                if pd.isna(valor):
-                    continue
-                
-                # Tentar converter para número
-                try:
-                    valor_numerico = float(valor)
-                    
-                    # Verificar se corresponde a algum valor alvo (com tolerância)
-                    for valor_alvo in valores_alvo:
-                        if abs(valor_numerico - valor_alvo) <= 0.10:  # Tolerância de R$ 0,10
-                            # Encontrou correspondência!
-                            resultado = {
-                                "arquivo": nome_arquivo,
-                                "planilha": nome_planilha,
-                                "coluna": coluna,
-                                "linha": linha_idx + 2,  # +2 para linha do Excel (header + 1-based)
-                                "valor_encontrado": valor_numerico,
-                                "valor_alvo": valor_alvo,
-                                "diferenca": abs(valor_numerico - valor_alvo),
-                                "celula": f"{coluna}{linha_idx + 2}",
-                                "dados_linha": self._extrair_dados_linha(df, linha_idx)
-                            }
-                            encontros.append(resultado)
-                            logger.info(f"   🎯 ENCONTRADO: R$ {valor_alvo} → R$ {valor_numerico} em {coluna}{linha_idx + 2}")
-                            
-                except (ValueError, TypeError):
-                    # Não é número, continuar procurando
-                    continue
+        matriz = self._matriz_numerica(df)
+        alvos = np.asarray(valores_alvo, dtype=float)
+        ordem_alvos = np.argsort(alvos, kind="stable")
+        alvos_ordenados = alvos[ordem_alvos]
+        
+        # Percorre coluna a coluna (ordem 'F'), mantendo a ordem da busca célula a célula
+        valores = matriz.ravel(order="F")
+        celulas = np.flatnonzero(np.isfinite(valores))
+        if celulas.size == 0:
+            return encontros
+        valores_validos = valores[celulas]
+        
+        # Margem numérica na janela; o filtro exato (<= atol) é aplicado depois
+        margem = atol + 1e-9
+        inicio = np.searchsorted(alvos_ordenados, valores_validos - margem, side="left")
+        fim = np.searchsorted(alvos_ordenados, valores_validos + margem, side="right")
+        qtd = fim - inicio
+        if not qtd.any():
+            return encontros
+        
+        # Expande os pares (célula, alvo) de cada janela
+        pos_celula = np.repeat(np.arange(celulas.size), qtd)
+        deslocamento = np.arange(pos_celula.size) - np.repeat(np.cumsum(qtd) - qtd, qtd)
+        idx_alvo = ordem_alvos[inicio[pos_celula] + deslocamento]
+        diferencas = np.abs(valores_validos[pos_celula] - alvos[idx_alvo])
+        
+        dentro = diferencas <= atol
+        pos_celula, idx_alvo, diferencas = pos_celula[dentro], idx_alvo[dentro], diferencas[dentro]
+        ordem = np.lexsort((idx_alvo, pos_celula))
+        
+        n_linhas = matriz.shape[0]
+        dados_por_linha: Dict[int, Dict[str, Any]] = {}
+        
+        for k in ordem:
+            celula = celulas[pos_celula[k]]
+            col_idx, linha_idx = divmod(int(celula), n_linhas)
+            coluna = df.columns[col_idx]
+            valor_numerico = float(valores[celula])
+            valor_alvo = valores_alvo[idx_alvo[k]]
+            
+            # Contexto da linha só é montado para as linhas com correspondência
+            if linha_idx not in dados_por_linha:
+                dados_por_linha[linha_idx] = self._extrair_dados_linha(df, linha_idx)
+            
+            encontros.append({
+                "arquivo": nome_arquivo,
+                "planilha": nome_planilha,
+                "coluna": coluna,
+                "linha": linha_idx + 2,  # +2 para linha do Excel (header + 1-based)
+                "valor_encontrado": valor_numerico,
+                "valor_alvo": valor_alvo,
+                "diferenca": float(diferencas[k]),
+                "celula": f"{coluna}{linha_idx + 2}",
+                "dados_linha": dados_por_linha[linha_idx]
+            })
+            logger.info(f"   🎯 ENCONTRADO: R$ {valor_alvo} → R$ {valor_numerico} em {coluna}{linha_idx + 2}")
         
         return encontros
     
+    def _matriz_numerica(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Converte a planilha em matriz float (linhas x colunas).
+        Células não numéricas e colunas de data/hora viram NaN.
+        """
+        matriz = np.full(df.shape, np.nan, dtype=float)
+        for col_idx in range(df.shape[1]):
+            serie = df.iloc[:, col_idx]
+            if pd.api.types.is_datetime64_any_dtype(serie) or pd.api.types.is_timedelta64_dtype(serie):
+                continue
+            if pd.api.types.is_bool_dtype(serie) or pd.api.types.is_numeric_dtype(serie):
+                matriz[:, col_idx] = serie.to_numpy(dtype=float, na_value=np.nan)
+            else:
+                matriz[:, col_idx] = pd.to_numeric(serie, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        return matriz
+    
     def _extrair_dados_linha(self, df: pd.DataFrame, linha_idx: int) -> Dict[str, Any]:
         """
         Extrai dados relevantes da linha onde o valor foi encontrado
@@ -229,4 +366,26 @@ class PanProcessor:
     # Método mantido para compatibilidade
     def extrair_valores_pan(self, caminho_arquivo: str) -> List[float]:
         """Alias para _extrair_valores_excel"""
-        return self._extrair_valores_excel(caminho_arquivo)
\ No newline at end of file
+        return self._extrair_valores_excel(caminho_arquivo)
+
+
+def _buscar_em_bytes(nome_arquivo: str, conteudo: bytes, valores_alvo: List[float],
+                     atol: float) -> List[Dict[str, Any]]:
+    """
+    Parse de um arquivo já lido da rede e busca dos valores alvo.
+    Fica no nível do módulo para poder rodar no pool de processos.
+    """
+    processor = PanProcessor()
+    resultados = []
+    
+    # Ler todas as planilhas do arquivo
+    planilhas = ler_excel(BytesIO(conteudo), sheet_name=None)
+    
+    for nome_planilha, df in planilhas.items():
+        if df.empty:
+            continue
+        
+        # Buscar valores em todas as colunas numéricas
+        resultados.extend(processor._buscar_valores_na_dataframe(df, valores_alvo, nome_arquivo, nome_planilha, atol))
+    
+    return resultados
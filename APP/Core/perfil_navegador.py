@@ -0,0 +1,174 @@
+# perfil_navegador.py - perfis do Chrome: "enxuto" (headless opcional + bloqueio de recursos)
+# e extensão do captcha pré-instalada (extensão descompactada ou clone de um perfil modelo)
+import logging
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple, Union
+
+from APP.Config.settings import Config
+
+logger = logging.getLogger(__name__)
+
+# Recursos que as automações não usam: imagens, fontes e rastreadores
+URLS_BLOQUEADAS_PADRAO: List[str] = [
+    # imagens
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.bmp', '*.ico', '*.svg',
+    # fontes
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    # analytics / rastreadores
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*hotjar.com*', '*connect.facebook.net*', '*clarity.ms*', '*newrelic.com*', '*nr-data.net*',
+]
+
+
+def perfil_enxuto(automacao: Optional[str]) -> bool:
+    """True se a automação usa o perfil enxuto (NAVEGADOR_ENXUTO, menos as exceções)."""
+    return Config.NAVEGADOR_ENXUTO and (automacao or '') not in Config.NAVEGADOR_ENXUTO_EXCECOES
+
+
+def aplicar_perfil_enxuto(options, headless: bool = Config.NAVEGADOR_HEADLESS) -> None:
+    """Argumentos do Chrome para o perfil enxuto (antes de criar o driver)."""
+    if headless:
+        options.add_argument('--headless=new')  # o headless novo mantém extensões e downloads
+        options.add_argument('--window-size=1366,768')
+    options.add_argument(f'--renderer-process-limit={Config.NAVEGADOR_RENDERER_LIMITE}')
+    options.add_argument('--disable-background-networking')
+    options.add_argument('--disable-component-update')
+    options.add_argument('--disable-sync')
+    options.add_argument('--metrics-recording-only')
+    options.add_argument('--mute-audio')
+    options.add_argument('--no-first-run')
+    options.add_argument('--no-default-browser-check')
+
+
+def bloquear_recursos(driver, padroes: Optional[Iterable[str]] = None) -> bool:
+    """
+    Bloqueia URLs por padrão via CDP (Network.setBlockedURLs). Vale para as
+    próximas requisições da aba atual do driver.
+    """
+    urls = list(padroes) if padroes is not None else URLS_BLOQUEADAS_PADRAO + Config.NAVEGADOR_URLS_BLOQUEADAS
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': urls})
+        return True
+    except Exception as e:
+        logger.warning(f"⚠️ Não foi possível bloquear recursos via CDP: {e}")
+        return False
+
+
+# ---------- Perfil com a extensão do captcha ----------
+# Arquivos do user-data-dir que não vale copiar (caches e travas do Chrome que o usou)
+_IGNORAR_NO_CLONE = shutil.ignore_patterns(
+    'Singleton*', 'lockfile', 'Cache', 'Code Cache', 'GPUCache', 'GrShaderCache',
+    'ShaderCache', 'DawnCache', 'Crashpad', 'BrowserMetrics*',
+)
+_ARQUIVO_VERSAO = 'VERSAO.txt'
+_clones_limpos = False
+_lock_clones = threading.Lock()
+
+
+def extensao_captcha() -> Optional[Path]:
+    """Pasta da extensão descompactada (IHS_EXTENSAO_DIR), se existir e tiver manifest.json."""
+    pasta = Config.IHS_EXTENSAO_DIR
+    if pasta and (Path(pasta) / 'manifest.json').is_file():
+        return Path(pasta).resolve()
+    return None
+
+
+def modelo_perfil() -> Optional[Path]:
+    """Pasta do user-data-dir modelo (IHS_PERFIL_MODELO_DIR), se já foi preparada."""
+    pasta = Config.IHS_PERFIL_MODELO_DIR
+    if pasta and Path(pasta).is_dir() and any(Path(pasta).iterdir()):
+        return Path(pasta).resolve()
+    return None
+
+
+def versao_modelo(modelo: Path) -> str:
+    """Versão do modelo: IHS_PERFIL_MODELO_VERSAO ou o VERSAO.txt gravado ao prepará-lo."""
+    if Config.IHS_PERFIL_MODELO_VERSAO:
+        return Config.IHS_PERFIL_MODELO_VERSAO
+    try:
+        return (modelo / _ARQUIVO_VERSAO).read_text(encoding='utf-8').strip() or 'v1'
+    except OSError:
+        return 'v1'
+
+
+def marcar_versao_modelo(modelo: Union[str, Path]) -> str:
+    """Grava uma nova versão no modelo (clones de versões anteriores deixam de ser usados)."""
+    versao = datetime.now().strftime('%Y%m%d-%H%M%S')
+    (Path(modelo) / _ARQUIVO_VERSAO).write_text(versao, encoding='utf-8')
+    return versao
+
+
+def _limpar_clones_antigos(versao_atual: str) -> None:
+    """Apaga (uma vez por processo) clones de outras versões e os que sobraram de execuções anteriores."""
+    global _clones_limpos
+    with _lock_clones:
+        if _clones_limpos:
+            return
+        _clones_limpos = True
+    base = Path(Config.IHS_PERFIS_DIR)
+    if not base.is_dir():
+        return
+    for pasta in base.iterdir():
+        if pasta.is_dir():
+            alvos = [pasta] if pasta.name != versao_atual else list(pasta.iterdir())
+            for alvo in alvos:
+                shutil.rmtree(alvo, ignore_errors=True)
+
+
+def clonar_modelo_perfil(modelo: Path) -> Path:
+    """Copia o modelo para um user-data-dir exclusivo do novo navegador."""
+    versao = versao_modelo(modelo)
+    _limpar_clones_antigos(versao)
+    inicio = time.perf_counter()
+    destino = Path(Config.IHS_PERFIS_DIR) / versao / uuid.uuid4().hex[:12]
+    shutil.copytree(modelo, destino, ignore=_IGNORAR_NO_CLONE)
+    logger.info(f"🧬 Perfil modelo {versao} clonado em {(time.perf_counter() - inicio) * 1000:.0f} ms: {destino}")
+    return destino
+
+
+def preparar_perfil_captcha(options) -> Tuple[bool, Optional[Path]]:
+    """
+    Configura o Chrome para já abrir com a extensão do captcha, sem interação:
+      1. extensão descompactada (IHS_EXTENSAO_DIR) via --load-extension; ou
+      2. clone do user-data-dir modelo (IHS_PERFIL_MODELO_DIR) com a extensão instalada.
+
+    Retorno:
+        tuple:
+            pronto (bool): False se nenhum dos dois está configurado (segue o fluxo manual).
+            pasta_clone (Path | None): user-data-dir clonado, a apagar quando o driver fechar.
+    """
+    extensao = extensao_captcha()
+    if extensao is not None:
+        options.add_argument(f'--load-extension={extensao}')
+        # o Chrome 137+ ignora --load-extension sem desligar esta feature
+        options.add_argument('--disable-features=DisableLoadExtensionCommandLineSwitch')
+        return True, None
+
+    modelo = modelo_perfil()
+    if modelo is not None:
+        clone = clonar_modelo_perfil(modelo)
+        options.add_argument(f'--user-data-dir={clone}')
+        return True, clone
+
+    return False, None
+
+
+def remover_perfil_ao_fechar(driver, pasta: Optional[Path]) -> None:
+    """Faz o driver.quit() apagar também o user-data-dir clonado."""
+    if pasta is None:
+        return
+    quit_original = driver.quit
+
+    def quit():
+        try:
+            quit_original()
+        finally:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+    driver.quit = quit
@@ -0,0 +1,119 @@
+# pipeline_lojas.py - leituras antecipadas e gravação em segundo plano no laço de lojas de uma automação
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineLojas:
+    """
+    Sobrepõe o trabalho de I/O de um laço de lojas com o navegador.
+
+    - Leituras (`tarefas`: chave -> função(loja)) que não dependem do portal,
+      como o extrato no SMB e os títulos no Oracle, começam para a loja atual
+      e para as `antecipar` lojas seguintes enquanto o navegador trabalha.
+    - Gravações (`gravar`) vão para uma fila de uma única thread, na ordem em
+      que foram entregues; o laço segue para a próxima loja sem esperar o disco.
+
+    `finalizar()` (ou o fim do `with`) cancela as leituras de lojas que o laço
+    não chegou a iniciar, espera as gravações e devolve os erros delas.
+    """
+
+    def __init__(self, lojas: Iterable[str], tarefas: Dict[str, Callable[[str], Any]],
+                 antecipar: int = 1, nome: str = 'pipeline'):
+        self.lojas: List[str] = list(dict.fromkeys(lojas))
+        self.tarefas = tarefas
+        self.antecipar = max(0, antecipar)
+        self.nome = nome
+        self.espera_s = 0.0  # tempo que o laço ficou parado esperando uma leitura
+
+        self._leituras = ThreadPoolExecutor(
+            max_workers=max(1, len(tarefas) * (self.antecipar + 1)), thread_name_prefix=f'{nome}-leitura'
+        )
+        self._escrita = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'{nome}-escrita')
+        self._futuros: Dict[Tuple[str, str], Future] = {}
+        self._gravacoes: List[Tuple[str, Future]] = []
+        self._iniciadas = set()
+        self._lock = threading.Lock()
+        self._finalizado = False
+
+        if self.lojas:
+            self._agendar(self.lojas[0])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.finalizar()
+        return False
+
+    # ---------- Leituras antecipadas ----------
+    def _agendar(self, loja: str) -> None:
+        with self._lock:
+            if self._finalizado:
+                return
+            for chave, funcao in self.tarefas.items():
+                if (loja, chave) not in self._futuros:
+                    self._futuros[(loja, chave)] = self._leituras.submit(funcao, loja)
+
+    def iniciar(self, loja: str) -> None:
+        """Chamado ao começar `loja`: garante as leituras dela e dispara as das próximas."""
+        self._iniciadas.add(loja)
+        self._agendar(loja)
+        if loja in self.lojas:
+            posicao = self.lojas.index(loja)
+            for proxima in self.lojas[posicao + 1:posicao + 1 + self.antecipar]:
+                self._agendar(proxima)
+
+    def futuro(self, loja: str, chave: str) -> Future:
+        self._agendar(loja)
+        return self._futuros[(loja, chave)]
+
+    def obter(self, loja: str, chave: str, timeout: float = None) -> Any:
+        """Resultado da leitura `chave` de `loja` (repassa a exceção da leitura)."""
+        futuro = self.futuro(loja, chave)
+        if futuro.done():
+            return futuro.result()
+        inicio = time.perf_counter()
+        try:
+            return futuro.result(timeout=timeout)
+        finally:
+            esperou = time.perf_counter() - inicio
+            self.espera_s += esperou
+            logger.info(f"⏳ [{self.nome}] {loja}: {esperou:.1f}s esperando '{chave}'")
+
+    # ---------- Gravações em segundo plano ----------
+    def gravar(self, descricao: str, funcao: Callable, *args, **kwargs) -> Future:
+        """Entrega `funcao(*args, **kwargs)` à fila de gravação (uma thread, em ordem)."""
+        futuro = self._escrita.submit(funcao, *args, **kwargs)
+        self._gravacoes.append((descricao, futuro))
+        return futuro
+
+    def finalizar(self, timeout: float = None) -> List[str]:
+        """Cancela as leituras de lojas não iniciadas, espera as gravações e devolve os erros delas."""
+        with self._lock:
+            if self._finalizado:
+                return []
+            self._finalizado = True
+            for (loja, _), futuro in self._futuros.items():
+                if loja not in self._iniciadas:  # as das lojas iniciadas podem estar na fila de gravação
+                    futuro.cancel()
+
+        wait([f for _, f in self._gravacoes], timeout=timeout)
+        erros = []
+        for descricao, futuro in self._gravacoes:
+            if not futuro.done():
+                erros.append(f'{descricao}: não terminou em {timeout}s')
+            elif futuro.exception() is not None:
+                erros.append(f'{descricao}: {futuro.exception()}')
+        self._leituras.shutdown(wait=False)
+        self._escrita.shutdown(wait=False)
+
+        logger.info(
+            f"📦 [{self.nome}] {len(self._gravacoes)} gravação(ões), {len(erros)} erro(s); "
+            f"{self.espera_s:.1f}s esperando leituras"
+        )
+        return erros
@@ -0,0 +1,195 @@
+# rastreador_downloads.py - detecta o fim de um download pela pasta, sem sleeps fixos
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FuturoTimeout
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple, Union
+
+try:  # eventos do sistema de arquivos (inotify/ReadDirectoryChangesW); sem ele, varredura curta
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+logger = logging.getLogger(__name__)
+
+# Arquivos parciais do Chrome (e de outros navegadores) enquanto o download não termina
+EXTENSOES_PARCIAIS = ('.crdownload', '.part', '.tmp', '.download')
+# Um rastreador esquecido (exceção entre iniciar e aguardar) para sozinho depois disto
+VIDA_MAXIMA_S = 900
+
+
+class _Acordar(FileSystemEventHandler):
+    def __init__(self, evento: threading.Event):
+        self.evento = evento
+
+    def on_any_event(self, event):
+        self.evento.set()
+
+
+def _listar(pasta: Path) -> Dict[str, Tuple[int, int]]:
+    """nome -> (mtime_ns, tamanho) dos arquivos da pasta."""
+    arquivos = {}
+    try:
+        with os.scandir(pasta) as itens:
+            for item in itens:
+                try:
+                    if item.is_file():
+                        estado = item.stat()
+                        arquivos[item.name] = (estado.st_mtime_ns, estado.st_size)
+                except OSError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return arquivos
+
+
+def _parcial(nome: str) -> bool:
+    return nome.lower().endswith(EXTENSOES_PARCIAIS)
+
+
+class RastreadorDownloads:
+    """
+    Acompanha uma pasta de downloads e resolve um Future com o caminho exato do
+    arquivo baixado assim que ele termina.
+
+    A pasta é fotografada em `iniciar()` (antes do clique que dispara o download);
+    o resultado é o primeiro arquivo novo (ou reescrito) depois disso que:
+      - não é parcial (.crdownload etc.);
+      - não tem nenhum .crdownload novo ainda em andamento na pasta;
+      - manteve o mesmo tamanho por `estabilidade_s`.
+    Assim não depende de "o arquivo mais recente" nem de um sleep chutado.
+    """
+
+    def __init__(self, pasta: Union[str, Path], extensoes: Optional[Iterable[str]] = None,
+                 estabilidade_s: float = 0.3, intervalo_s: float = 0.2):
+        self.pasta = Path(pasta)
+        self.extensoes = tuple(e.lower() for e in extensoes) if extensoes else None
+        self.estabilidade_s = estabilidade_s
+        self.intervalo_s = intervalo_s
+
+        self.futuro: Future = Future()
+        self._base: Dict[str, Tuple[int, int]] = {}
+        self._parar = threading.Event()
+        self._acordar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._observador = None
+        self._inicio = 0.0
+
+    # ---------- Ciclo de vida ----------
+    def iniciar(self) -> Future:
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        self._base = _listar(self.pasta)
+        self._inicio = time.perf_counter()
+        if Observer is not None:
+            try:
+                self._observador = Observer()
+                self._observador.schedule(_Acordar(self._acordar), str(self.pasta), recursive=False)
+                self._observador.start()
+            except Exception:
+                self._observador = None
+        self._thread = threading.Thread(target=self._vigiar, daemon=True, name='rastreador-downloads')
+        self._thread.start()
+        return self.futuro
+
+    def parar(self) -> None:
+        self._parar.set()
+        self._acordar.set()
+        if self._observador is not None:
+            try:
+                self._observador.stop()
+            except Exception:
+                pass
+        if not self.futuro.done():
+            self.futuro.cancel()
+
+    def __enter__(self):
+        self.iniciar()
+        return self
+
+    def __exit__(self, *exc):
+        self.parar()
+        return False
+
+    def aguardar(self, timeout: float = 60.0) -> Path:
+        """Caminho do arquivo baixado; TimeoutError se não terminar em `timeout` segundos."""
+        try:
+            return self.futuro.result(timeout=timeout)
+        except FuturoTimeout:
+            pendentes = [n for n in _listar(self.pasta) if _parcial(n) and n not in self._base]
+            detalhe = f" (parciais: {', '.join(pendentes)})" if pendentes else ''
+            raise TimeoutError(f"Download não concluído em {timeout:.0f}s em {self.pasta}{detalhe}")
+        finally:
+            self.parar()
+
+    # ---------- Vigilância ----------
+    def _novos(self, atual: Dict[str, Tuple[int, int]]):
+        return [n for n, estado in atual.items() if self._base.get(n) != estado]
+
+    def _aceito(self, nome: str) -> bool:
+        if _parcial(nome):
+            return False
+        return self.extensoes is None or nome.lower().endswith(self.extensoes)
+
+    def _vigiar(self) -> None:
+        candidato, tamanho, desde = None, -1, 0.0
+        while not self._parar.is_set() and time.perf_counter() - self._inicio < VIDA_MAXIMA_S:
+            atual = _listar(self.pasta)
+            novos = self._novos(atual)
+            em_andamento = any(_parcial(n) for n in novos)
+            prontos = sorted((n for n in novos if self._aceito(n)), key=lambda n: atual[n][0])
+
+            if prontos and not em_andamento:
+                nome = prontos[0]
+                if nome != candidato or atual[nome][1] != tamanho:
+                    candidato, tamanho, desde = nome, atual[nome][1], time.perf_counter()
+                elif time.perf_counter() - desde >= self.estabilidade_s:
+                    caminho = self.pasta / nome
+                    logger.info(f"📥 Download concluído em {time.perf_counter() - self._inicio:.1f}s: {caminho}")
+                    if not self.futuro.done():
+                        self.futuro.set_result(caminho)
+                    return
+            else:
+                candidato, tamanho = None, -1
+
+            # com eventos do sistema de arquivos acorda na hora; a espera curta cobre a estabilidade
+            self._acordar.wait(self.intervalo_s)
+            self._acordar.clear()
+
+
+def renomear_download(origem: Union[str, Path], nome_destino: str) -> Path:
+    """Renomeia o arquivo baixado para `nome_destino` na mesma pasta (substitui se existir)."""
+    origem = Path(origem)
+    destino = origem.with_name(nome_destino)
+    if origem != destino:
+        os.replace(origem, destino)
+    return destino
+
+
+def aguardar_download(pasta: Union[str, Path], acao: Callable[[], object], timeout: float = 60.0,
+                      extensoes: Optional[Iterable[str]] = None, nome_destino: Optional[str] = None) -> Path:
+    """
+    Executa `acao` (o clique que dispara o download) e espera o arquivo terminar.
+
+    Parâmetros:
+        pasta (str | Path): Pasta de downloads do navegador.
+        acao (callable): Função que dispara o download.
+        timeout (float): Tempo máximo de espera, em segundos.
+        extensoes (Iterable[str] | None): Aceita só arquivos com estas extensões (ex.: ('.pdf',)).
+        nome_destino (str | None): Se informado, renomeia o arquivo baixado.
+
+    Retorno:
+        Path: Caminho final do arquivo.
+    """
+    rastreador = RastreadorDownloads(pasta, extensoes=extensoes)
+    rastreador.iniciar()
+    try:
+        acao()
+    except Exception:
+        rastreador.parar()
+        raise
+    caminho = rastreador.aguardar(timeout)
+    return renomear_download(caminho, nome_destino) if nome_destino else caminho
@@ -6,10 +6,12 @@ class ResultadoPan:
     titulo: str
     duplicata: str
     valor: float
+    estrategia: Optional[str] = None  # estratégia da busca em fin_titulo que encontrou o título
     
     def to_dict(self):
         return {
             "TITULO": self.titulo,
             "DUPLICATA": self.duplicata,
-            "VALOR": f"{self.valor:.2f}".replace('.', ',')
+            "VALOR": f"{self.valor:.2f}".replace('.', ','),
+            "ESTRATEGIA": self.estrategia
         }
\ No newline at end of file
@@ -1,8 +1,15 @@
-from APP.Config.ihs_config import _ensure_driver
+from APP.Config.ihs_config import _ensure_driver, preparar_modelo_perfil
+from APP.Config.settings import Config
 from tkinter import messagebox
 from datetime import datetime
 
 def abrir_driver_main():
+    # Com perfil modelo configurado, a extensão é instalada uma vez no modelo
+    # e os navegadores seguintes já abrem com ela (clone do modelo)
+    if Config.IHS_PERFIL_MODELO_DIR:
+        preparar_modelo_perfil()
+        return
+
     hoje = datetime.now().strftime('%d-%m-%Y')
     session_id = f'Abrindo o driver - {hoje}'
     driver, wdw, PASTA_DOWNLOAD = _ensure_driver(session_id)
@@ -13,4 +20,3 @@ def abrir_driver_main():
         if resposta: break
         continue
 
-
@@ -3,6 +3,8 @@ import logging
 import os
 import re
 
+from APP.Core.excel_parser import ler_excel
+
 logger = logging.getLogger(__name__)
 
 class AymoreService:
@@ -21,7 +23,7 @@ class AymoreService:
             print("=" * 100)
             
             # Ler arquivo completo
-            df = pd.read_excel(path, sheet_name='Sheet0')
+            df = ler_excel(path, sheet_name='Sheet0')
             
             # Processar dados e extrair TODOS os códigos em uma lista
             resultado = self._processar_e_extrair_lista_unica(df, path)
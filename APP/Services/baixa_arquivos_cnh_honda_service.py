@@ -2,6 +2,7 @@ from selenium.webdriver.common.keys import Keys
 from openpyxl import load_workbook, Workbook
 from selenium.webdriver.common.by import By
 from APP.DTO.ihs_dto import User
+from APP.Core.excel_parser import ler_excel
 from tkinter import messagebox
 from datetime import datetime
 from typing import Dict, List
@@ -16,7 +17,10 @@ import os
 from selenium.webdriver.common.by import By
 from time import sleep, time
 import random
-from APP.Config.ihs_config import _ensure_driver, start_state, should_stop, finish_state
+from APP.Config.ihs_config import PASTA_DOWNLOADS_PADRAO, _ensure_driver, start_state, should_stop, finish_state
+from APP.Core.motor_espera import espera_personalizada, iniciar_motor, finalizar_motor, condicao_elemento, condicao_frame
+from APP.Core.execucao_paralela import executar_lojas_em_paralelo, resumir_resultados
+from APP.Core.rastreador_downloads import RastreadorDownloads, aguardar_download, renomear_download
 from APP.Core.baixa_arquivos_core import Path
 from selenium.webdriver.support import expected_conditions as EC
 import logging
@@ -40,9 +44,7 @@ def preencher_campo(driver, value, texto):
     campo = driver.find_element(By.CSS_SELECTOR, value)
     campo.click()
     espera_personalizada(
-        lambda: campo.send_keys(texto),
-        inicio_random=2,
-        fim_random=4
+        lambda: campo.send_keys(texto)
     )
 
 
@@ -58,9 +60,7 @@ def clicar_em_um_botao(driver, value):
         None
     """
     espera_personalizada(
-        lambda: driver.find_element(By.CSS_SELECTOR, value).send_keys(Keys.ENTER),
-        inicio_random=2,
-        fim_random=4
+        lambda: driver.find_element(By.CSS_SELECTOR, value).send_keys(Keys.ENTER)
     )
 
 
@@ -129,9 +129,7 @@ def clicar_pelo_atributo(driver, atributo, texto_comparar, value):
     for i in entradas:
         if i.get_attribute(atributo).lower() == texto_comparar:
             espera_personalizada(
-                lambda: i.click(),
-                inicio_random=1,
-                fim_random=3
+                lambda: i.click()
             )
             break
 
@@ -191,39 +189,6 @@ def cria_indicador_de_tempo_execucao(
         raise PermissionError(f"Feche o arquivo '{arquivo}' no Excel e tente novamente.")
 
 
-def espera_personalizada(*acoes, retorno=False, inicio_random=3, fim_random=8):
-    """
-    Executa uma ou mais ações com tentativas repetidas até que tenham sucesso. Caso tenha retorno, adicione a função que deve receber retorno como a última.
-
-    Parâmetros:
-        *acoes (callable): Funções ou lambdas que executam ações.
-        **retorno (bool): Variável boolena para verificar se é necessário retornar algo.
-
-    Retorno:
-        None
-    """
-    contador = 0
-    while True:
-        try:
-            # espera aleatória para simular comportamento humano
-            sleep(random.randint(inicio_random, fim_random))
-
-            # executa todas menos a última
-            for acao in acoes[:-1] if retorno else acoes:
-                acao()
-
-            # se tiver retorno, executa a última e devolve
-            if retorno:
-                return acoes[-1]()
-            
-            break
-        except Exception:
-            if contador == 5:
-                break
-            contador += 1
-            continue
-
-
 def sair_ihs(driver, value):
     driver.switch_to.default_content()
     driver.find_element(By.CSS_SELECTOR, value).click()
@@ -256,27 +221,12 @@ def pega_texto_elemento(driver, primeira_parte_id, iterador):
     id_elemento = ajusta_id(primeira_parte_id, iterador)
     elemento = espera_personalizada(
         lambda: driver.find_element(By.CSS_SELECTOR, id_elemento),
-        retorno=True
+        retorno=True,
+        condicao=condicao_elemento((By.CSS_SELECTOR, id_elemento))
     )
 
     return (id_elemento, elemento.text)
 
-def troca_nome_arquivo(PASTA_DOWNLOADS, nome_arquivo_destino):
-    espera_personalizada(inicio_random=8, fim_random=12)
-    lista_arquivos_baixados = sorted(
-        [
-            f for f in os.listdir(PASTA_DOWNLOADS)
-            if os.path.isfile(os.path.join(PASTA_DOWNLOADS, f))
-        ],
-        key=lambda f: os.path.getmtime(os.path.join(PASTA_DOWNLOADS, f))
-    )
-
-    if lista_arquivos_baixados:
-        origem = PASTA_DOWNLOADS / lista_arquivos_baixados[-1]
-        destino = PASTA_DOWNLOADS / nome_arquivo_destino
-        origem.replace(destino)
-
-
 def seleciona_uma_aba_do_navegador(driver, numero_janela):
     abas = espera_personalizada(
         lambda: driver.window_handles,
@@ -422,7 +372,8 @@ def tela(lojas: str) -> Dict[str, List[str]]:
         dict[str, list[str]]
     """
     # 1) Lê o Excel
-    df = pd.read_excel(ARQ, dtype=str)  # dtype=str evita NaN -> float
+    # Planilha de senhas: cache só em memória, nunca gravado no disco local
+    df = ler_excel(ARQ, persistir=False, dtype=str)  # dtype=str evita NaN -> float
     esperadas = {"LOJAS", "CODIGOS", "USUARIOS", "SENHAS"}
     if not esperadas.issubset(set(df.columns)):
         raise ValueError(f"Colunas esperadas: {esperadas} | Encontradas: {set(df.columns)}")
@@ -528,7 +479,60 @@ def garantir_arquivo(pasta: str | P, nome_arquivo: str, timeout: float = 20.0, i
     raise TimeoutError(f"Arquivo não encontrado após renomear: {alvo}")
 
 
-def baixa_arquivos_cnh_honda_main(session_id: str, lojas: str, *, retries: int = 0, max_retries: int = 1):
+def publicar_arquivos_loja(origem: str | P, destino: str | P, loja: str) -> List[P]:
+    """
+    Move os arquivos finais de uma loja (txt, zip, pdf e extração em Excel) da
+    pasta isolada da execução paralela para a pasta compartilhada de downloads.
+    """
+    origem, destino = P(origem), P(destino)
+    movidos = []
+    for nome in (f"{loja}.txt", f"{loja}.zip", f"{loja}.pdf", f"extracao_pdf_{loja}.xlsx"):
+        arquivo = origem / nome
+        if arquivo.is_file():
+            shutil.move(str(arquivo), str(destino / nome))
+            movidos.append(destino / nome)
+    return movidos
+
+def baixa_arquivos_cnh_honda_paralelo(session_id: str, lojas: str, max_paralelo: int, max_retries: int = 1):
+    """
+    Baixa os arquivos com uma loja por navegador, até `max_paralelo` ao mesmo tempo.
+    Cada loja baixa em uma pasta própria (o RastreadorDownloads reconhece o
+    download como o arquivo novo da pasta, então duas lojas não podem dividir
+    uma) e os arquivos finais são movidos para a pasta compartilhada.
+
+    Retorno:
+        tuple: (ok, mensagem com o resultado de cada loja)
+    """
+    try:
+        usuarios = get_all_users(lojas)
+    except Exception as e:
+        return False, f'Erro ao buscar os usuários.\nDescrição: {str(e)}'
+
+    def _executar_loja(sessao, loja, pasta):
+        resultado = baixa_arquivos_cnh_honda_main(sessao, loja, pasta_downloads=pasta, max_retries=max_retries)
+        publicar_arquivos_loja(pasta, PASTA_DOWNLOADS_PADRAO, loja.upper())
+        return resultado
+
+    start_state(session_id)
+    try:
+        resultados = executar_lojas_em_paralelo(
+            session_id,
+            [user.nome_loja for user in usuarios],
+            _executar_loja,
+            portal='IHS',
+            max_paralelo=max_paralelo,
+            pasta_base=P(PASTA_DOWNLOADS_PADRAO) / '_paralelo'
+        )
+    finally:
+        finish_state(session_id)
+
+    return resumir_resultados(resultados)
+
+def baixa_arquivos_cnh_honda_main(session_id: str, lojas: str, *, retries: int = 0, max_retries: int = 1,
+                                  paralelo: int = 1, pasta_downloads=None):
+    if paralelo > 1:
+        return baixa_arquivos_cnh_honda_paralelo(session_id, lojas, paralelo, max_retries=max_retries)
+
     hoje = datetime.now()
 
     path_file_log = r'\\172.17.67.14\findev$\Automação - CNH\Baixa de Arquivos\Logs\\'
@@ -548,7 +552,8 @@ def baixa_arquivos_cnh_honda_main(session_id: str, lojas: str, *, retries: int =
 
     try:
         try:
-            driver, wdw, PASTA_DOWNLOADS = _ensure_driver(session_id=session_id)
+            driver, wdw, PASTA_DOWNLOADS = _ensure_driver(session_id=session_id, pasta_downlod=pasta_downloads, automacao='baixa_arquivos')
+            iniciar_motor(driver, tentativas=6)
             start_state(session_id)
         except Exception as e:
             return False, f'Erro ao criar o webdriver.\nDescrição: {str(e)}'
@@ -583,13 +588,13 @@ def baixa_arquivos_cnh_honda_main(session_id: str, lojas: str, *, retries: int =
                 #             LOGIN
                 # ===============================
                 try:
-                    espera_personalizada(inicio_random=1,fim_random=3)
+                    espera_personalizada()
                     driver.find_element(By.CSS_SELECTOR, path.Login.campo_code).send_keys(user.codigo)
-                    espera_personalizada(inicio_random=1,fim_random=3)
+                    espera_personalizada()
                     driver.find_element(By.CSS_SELECTOR, path.Login.campo_user).send_keys(user.usuario)
-                    espera_personalizada(inicio_random=1,fim_random=3)
+                    espera_personalizada()
                     driver.find_element(By.CSS_SELECTOR, path.Login.campo_password).send_keys(user.senha)
-                    espera_personalizada(inicio_random=1,fim_random=3)
+                    espera_personalizada()
 
                     submit = wdw.until(
                         EC.element_to_be_clickable((By.CSS_SELECTOR, path.Login.btn_entrar))
@@ -629,13 +634,13 @@ def baixa_arquivos_cnh_honda_main(session_id: str, lojas: str, *, retries: int =
 
                 try:
                     clica_na_aba(wdw, path.MenuPrincipal.aba_consorcio, 'consórcio')  # Consórcio
-                    espera_personalizada(inicio_random=1, fim_random=3)
+                    espera_personalizada()
                     clica_na_aba(wdw, path.MenuPrincipal.aba_formularios_download, 'formulários e download')
 
-                    espera_personalizada(inicio_random=1, fim_random=3)
+                    espera_personalizada()
                     clica_na_aba(wdw, path.MenuPrincipal.aba_consorcio_side_menu, 'consórcio - formulários/download')
 
-                    espera_personalizada(inicio_random=1, fim_random=3)
+                    espera_personalizada()
                     clica_na_aba(wdw, path.MenuPrincipal.aba_solicitacao_carga, 'baixar informações')
 
                     # ===============================
@@ -644,8 +649,7 @@ def baixa_arquivos_cnh_honda_main(session_id: str, lojas: str, *, retries: int =
                     espera_personalizada(
                         lambda: driver.switch_to.default_content(),
                         lambda: driver.switch_to.frame(0),
-                        inicio_random=2,
-                        fim_random=4
+                        condicao=condicao_frame(0)
                     )
                 except Exception as e:
                     logging.error(f'Erro ao acessar o iframe.\nDescrição: {str(e)}\n{'-'*60}')
@@ -666,6 +670,9 @@ def baixa_arquivos_cnh_honda_main(session_id: str, lojas: str, *, retries: int =
                         seleciona_uma_aba_do_navegador(driver, -1)
                         driver.maximize_window()
 
+                        # o "ok" abre o texto numa aba nova ou baixa um zip com ele
+                        download = RastreadorDownloads(PASTA_DOWNLOADS)
+                        download.iniciar()
                         clicar_pelo_atributo(driver, 'value', 'ok', path.Frame.btn_baixar)
 
                         try:
@@ -675,45 +682,42 @@ def baixa_arquivos_cnh_honda_main(session_id: str, lojas: str, *, retries: int =
 
                             with open((PASTA_DOWNLOADS / f"{user.nome_loja}.txt"), 'w', encoding='utf-8') as f:
                                 f.writelines(texto.text)
+                            download.parar()
                                 
                             driver.close()
                             seleciona_uma_aba_do_navegador(driver, 0)
                         except:
-                            sleep(random.randint(2, 4))
+                            try:
+                                caminho_baixado = download.aguardar(timeout=120)
+                            except TimeoutError as e:
+                                caminho_baixado = None
+                                logging.error(f'Erro ao baixar o arquivo zip.\nDescrição: {str(e)}\n{'-'*60}')
                             driver.close()
                             seleciona_uma_aba_do_navegador(driver, 0)
 
-                            sleep(random.randint(2, 4))
                             txt_existe = (PASTA_DOWNLOADS / f"{user.nome_loja}.txt").exists()
                             if not txt_existe:
+                                if caminho_baixado is None:
+                                    logging.error(f'Loja {user.nome_loja} pulada: o download do arquivo zip não terminou no tempo limite.\n{'-'*60}')
+                                    pular_loja = True
+                                    break
+
                                 try:
-                                    sleep(random.randint(2, 4))
-                                    troca_nome_arquivo(PASTA_DOWNLOADS, f"{user.nome_loja}.zip")
-                                    garantir_arquivo(PASTA_DOWNLOADS, f"{user.nome_loja}.zip")  # ✅ verificar
+                                    caminho_zip = renomear_download(caminho_baixado, f"{user.nome_loja}.zip")
                                 except Exception as e:
                                     logging.error(f'Erro ao trocar o nome do arquivo zip.\nDescrição: {str(e)}\n{'-'*60}')
                                     pular_loja = True
                                     break
 
                                 try:
-                                    sleep(random.randint(2, 4))
-                                    caminho_zip = os.path.join(PASTA_DOWNLOADS, f"{user.nome_loja}.zip")
                                     prefixo_zip = r"hda0334_new\d$\wwwhondaihs\internet\dwnhsfzip"
-                                    extrair_arquivo_alvo(caminho_zip, PASTA_DOWNLOADS, nome_arquivo=None, prefixo=prefixo_zip)
+                                    caminho_txt = extrair_arquivo_alvo(caminho_zip, PASTA_DOWNLOADS, nome_arquivo=None, prefixo=prefixo_zip)
+                                    renomear_download(caminho_txt, f"{user.nome_loja}.txt")
                                 except Exception as e:
                                     logging.error(f'Erro ao extrair o arquivo zip.\nDescrição: {str(e)}\n{'-'*60}')
                                     pular_loja = True
                                     break
 
-                        try:
-                            sleep(random.randint(2, 4))
-                            troca_nome_arquivo(PASTA_DOWNLOADS, f"{user.nome_loja}.txt")
-                            garantir_arquivo(PASTA_DOWNLOADS, f"{user.nome_loja}.txt")  # ✅ verificar
-                        except Exception as e:
-                            logging.error(f'Erro ao trocar o nome do arquivo txt.\nDescrição: {str(e)}\n{'-'*60}')
-                            pular_loja = True
-                            break
-
                         break
                     
                 if pular_loja:
@@ -725,15 +729,15 @@ def baixa_arquivos_cnh_honda_main(session_id: str, lojas: str, *, retries: int =
                         driver.switch_to.default_content()
                         clica_na_aba(wdw, path.MenuPrincipal.inicio, 'inicio')
                         
-                        espera_personalizada(inicio_random=1, fim_random=3)
+                        espera_personalizada()
                         clica_na_aba(wdw, path.MenuPrincipal.aba_consorcio, 'consórcio')  # Consórcio
-                        espera_personalizada(inicio_random=1, fim_random=3)
+                        espera_personalizada()
                         clica_na_aba(wdw, path.MenuPrincipal.aba_formularios_download, 'financeiro')
 
-                        espera_personalizada(inicio_random=1, fim_random=3)
+                        espera_personalizada()
                         clica_na_aba(wdw, path.MenuPrincipal.aba_consorcio_side_menu, 'consórcio - financeiro')
 
-                        espera_personalizada(inicio_random=1, fim_random=3)
+                        espera_personalizada()
                         clica_na_aba(wdw, path.MenuPrincipal.aba_solicitacao_carga, 'conta corrente concessionária')
 
                         # ===============================
@@ -763,8 +767,7 @@ def baixa_arquivos_cnh_honda_main(session_id: str, lojas: str, *, retries: int =
 
                         espera_personalizada(
                             lambda: driver.find_element(By.CSS_SELECTOR, 'select').click(),
-                            inicio_random=1,
-                            fim_random=3
+                            condicao=condicao_elemento((By.CSS_SELECTOR, 'select'))
                         )
 
                         clica_na_aba(wdw, 'select option', 'outros')
@@ -784,10 +787,13 @@ def baixa_arquivos_cnh_honda_main(session_id: str, lojas: str, *, retries: int =
                         continue
 
                     try:
-                        clicar_pelo_atributo(driver, 'value', 'imprimir', path.Janela.btn_imprimir)
-
-                        troca_nome_arquivo(PASTA_DOWNLOADS, f"{user.nome_loja}.pdf")
-                        garantir_arquivo(PASTA_DOWNLOADS, f"{user.nome_loja}.pdf")  # ✅ verificar
+                        aguardar_download(
+                            PASTA_DOWNLOADS,
+                            lambda: clicar_pelo_atributo(driver, 'value', 'imprimir', path.Janela.btn_imprimir),
+                            timeout=120,
+                            extensoes=('.pdf',),
+                            nome_destino=f"{user.nome_loja}.pdf",
+                        )
                     except Exception as e:
                         logging.error(f'Erro ao trocar o nome do pdf.\nDescrição: {str(e)}\n{'-'*60}')
                         for _ in range(2):
@@ -805,7 +811,7 @@ def baixa_arquivos_cnh_honda_main(session_id: str, lojas: str, *, retries: int =
                     driver.switch_to.frame(0)
 
                     try:
-                        extract_text_pdfplumber(nome_loja=user.nome_loja)
+                        extract_text_pdfplumber(nome_loja=user.nome_loja, pdf_path=PASTA_DOWNLOADS)
                         garantir_arquivo(PASTA_DOWNLOADS, f"extracao_pdf_{user.nome_loja}.xlsx")  # ✅ verificar
                     except Exception as e:
                         logging.error(f'Erro ao extrair os dados do pdf para o excel.\nDescrição: {str(e)}\n{'-'*60}')
@@ -834,6 +840,7 @@ def baixa_arquivos_cnh_honda_main(session_id: str, lojas: str, *, retries: int =
                 continue
     finally:
         finish_state(session_id)
+        print(f'⏱️ Esperas da execução: {finalizar_motor()}')
     # ===============================
     #   VERIFICAÇÃO PÓS-PROCESSO
     # ===============================
@@ -848,13 +855,8 @@ def baixa_arquivos_cnh_honda_main(session_id: str, lojas: str, *, retries: int =
     for loja in need_extract:
         try:
             caminho_zip = os.path.join(PASTA_DOWNLOADS, f"{loja}.zip")
-            extrair_arquivo_alvo(caminho_zip, PASTA_DOWNLOADS, nome_arquivo=None, prefixo=prefixo_zip)
-            # caso sua extração gere nome diferente, garanta o rename:
-            try:
-                troca_nome_arquivo(PASTA_DOWNLOADS, f"{loja}.txt")
-                garantir_arquivo(PASTA_DOWNLOADS, f"{user.nome_loja}.txt")  # ✅ verificar
-            except Exception:
-                pass
+            caminho_txt = extrair_arquivo_alvo(caminho_zip, PASTA_DOWNLOADS, nome_arquivo=None, prefixo=prefixo_zip)
+            renomear_download(caminho_txt, f"{loja}.txt")
         except Exception as e:
             logging.error(f"[PÓS] Erro ao extrair zip pendente da loja {loja}: {e}")
 
@@ -873,7 +875,8 @@ def baixa_arquivos_cnh_honda_main(session_id: str, lojas: str, *, retries: int =
         lojas_refazer_str = ",".join(sorted(lojas_para_refazer))
         logging.error(f"[PÓS] Reexecutando para lojas pendentes: {lojas_refazer_str} (tentativa {retries+1}/{max_retries})")
         # chamada recursiva controlada
-        return baixa_arquivos_cnh_honda_main(lojas_refazer_str, retries=retries+1, max_retries=max_retries)
+        return baixa_arquivos_cnh_honda_main(session_id, lojas_refazer_str, retries=retries+1, max_retries=max_retries,
+                                             pasta_downloads=pasta_downloads)
 
     # 4) Se ainda assim sobrou pendência, registra e finaliza com alerta
     if lojas_para_refazer:
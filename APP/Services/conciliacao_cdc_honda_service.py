@@ -1,34 +1,34 @@
 from selenium.webdriver.support import expected_conditions as EC
 from APP.Config.ihs_config import PASTA_DOWNLOADS, _ensure_driver, busca_dados_db, start_state, should_stop, finish_state
+from APP.Config.lojas_linx import empresa_da_loja
+from APP.Core.indice_nomes import IndiceNomes
+from APP.Core.extrato_centavos import ValoresExtrato
+from APP.Core.motor_conciliacao import (
+    ResultadoConciliacao, conciliar, frame_honda, frame_grade, salvar_entradas, carregar_entradas
+)
+from APP.Config.settings import Config
+from APP.Core.motor_espera import espera_personalizada, iniciar_motor, finalizar_motor, condicao_elemento, condicao_frame
+from APP.Core.execucao_paralela import executar_lojas_em_paralelo, resumir_resultados
+from APP.Core.pipeline_lojas import PipelineLojas
+from concurrent.futures import Future
 from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
 from selenium.webdriver.common.keys import Keys
 from typing import Dict, List, Tuple, Optional
 from openpyxl import load_workbook, Workbook
 from selenium.webdriver.common.by import By
 from datetime import datetime, timedelta
 from APP.DTO.ihs_dto import User
-from collections import Counter
+from APP.Core.excel_parser import ler_excel
 from unidecode import unidecode
 from tkinter import messagebox
 from dotenv import load_dotenv
 from pathlib import Path as P
 from time import sleep, time
-from fuzzywuzzy import fuzz
 import unicodedata
-import logging
-import random
-import pandas
 import os
 import re
 
-def verificar_similaridade_fuzzy(nome1, nome2, limite=90):
-    """
-    Usa fuzzy matching para verificar similaridade
-    """
-    similaridade = fuzz.ratio(nome1.lower(), nome2.lower())
-    return similaridade >= limite, similaridade
-
-
 def preencher_campo(driver, locator, texto):
     """
     Preenche um campo de texto em um formulário web.
@@ -44,9 +44,7 @@ def preencher_campo(driver, locator, texto):
     campo = driver.find_element(*locator)
     campo.click()
     espera_personalizada(
-        lambda: campo.send_keys(texto),
-        inicio_random=2,
-        fim_random=4
+        lambda: campo.send_keys(texto)
     )
 
 
@@ -62,9 +60,7 @@ def clicar_em_um_botao(driver, locator):
         None
     """
     espera_personalizada(
-        lambda: driver.find_element(*locator).send_keys(Keys.ENTER),
-        inicio_random=2,
-        fim_random=4
+        lambda: driver.find_element(*locator).send_keys(Keys.ENTER)
     )
 
 
@@ -117,29 +113,237 @@ def clicar_pelo_atributo(driver, atributo, texto_comparar, locator):
             )
             break
 
-def tenta_passar_pagina_atras(driver):
+ID_PRIMEIRO_DOCUMENTO = 'span_vCCNNDOC_0001'
+
+def botao_pagina_ativo(driver, id_botao):
+    """
+    Indica se o botão de paginação (IMAGE1 = próxima, IMAGE2 = anterior) pode
+    ser clicado. Na última/primeira página o GeneXus o esconde ou desabilita.
+    """
+    botoes = driver.find_elements(By.ID, id_botao)
+    if not botoes:
+        return False
+    botao = botoes[0]
     try:
-        espera_personalizada(
-            lambda: driver.find_element(By.ID, 'IMAGE2').click(),
-            inicio_random=6,
-            fim_random=10
+        return (
+            botao.is_displayed()
+            and botao.is_enabled()
+            and botao.get_attribute('disabled') is None
+            and 'disabled' not in (botao.get_attribute('class') or '').lower()
         )
-        return True
-    except:
+    except StaleElementReferenceException:
         return False
 
-def tenta_passar_pagina(driver):
+def _passar_pagina(driver, id_botao, timeout=None):
+    """
+    Clica no botão de paginação e espera a grade trocar de página: o primeiro
+    documento da página anterior precisa sair do DOM (ou mudar de texto) e o
+    da nova página aparecer.
+
+    Retorno:
+        bool: True se a grade mudou de página; False se o botão está inativo
+            ou a grade não mudou em `timeout` segundos.
+    """
+    if not botao_pagina_ativo(driver, id_botao):
+        return False
+
+    anteriores = driver.find_elements(By.ID, ID_PRIMEIRO_DOCUMENTO)
+    anterior = anteriores[0] if anteriores else None
+    texto_anterior = anterior.text if anterior is not None else None
+
     try:
         espera_personalizada(
-            lambda: driver.find_element(By.ID, 'IMAGE1').click(),
-            inicio_random=6,
-            fim_random=10
+            lambda: driver.find_element(By.ID, id_botao).click(),
+            aguardar_depois=True,
+            janela=0
         )
+    except Exception:
+        return False
+
+    def mudou(d):
+        if anterior is not None:
+            try:
+                if anterior.text == texto_anterior:
+                    return False
+            except StaleElementReferenceException:
+                pass  # a grade foi redesenhada
+        return bool(d.find_elements(By.ID, ID_PRIMEIRO_DOCUMENTO))
+
+    try:
+        WebDriverWait(driver, timeout or Config.IHS_TIMEOUT_PAGINA_S, poll_frequency=0.25).until(mudou)
         return True
-    except:
+    except TimeoutException:
         return False
 
-def pega_valores_liquidos(driver, wdw, EC):
+def tenta_passar_pagina_atras(driver):
+    return _passar_pagina(driver, 'IMAGE2')
+
+def tenta_passar_pagina(driver):
+    return _passar_pagina(driver, 'IMAGE1')
+
+# Lê de uma vez todas as linhas da grade "consultar cc concessionaria" da página atual
+JS_SNAPSHOT_GRID_CC = """
+const linhas = [];
+const texto = (id) => {
+    const el = document.getElementById(id);
+    return el ? (el.innerText || el.textContent || '').trim() : null;
+};
+for (let i = 1; i < 10000; i++) {
+    const sufixo = String(i).padStart(4, '0');
+    const documento = texto('span_vCCNNDOC_' + sufixo);
+    if (documento === null) break;
+    linhas.push({
+        linha: i,
+        documento: documento,
+        lote: texto('span_vCCNNLOT_' + sufixo) || '',
+        valor: texto('span_vCCNVEVT_' + sufixo) || ''
+    });
+}
+return linhas;
+"""
+
+def snapshot_grid_cc(driver):
+    """
+    Retorna as linhas da página atual da grade em uma única chamada ao navegador.
+
+    Parâmetros:
+        driver (webdriver): Instância do Selenium WebDriver (já no frame da consulta).
+
+    Retorno:
+        list[dict]: Linhas com as chaves 'linha', 'documento', 'lote' e 'valor'.
+    """
+    return driver.execute_script(JS_SNAPSHOT_GRID_CC) or []
+
+def snapshot_grid_cc_todas_paginas(driver, max_paginas=20):
+    """
+    Lê todas as páginas da grade (avançando com IMAGE1) e volta para a primeira (IMAGE2).
+    A última página é a em que IMAGE1 está inativo ou o clique não troca a grade
+    (tenta_passar_pagina espera a troca até IHS_TIMEOUT_PAGINA_S).
+
+    Parâmetros:
+        driver (webdriver): Instância do Selenium WebDriver (já no frame da consulta).
+        max_paginas (int): Limite de páginas percorridas.
+
+    Retorno:
+        list[dict]: Linhas de todas as páginas, com a chave extra 'pagina' (base 0).
+    """
+    linhas = []
+    pagina = snapshot_grid_cc(driver)
+    posicao = 0
+
+    while pagina:
+        for linha in pagina:
+            linha['pagina'] = posicao
+        linhas.extend(pagina)
+
+        if posicao + 1 >= max_paginas:
+            if botao_pagina_ativo(driver, 'IMAGE1'):
+                print(f'⚠️ Grade com mais de {max_paginas} páginas: as demais não foram lidas.')
+            break
+
+        if not tenta_passar_pagina(driver):
+            break  # última página
+        posicao += 1
+
+        proxima = snapshot_grid_cc(driver)
+        if [(l['documento'], l['lote'], l['valor']) for l in proxima] == \
+           [(l['documento'], l['lote'], l['valor']) for l in pagina]:
+            print(f'⚠️ A página {posicao + 1} da grade veio igual à anterior; leitura encerrada nela.')
+            break
+        pagina = proxima
+
+    # Volta para a primeira página
+    ir_para_pagina(driver, posicao, 0)
+    return linhas
+
+def ir_para_pagina(driver, pagina_atual, pagina_destino):
+    """
+    Navega entre páginas da grade usando IMAGE1 (próxima) e IMAGE2 (anterior).
+
+    Retorno:
+        int: Página em que o navegador ficou (sempre pagina_destino).
+
+    Levanta RuntimeError se a grade não trocar de página: a página atual deixa
+    de ser conhecida e nenhuma linha dela pode ser clicada com segurança.
+    """
+    while pagina_atual != pagina_destino:
+        avancar = pagina_atual < pagina_destino
+        if not (tenta_passar_pagina(driver) if avancar else tenta_passar_pagina_atras(driver)):
+            raise RuntimeError(
+                f'Não foi possível ir da página {pagina_atual + 1} para a {pagina_destino + 1} da grade.'
+            )
+        pagina_atual += 1 if avancar else -1
+    return pagina_atual
+
+# Lê nome (3ª coluna) e valor (última coluna) de todas as linhas do popup de uma vez
+JS_VALORES_LIQUIDOS = """
+const tabela = document.getElementById('Grid1ContainerTbl');
+if (!tabela) return null;
+const linhas = [];
+for (let i = 1; i < 100000; i++) {
+    const linha = tabela.querySelector('#Grid1ContainerRow_' + String(i).padStart(4, '0'));
+    if (!linha) break;
+    const atributos = linha.querySelectorAll('.gx-attribute');
+    if (atributos.length < 3) break;
+    const texto = (el) => (el.innerText || el.textContent || '').trim();
+    linhas.push([texto(atributos[2]), texto(atributos[atributos.length - 1])]);
+}
+return linhas;
+"""
+
+def _extrai_valores_liquidos_js(driver):
+    """
+    Extrai (nome, valor) de todas as linhas da Grid1ContainerTbl em uma única chamada.
+
+    Retorno:
+        tuple: (lista_nomes, lista_valor), ou None se a tabela não estiver na página.
+    """
+    linhas = driver.execute_script(JS_VALORES_LIQUIDOS)
+    if linhas is None:
+        return None
+
+    lista_nomes = [unidecode(nome.upper()) for nome, _ in linhas]
+    lista_valor = [valor for _, valor in linhas]
+    return lista_nomes, lista_valor
+
+def _extrai_valores_liquidos_legado(tabela):
+    """
+    Extração linha a linha via find_element (mantida como fallback e para comparação).
+
+    Retorno:
+        tuple: (lista_nomes, lista_valor)
+    """
+    lista_nomes = []
+    lista_valor = []
+
+    contador = 1
+    while contador != 0:
+        try:
+            id_linha_ajustado = ajusta_id('#Grid1ContainerRow', contador)
+            linha = tabela.find_element(By.CSS_SELECTOR, id_linha_ajustado)
+
+            # pega o nome e o valor em colunas específicas
+            lista_nomes.append(unidecode(linha.find_elements(By.CSS_SELECTOR, '.gx-attribute')[2].text.strip().upper()))
+            lista_valor.append(linha.find_elements(By.CSS_SELECTOR, '.gx-attribute')[-1].text.strip())
+            contador += 1
+        except:
+            contador = 0
+
+    return lista_nomes, lista_valor
+
+def pega_valores_liquidos(driver, wdw, EC, legado=False):
+    """
+    Lê nomes e valores líquidos do popup do lote e fecha o popup.
+
+    Parâmetros:
+        driver (webdriver): Instância do Selenium WebDriver.
+        wdw (WebDriverWait): Espera explícita do driver.
+        EC: Módulo expected_conditions.
+        legado (bool): Força a extração linha a linha (para comparar tempos).
+
+    Retorno:
+        tuple: (lista_nomes, lista_valor), ou (False, False) em caso de erro.
+    """
     try:
         abas = driver.window_handles
         driver.switch_to.window(abas[-1])
@@ -147,21 +351,20 @@ def pega_valores_liquidos(driver, wdw, EC):
         driver.set_window_size(1366, 768)
         tabela = wdw.until(EC.presence_of_element_located((By.ID, 'Grid1ContainerTbl')))
 
-        lista_nomes = []
-        lista_valor = []
-
-        contador = 1
-        while contador != 0:
+        inicio = time()
+        extraido = None
+        metodo = 'legado'
+        if not legado:
             try:
-                id_linha_ajustado = ajusta_id('#Grid1ContainerRow', contador)
-                linha = tabela.find_element(By.CSS_SELECTOR, id_linha_ajustado)
-
-                # pega o nome e o valor em colunas específicas
-                lista_nomes.append(unidecode(linha.find_elements(By.CSS_SELECTOR, '.gx-attribute')[2].text.strip().upper()))
-                lista_valor.append(linha.find_elements(By.CSS_SELECTOR, '.gx-attribute')[-1].text.strip())
-                contador += 1
-            except:
-                contador = 0
+                extraido = _extrai_valores_liquidos_js(driver)
+                metodo = 'js'
+            except Exception as e:
+                print(f'⚠️ Extração via JS falhou, usando leitura linha a linha: {e}')
+        if extraido is None:
+            metodo = 'legado'
+            extraido = _extrai_valores_liquidos_legado(tabela)
+        lista_nomes, lista_valor = extraido
+        print(f'⏱️ Valores líquidos ({metodo}): {len(lista_nomes)} linhas em {(time() - inicio) * 1000:.0f} ms')
 
         driver.close()
         abas = driver.window_handles
@@ -172,6 +375,13 @@ def pega_valores_liquidos(driver, wdw, EC):
     except Exception as e:
         return (False, False)
 
+def _valores_liquidos_do_lote(driver, wdw):
+    """pega_valores_liquidos que levanta erro (para nova tentativa) em vez de devolver (False, False)."""
+    nomes, valores = pega_valores_liquidos(driver, wdw, EC)
+    if nomes is False:
+        raise RuntimeError('Não foi possível ler os valores líquidos do popup do lote.')
+    return nomes, valores
+
 def ajusta_id(primeira_parte, numero_lote):
     """
     Ajusta o ID de um elemento conforme o número do lote.
@@ -232,27 +442,25 @@ def compara_valores(
     tol_abs: float = 50.0,
     tol_pct: Optional[float] = None,
     thr_exato: int = 92,
-    thr_parcial: int = 80
+    thr_parcial: int = 80,
+    indice: Optional[IndiceNomes] = None
 ) -> Tuple[bool, str, float]:
     """
     - Usa fuzzy matching para achar o melhor nome em dados_honda.
     - Compara o valor com tolerância (abs e/ou percentual).
     - Evita KeyError, pois usa a chave realmente parecida (melhor_nome).
+    - `indice`: IndiceNomes de dados_honda montado uma vez por loja; sem ele,
+      é montado a cada chamada.
     """
-    alvo = nome_db.strip().upper()
-    melhor_nome = None
-    melhor_score = -1
-
-    # Loop para achar o nome mais parecido
-    for nome in dados_honda:
-        eh_similar, percentual = verificar_similaridade_fuzzy(alvo, nome.strip().upper(), limite=thr_exato)
-        # Guarda sempre o melhor score, mesmo que não bata o limite
-        if percentual > melhor_score:
-            melhor_score = percentual
-            melhor_nome = nome
+    if not dados_honda:
+        return False, f"❌ Nenhum cliente correspondente encontrado. Empresa: {empresa}", valor_db
+
+    # Nome mais parecido (só interessa a partir de thr_parcial)
+    indice = indice if indice is not None else IndiceNomes(dados_honda)
+    melhor_nome, melhor_score = indice.melhor(nome_db, score_cutoff=thr_parcial)
 
     if melhor_nome is None:
-        return False, f"❌ Nenhum cliente correspondente encontrado. Empresa: {empresa}", valor_db
+        return False, False, valor_db
 
     try:
         valor_honda = float(dados_honda[melhor_nome])
@@ -300,7 +508,8 @@ def compara_valores(
 
 
 def cria_arquivo_log(loja: str, logs: list,
-                     pasta: str = r'\\172.17.67.14\findev$\Automação - CDC\Documentos_Logs'):
+                     pasta: str = r'\\172.17.67.14\findev$\Automação - CDC\Documentos_Logs',
+                     hoje: Optional[str] = None):
     """
     Cria um arquivo de log para uma loja específica.
 
@@ -308,11 +517,12 @@ def cria_arquivo_log(loja: str, logs: list,
         loja (str): Nome ou identificador da loja.
         logs (list): Lista de mensagens de log.
         pasta (str): Caminho da pasta onde salvar o arquivo (default configurado).
+        hoje (str | None): Data (dd-mm-aaaa) do nome do arquivo; padrão: hoje.
 
     Retorno:
         None
     """
-    hoje = datetime.now().strftime("%d-%m-%Y")
+    hoje = hoje or datetime.now().strftime("%d-%m-%Y")
     os.makedirs(pasta, exist_ok=True)
 
     header = '-' * 40
@@ -379,39 +589,6 @@ def cria_indicador_de_tempo_execucao(
         raise PermissionError(f"Feche o arquivo '{arquivo}' no Excel e tente novamente.")
 
 
-def espera_personalizada(*acoes, retorno=False, inicio_random=3, fim_random=8):
-    """
-    Executa uma ou mais ações com tentativas repetidas até que tenham sucesso. Caso tenha retorno, adicione a função que deve receber retorno como a última.
-
-    Parâmetros:
-        *acoes (callable): Funções ou lambdas que executam ações.
-        **retorno (bool): Variável boolena para verificar se é necessário retornar algo.
-
-    Retorno:
-        None
-    """
-    contador = 0
-    while True:
-        try:
-            # espera aleatória para simular comportamento humano
-            sleep(random.randint(inicio_random, fim_random))
-
-            # executa todas menos a última
-            for acao in acoes[:-1] if retorno else acoes:
-                acao()
-
-            # se tiver retorno, executa a última e devolve
-            if retorno:
-                return acoes[-1]()
-            
-            break
-        except Exception:
-            if contador == 2:
-                break
-            contador += 1
-            continue
-
-
 def sair_ihs(driver):
     driver.switch_to.default_content()
     driver.find_element(By.CSS_SELECTOR, 'div.pull-right div.logout a').click()
@@ -424,13 +601,24 @@ def pega_texto_elemento(driver, primeira_parte_id, iterador):
     elemento = espera_personalizada(
         lambda: driver.find_element(By.ID, id_elemento),
         retorno=True,
-        inicio_random=1,
-        fim_random=3
+        condicao=condicao_elemento((By.ID, id_elemento))
     )
 
     return elemento
 
-def ler_valores_extrato(user, ontem, parse_valor):
+def ler_valores_extrato(user, ontem, interativo: bool = True) -> Optional[ValoresExtrato]:
+    """
+    Lê os valores do Banco Honda no extrato do dia da loja.
+
+    Parâmetros:
+        user (User): Loja/usuário.
+        ontem (datetime): Dia do extrato.
+        interativo (bool): Com False (leitura antecipada em segundo plano), não
+            abre caixas de diálogo: arquivo ausente ou ilegível gera exceção.
+
+    Retorno:
+        ValoresExtrato | None: None se o usuário cancelou ou houve erro informado na tela.
+    """
     pasta = r'\\172.17.67.14\findev$\Automação - CDC\\'
 
     # Mapeamento por loja
@@ -471,10 +659,15 @@ def ler_valores_extrato(user, ontem, parse_valor):
     cfg = config[user.nome_loja]
     nome_esperado = cfg['nome']
 
+    def falhar(titulo, texto):
+        if not interativo:
+            raise ValueError(f'{titulo}: {texto}')
+        messagebox.showerror(titulo, texto)
+
     try:
         arquivos = os.listdir(pasta)
     except Exception as e:
-        messagebox.showerror("Erro", f"Não foi possível listar a pasta.\n{e}")
+        falhar("Erro", f"Não foi possível listar a pasta.\n{e}")
         return None
 
     # 1) Procura somente UMA vez pelo arquivo esperado
@@ -484,6 +677,9 @@ def ler_valores_extrato(user, ontem, parse_valor):
             caminho_arquivo = os.path.join(pasta, arquivo)
             break
 
+    if caminho_arquivo is None and not interativo:
+        raise FileNotFoundError(f"Não existe o arquivo da loja {user.nome_loja} na pasta: {nome_esperado}")
+
     # 2) Se não encontrou, pergunta uma vez e re-checa
     while caminho_arquivo is None:
         resp = messagebox.askokcancel(
@@ -498,7 +694,7 @@ def ler_valores_extrato(user, ontem, parse_valor):
         try:
             arquivos = os.listdir(pasta)
         except Exception as e:
-            messagebox.showerror("Erro", f"Não foi possível listar a pasta.\n{e}")
+            falhar("Erro", f"Não foi possível listar a pasta.\n{e}")
             return None
 
         for arquivo in arquivos:
@@ -510,9 +706,10 @@ def ler_valores_extrato(user, ontem, parse_valor):
 
     # 3) Lê a planilha e filtra
     try:
-        df = pandas.read_excel(caminho_arquivo, header=cfg['header'])
+        # Detecta a linha de cabeçalho pelas colunas esperadas; cfg['header'] é o padrão
+        df = ler_excel(caminho_arquivo, header=cfg['header'], cabecalho_com=[cfg['col_razao'], cfg['col_valor']])
     except Exception as e:
-        messagebox.showerror("Erro", f"Erro ao ler o Excel '{nome_esperado}'.\n{e}")
+        falhar("Erro", f"Erro ao ler o Excel '{nome_esperado}'.\n{e}")
         return None
 
     col_razao = cfg['col_razao']
@@ -520,7 +717,7 @@ def ler_valores_extrato(user, ontem, parse_valor):
     filtro_txt = cfg['filtro_texto']
 
     if col_razao not in df.columns or col_valor not in df.columns:
-        messagebox.showerror(
+        falhar(
             "Colunas não encontradas",
             f"As colunas esperadas não foram encontradas no arquivo:\n"
             f"- {col_razao}\n- {col_valor}\n\nVerifique o header (linha de título) configurado."
@@ -529,19 +726,21 @@ def ler_valores_extrato(user, ontem, parse_valor):
 
     filtro = df[col_razao].astype(str).str.contains(filtro_txt, case=False, na=False)
 
-    # 4) Converte os valores para float com parse_valor SEMPRE
+    # 4) Normaliza os valores para centavos (texto "1.234,56" no CRATO, número nas demais)
     try:
-        if user.nome_loja == 'CRATO':
-            valores_extrato = df.loc[filtro, col_valor].apply(parse_valor).tolist()
-        else:
-            valores_extrato = df.loc[filtro, col_valor].tolist()
+        valores_extrato = ValoresExtrato(
+            df.loc[filtro, col_valor], tolerancia_centavos=Config.CDC_TOLERANCIA_EXTRATO_CENTAVOS
+        )
     except Exception as e:
-        messagebox.showerror(
+        falhar(
             "Erro de conversão",
             f"Falha ao converter os valores da coluna '{col_valor}'.\n{e}"
         )
         return None
 
+    if valores_extrato.invalidos:
+        print(f'⚠️ {valores_extrato.invalidos} valor(es) do extrato da loja {user.nome_loja} não puderam ser lidos')
+
     return valores_extrato
 
 load_dotenv()
@@ -691,7 +890,149 @@ def tela(lojas: str) -> Dict[str, List[str]]:
     }
 
 
-def conciliacao_cdc_honda_main(session_id: str, lojas: str):
+def grava_resultado_conciliacao(loja: str, resultado: ResultadoConciliacao, hoje: str,
+                                base_dir: str = r"\\172.17.67.14\findev$\Automação - CDC"):
+    """
+    Grava o log, o CSV consolidado e o Excel de resumo de uma loja.
+
+    Parâmetros:
+        loja (str): Nome canônico da loja.
+        resultado (ResultadoConciliacao): Saída de conciliar().
+        hoje (str): Data (dd-mm-aaaa) usada no nome dos arquivos.
+        base_dir (str): Pasta base da automação.
+    """
+    cria_arquivo_log(loja, resultado.logs, hoje=hoje)
+
+    base = P(base_dir)
+    arquivo_csv = base / "Arquivos_csv" / f"consolidado_{loja}_{hoje}.csv"
+    arquivo_excel = base / "Arquivos_excel" / f"resumo_{loja}_{hoje}.xlsx"
+    resultado.consolidado.to_csv(arquivo_csv, index=False, sep=';', encoding='utf-8-sig')
+    resultado.resumo.to_excel(arquivo_excel, index=False)
+    print(f'📄 Loja {loja}: {len(resultado.consolidado)} título(s) exportado(s), {len(resultado.logs)} linha(s) de log')
+
+
+def concilia_e_grava_loja(loja: str, dados: Dict[str, float], linhas_grid: List[dict],
+                          valores_extrato: ValoresExtrato, titulos_db, logs: List[str]) -> None:
+    """
+    Etapa sem o portal de uma loja: espera os títulos do banco (`titulos_db`
+    pode ser um Future da leitura antecipada), salva as entradas, concilia e
+    grava log, CSV e Excel.
+    """
+    hoje = datetime.now().strftime("%d-%m-%Y")
+    try:
+        titulos_db = titulos_db.result() if isinstance(titulos_db, Future) else titulos_db
+    except Exception as e:
+        logs.append(f'🚫 Erro ao consultar dados no banco de dados.\nDescrição: {str(e)}')
+        print(logs[-1])
+        cria_arquivo_log(loja, logs, hoje=hoje)
+        raise
+
+    honda_df = frame_honda(dados)
+    grade_df = frame_grade(linhas_grid)
+    try:
+        salvar_entradas(Config.CDC_ENTRADAS_DIR, loja, hoje, honda_df, titulos_db, valores_extrato, grade_df)
+    except Exception as e:
+        print(f'⚠️ Não foi possível salvar as entradas da loja {loja}: {e}')
+
+    resultado = conciliar(honda_df, titulos_db, valores_extrato, grade_df)
+    resultado.logs[:0] = logs
+    grava_resultado_conciliacao(loja, resultado, hoje)
+
+
+def reprocessar_conciliacao_cdc(lojas: str, data: Optional[str] = None, **tolerancias):
+    """
+    Refaz a conciliação a partir das entradas salvas numa execução anterior,
+    sem abrir o portal da Honda nem consultar o banco.
+
+    Parâmetros:
+        lojas (str): 'all' ou lojas separadas por vírgula (mesmo formato da rota principal).
+        data (str | None): Dia da execução original (dd-mm-aaaa); padrão: hoje.
+        **tolerancias: tol_abs, tol_pct, thr_exato e thr_parcial repassados a conciliar().
+
+    Retorno:
+        tuple: (ok, mensagem)
+    """
+    dia = data or datetime.now().strftime("%d-%m-%Y")
+    ordem = [loja for loja in _parse_param_lojas(lojas) if not loja.startswith("!INVALIDA:")]
+    if not ordem:
+        return False, 'Nenhuma loja válida informada.'
+
+    processadas, erros = [], []
+    for loja in ordem:
+        try:
+            entradas = carregar_entradas(Config.CDC_ENTRADAS_DIR, loja, dia)
+            extrato = ValoresExtrato(entradas['valores_extrato'], Config.CDC_TOLERANCIA_EXTRATO_CENTAVOS)
+            resultado = conciliar(
+                entradas['honda'], entradas['titulos'], extrato, entradas['grade'],
+                **tolerancias
+            )
+            grava_resultado_conciliacao(loja, resultado, dia)
+            processadas.append(loja)
+        except Exception as e:
+            erros.append(f'{loja}: {e}')
+
+    if erros:
+        return False, f'Reprocessadas: {", ".join(processadas) or "nenhuma"}. Erros: {" | ".join(erros)}'
+    return True, f'Conciliação reprocessada para {", ".join(processadas)} ({dia}).'
+
+
+def conciliacao_cdc_honda_paralelo(session_id: str, lojas: str, max_paralelo: int):
+    """
+    Executa a conciliação com uma loja por navegador, até `max_paralelo` ao mesmo tempo.
+
+    Retorno:
+        tuple: (ok, mensagem com o resultado de cada loja)
+    """
+    try:
+        usuarios = get_all_users(lojas)
+    except Exception as e:
+        return False, f'Erro ao buscar os usuários.\nDescrição: {str(e)}'
+
+    start_time = time()
+    start_state(session_id)
+    cache_db = {}  # títulos do banco por empresa, consultados uma vez para todas as lojas
+    try:
+        resultados = executar_lojas_em_paralelo(
+            session_id,
+            [user.nome_loja for user in usuarios],
+            # interativo=False: caixa de diálogo do tkinter não pode abrir na thread da loja
+            lambda sessao, loja, pasta: conciliacao_cdc_honda_main(
+                sessao, loja, pasta_downloads=pasta, registrar_indicador=False, cache_db=cache_db,
+                interativo=False
+            ),
+            portal='IHS',
+            max_paralelo=max_paralelo
+        )
+    finally:
+        finish_state(session_id)
+    end_time = time()
+
+    print(f'Progama finalizado em {str(timedelta(seconds=end_time - start_time))}m')
+
+    try:
+        print(cria_indicador_de_tempo_execucao(start_time, end_time, 'CONCILIAÇÃO DB COM HONDA'))
+    except Exception as e:
+        return False, f'Erro ao registrar indicador de tempo de execução.\nDescrição: {str(e)}'
+
+    return resumir_resultados(resultados)
+
+
+def conciliacao_cdc_honda_main(session_id: str, lojas: str, *, paralelo: int = 1, pasta_downloads=None,
+                               registrar_indicador: bool = True, cache_db=None, interativo: bool = True):
+    """
+    Conciliação CDC das lojas, uma por vez no mesmo navegador.
+
+    Parâmetros:
+        paralelo (int): Mais de 1 roda as lojas em navegadores separados.
+        interativo (bool): False não abre caixas de diálogo (execução em thread).
+
+    Retorno:
+        tuple: (ok, mensagem); ok é False se alguma loja falhou (a mensagem lista as lojas).
+    """
+    if paralelo > 1:
+        return conciliacao_cdc_honda_paralelo(session_id, lojas, paralelo)
+    cache_db = cache_db if cache_db is not None else {}
+
         # Busca todos os usuários cadastrados
     try:
         usuarios = get_all_users(lojas)
@@ -700,14 +1041,36 @@ def conciliacao_cdc_honda_main(session_id: str, lojas: str):
     # Marca o início da execução (para métricas)
     start_time = time()
 
+    # --- Define data de ontem ---
+    ontem = datetime.now() - timedelta(days=1)
+    if ontem.weekday() == 6:  # se for domingo, volta 2 dias (sexta-feira)
+        ontem = ontem - timedelta(days=2)
+
+    # Extrato (SMB) e títulos (Oracle) não dependem do portal: são lidos em segundo
+    # plano, da loja atual e da próxima, enquanto o navegador faz login e raspa a grade
+    usuarios_por_loja = {user.nome_loja: user for user in usuarios}
+    pipeline = PipelineLojas(
+        usuarios_por_loja,
+        {
+            'extrato': lambda loja: ler_valores_extrato(usuarios_por_loja[loja], ontem, interativo=False),
+            'titulos': lambda loja: busca_dados_db(empresa=empresa_da_loja(loja), cache=cache_db),
+        },
+        antecipar=Config.CDC_PIPELINE_ANTECIPAR,
+        nome='conciliacao-cdc'
+    )
+
+    falhas: List[str] = []  # lojas que não chegaram aos arquivos (raspagem, extrato ou gravação)
     try:
         # Configura o WebDriver
-        driver, wdw, PASTA_DOWNLOADS = _ensure_driver(session_id=session_id)
+        driver, wdw, PASTA_DOWNLOADS = _ensure_driver(session_id=session_id, pasta_downlod=pasta_downloads, automacao='conciliacao_cdc')
+        iniciar_motor(driver, tentativas=3)
         start_state(session_id)
 
         url = 'https://www3.honda.com.br/corp/ihs/portal/#/login'
 
         for user in usuarios:
+            pipeline.iniciar(user.nome_loja)
+            logs = []
             driver.get(url)  # Entra no site do IHS
             if should_stop(session_id):
                 print(f"[{session_id}] Stop solicitado. Encerrando automação sem fechar o driver.")
@@ -718,13 +1081,13 @@ def conciliacao_cdc_honda_main(session_id: str, lojas: str):
                 driver.delete_all_cookies()
 
                 # --- Login ---
-                espera_personalizada(inicio_random=1, fim_random=3)
+                espera_personalizada()
                 driver.find_element(By.CSS_SELECTOR, '#codEmpresa').send_keys(user.codigo)
-                espera_personalizada(inicio_random=1, fim_random=3)
+                espera_personalizada()
                 driver.find_element(By.CSS_SELECTOR, '#codUsuario').send_keys(user.usuario)
-                espera_personalizada(inicio_random=1, fim_random=3)
+                espera_personalizada()
                 driver.find_element(By.CSS_SELECTOR, '#senha').send_keys(user.senha)
-                espera_personalizada(inicio_random=1, fim_random=3)
+                espera_personalizada()
 
                 submit = wdw.until(
                     EC.element_to_be_clickable((By.CSS_SELECTOR, '#submitLogin'))
@@ -756,14 +1119,14 @@ def conciliacao_cdc_honda_main(session_id: str, lojas: str):
                     pass
                 
                 clica_na_aba(wdw, '.a-empresaHonda', 'banco')  # Financiamento
-                espera_personalizada(inicio_random=1, fim_random=3)
+                espera_personalizada()
                 clica_na_aba(wdw, '.menugeral ul li a', 'gestão de financiamentos')
 
-                espera_personalizada(inicio_random=1, fim_random=3)
+                espera_personalizada()
                 clica_na_aba(wdw, '#sideMenu0 .itemMenu a', 'gestão de financiamentos')
-                espera_personalizada(inicio_random=1, fim_random=3)
+                espera_personalizada()
                 clica_na_aba(wdw, '#sideMenu0 .itemMenu a', 'controlar pagamento')
-                espera_personalizada(inicio_random=1, fim_random=3)
+                espera_personalizada()
                 clica_na_aba(wdw, '#sideMenu0 .itemMenu a', 'consultar cc concessionaria')
 
                 if should_stop(session_id):
@@ -775,24 +1138,19 @@ def conciliacao_cdc_honda_main(session_id: str, lojas: str):
                     lambda: driver.switch_to.default_content(),
                     lambda: driver.switch_to.frame(0),
                     lambda: driver.find_element(By.CSS_SELECTOR, 'select').click(),
-                    inicio_random=2,
-                    fim_random=4
+                    condicao=condicao_frame(0)
                 )
 
-                espera_personalizada(inicio_random=1, fim_random=3)
+                espera_personalizada()
                 clica_na_aba(wdw, 'select option', 'financiamento de bens')
 
                 if should_stop(session_id):
                     print(f"[{session_id}] Stop solicitado. Encerrando automação sem fechar o driver.")
                     break
 
-                # --- Define data de ontem ---
-                ontem = datetime.now() - timedelta(days=1)
-                if ontem.weekday() == 6:  # se for domingo, volta 2 dias (sexta-feira)
-                    ontem = ontem - timedelta(days=2)
                 data_ontem = ontem.strftime("%d/%m/%y")
 
-                sleep(random.randint(2, 4))
+                espera_personalizada()
 
                 # --- Preenche período da consulta ---
                 preencher_campo(driver, (By.CSS_SELECTOR, '#vWDPERINI'), data_ontem)
@@ -812,337 +1170,103 @@ def conciliacao_cdc_honda_main(session_id: str, lojas: str):
 
                 # --- Busca dados na Honda ---
                 dados = {}
-                logs = []
-                documentos = []
 
                 # ===================================
                 #    Pega os valores do extrato
                 # ===================================
-                espera_personalizada(lambda: driver.execute_script("document.body.style.zoom='57%'"), inicio_random=2,fim_random=4)
+                espera_personalizada(lambda: driver.execute_script("document.body.style.zoom='57%'"))
 
                 try:
 
-                    valores_extrato = ler_valores_extrato(user, ontem, parse_valor)
+                    try:
+                        valores_extrato = pipeline.obter(user.nome_loja, 'extrato')
+                    except Exception as e:
+                        # arquivo ainda não está na pasta: pergunta na tela, como antes
+                        print(f'⚠️ Extrato da loja {user.nome_loja} não lido em segundo plano: {e}')
+                        valores_extrato = ler_valores_extrato(user, ontem, interativo=interativo)
+                    if valores_extrato is None:
+                        raise ValueError(f'Extrato da loja {user.nome_loja} não carregado.')
 
                 except Exception as e:
                     logs.append(f'🚫 Erro ao ler o arquivo do extrato. Ele não existe ou não é um arquivo Excel.\nDescrição: {str(e)}')
+                    pipeline.gravar(f'Log da loja {user.nome_loja}', cria_arquivo_log, user.nome_loja, logs)
+                    falhas.append(f'Loja {user.nome_loja}: extrato não lido ({e})')
 
                     sair_ihs(driver)
                     continue
 
                 
                 # ===================================
-                #   Pega os dados se for uma página
+                #   Lê a grade inteira (todas as páginas)
                 # ===================================
                 if should_stop(session_id):
                     print(f"[{session_id}] Stop solicitado. Encerrando automação sem fechar o driver.")
                     break
-                espera_personalizada(inicio_random=2, fim_random=5)
-                lote_teste = pega_texto_elemento(driver, 'span_vCCNNLOT', 15)
-                if lote_teste == None:
-                    for i in range(1,15):
-                        if should_stop(session_id):
-                            break
-                        if i == 1: espera_personalizada(inicio_random=4, fim_random=8)
-                        
-                        try:
-                            documento = pega_texto_elemento(driver, 'span_vCCNNDOC', i)
-
-                            if documento == None: break
-
-                            documentos.append(documento.text.strip())
-                        except:
-                            continue
-
-                    if should_stop(session_id):
-                        print(f"[{session_id}] Stop solicitado. Encerrando automação sem fechar o driver.")
-                        break
-                    
-                    contagem = Counter(documentos)
-                    documentos_nao_pagos = [item for item, qtd in contagem.items() if qtd == 1]
-
-                    if documentos_nao_pagos:
-                        logs.append(f'{'=' * 60}\n')
-                        for doc in documentos_nao_pagos:
-                            if should_stop(session_id):
-                                break
-                            for i in range(1,15):
-                                if should_stop(session_id):
-                                    break
-                                if i == 1: espera_personalizada(inicio_random=4, fim_random=8)
-
-                                documento = pega_texto_elemento(driver, 'span_vCCNNDOC', i)
-
-                                if documento == None: break
-
-                                if doc == documento.text.strip():
-                                    lote = pega_texto_elemento(driver, 'span_vCCNNLOT', i)
-
-                                    if lote.text.strip() != '0':
-                                        valor = pega_texto_elemento(driver, 'span_vCCNVEVT', i)
-
-                                        valor_parseado = parse_valor(valor.text.strip())
-
-                                        if valor_parseado not in valores_extrato:
-                                            logs.append(f'❌ Documento não pago: {doc}')
-
-                        logs.append(f'{'=' * 60}\n')
-
-                        if should_stop(session_id):
-                            print(f"[{session_id}] Stop solicitado. Encerrando automação sem fechar o driver.")
-                            break
-                    
-                    
-                    for i in range(1,15):
-                        if should_stop(session_id):
-                            break
-                        if i == 1: espera_personalizada(inicio_random=4, fim_random=8)
+                # a grade do GeneXus (<Grid>ContainerTbl) existe mesmo sem linhas no dia
+                espera_personalizada(condicao=condicao_elemento((By.CSS_SELECTOR, 'table[id$="ContainerTbl"]')))
+                linhas_grid = snapshot_grid_cc_todas_paginas(driver)
+                pagina_atual = 0
 
-                        lote = pega_texto_elemento(driver, 'span_vCCNNLOT', i)
+                for linha in linhas_grid:
+                    linha['valor_parseado'] = parse_valor(linha['valor']) if linha['lote'] != '0' else None
 
-                        if lote == None: break
-
-                        if lote.text.strip() != '0':
-                            valor = pega_texto_elemento(driver, 'span_vCCNVEVT', i)
-
-                            valor_parseado = parse_valor(valor.text.strip())
-
-                            if valor_parseado in valores_extrato:
-                                lote.click()
-
-                                nomes, valores = espera_personalizada(
-                                    lambda: pega_valores_liquidos(driver, wdw, EC),
-                                    retorno=True
-                                )
-
-                                if nomes and valores:
-                                    for nome, valor in zip(nomes, valores):
-                                        dados[nome] = parse_valor(valor)
-                    
-                    if should_stop(session_id):
-                        print(f"[{session_id}] Stop solicitado. Encerrando automação sem fechar o driver.")
-                        break
-                else:
-                # ===================================
-                #   Pega os dados se for duas página
-                # ===================================
+                # Lotes pagos: abre cada um (na sua página) e lê os valores líquidos
+                for linha in linhas_grid:
                     if should_stop(session_id):
-                        print(f"[{session_id}] Stop solicitado. Encerrando automação sem fechar o driver.")
                         break
+                    if linha['lote'] == '0' or linha['valor_parseado'] not in valores_extrato:
+                        continue
 
-                    for p in range(2):
-                        if should_stop(session_id):
-                            break
-                        for i in range(1,16):
-                            if should_stop(session_id):
-                                break
-                            if i == 1: espera_personalizada(inicio_random=4, fim_random=8)
-
-                            try:
-                                documento = pega_texto_elemento(driver, 'span_vCCNNDOC', i)
-
-                                if documento == None: break
-
-                                documentos.append(documento.text.strip())
-                            except:
-                                continue
-                    
-                        if p == 0:
-                            tenta_passar_pagina(driver)
-                            espera_personalizada(inicio_random=4, fim_random=8)
-                        else:
-                            tenta_passar_pagina_atras(driver)
-                            espera_personalizada(inicio_random=4, fim_random=8)
-
-                    if should_stop(session_id):
-                        print(f"[{session_id}] Stop solicitado. Encerrando automação sem fechar o driver.")
-                        break
-
-                    contagem = Counter(documentos)
-                    documentos_nao_pagos = [item for item, qtd in contagem.items() if qtd == 1]
-
-                    quantas_pular = 2
-                    if lote_teste == '0':
-                        quantas_pular = 1
-
-                    for p in range(quantas_pular):
-                        if should_stop(session_id):
-                            break
-                        if documentos_nao_pagos:
-                            logs.append(f'{'=' * 60}\n')
-                            for doc in documentos_nao_pagos:
-                                if should_stop(session_id):
-                                    break
-                                for i in range(1,16):
-                                    if should_stop(session_id):
-                                        break
-                                    if i == 1: espera_personalizada(inicio_random=4, fim_random=8)
-
-                                    documento = pega_texto_elemento(driver, 'span_vCCNNDOC', i)
-
-                                    if documento == None: break
-
-                                    if doc == documento.text.strip():
-                                        lote = pega_texto_elemento(driver, 'span_vCCNNLOT', i)
-
-                                        if lote.text.strip() != '0':
-                                            valor = pega_texto_elemento(driver, 'span_vCCNVEVT', i)
-
-                                            valor_parseado = parse_valor(valor.text.strip())
-
-                                            if valor_parseado not in valores_extrato:
-                                                logs.append(f'❌ Documento não pago: {doc}')
-
-                            logs.append(f'{'=' * 60}\n')
-
-                            if should_stop(session_id):
-                                print(f"[{session_id}] Stop solicitado. Encerrando automação sem fechar o driver.")
-                                break
-                        
-                        for i in range(1,16):
-                            if should_stop(session_id):
-                                print(f"[{session_id}] Stop solicitado. Encerrando automação sem fechar o driver.")
-                                break
-                            if i == 1: espera_personalizada(inicio_random=4, fim_random=8)
-
-                            lote = pega_texto_elemento(driver, 'span_vCCNNLOT', i)
-
-                            if lote == None: break
-
-                            if lote.text.strip() != '0':
-                                valor = pega_texto_elemento(driver, 'span_vCCNVEVT', i)
-
-                                valor_parseado = parse_valor(valor.text.strip())
-
-                                if valor_parseado in valores_extrato:
-                                    lote.click()
-
-                                    nomes, valores = espera_personalizada(
-                                        lambda: pega_valores_liquidos(driver, wdw, EC),
-                                        retorno=True
-                                    )
-
-                                    if nomes and valores:
-                                        for nome, valor in zip(nomes, valores):
-                                            dados[nome] = parse_valor(valor)
-                        
-                        if should_stop(session_id):
-                            print(f"[{session_id}] Stop solicitado. Encerrando automação sem fechar o driver.")
-                            break
+                    pagina_atual = ir_para_pagina(driver, pagina_atual, linha['pagina'])
+                    # a linha precisa ser a mesma do snapshot: clicar em outra somaria o lote errado
+                    documento = pega_texto_elemento(driver, 'span_vCCNNDOC', linha['linha']).text.strip()
+                    if documento != linha['documento']:
+                        raise RuntimeError(
+                            f"Grade mudou: linha {linha['linha']} da página {linha['pagina'] + 1} tem o documento "
+                            f"{documento}, esperado {linha['documento']}."
+                        )
+                    # lote pago que não abre é erro da loja, não um lote a menos na conciliação
+                    lote = pega_texto_elemento(driver, 'span_vCCNNLOT', linha['linha'])
+                    lote.click()
+
+                    nomes, valores = espera_personalizada(
+                        lambda: _valores_liquidos_do_lote(driver, wdw),
+                        retorno=True,
+                        condicao=lambda d: len(d.window_handles) > 1  # popup do lote aberto
+                    )
 
-                        if quantas_pular == 2:
-                            if p == 0:
-                                tenta_passar_pagina(driver)
-                                espera_personalizada(inicio_random=4, fim_random=8)
-                            else:
-                                tenta_passar_pagina_atras(driver)
-                                espera_personalizada(inicio_random=4, fim_random=8)
+                    if nomes and valores:
+                        for nome, valor in zip(nomes, valores):
+                            dados[nome] = parse_valor(valor)
 
-            except Exception as e:
-                logs.append(f'🚫 Erro ao buscar os dados na loja de {user.nome_loja}.\nDescrição: {str(e)}')
-                
-                sair_ihs(driver)
-                continue
-
-            try:
                 if should_stop(session_id):
                     print(f"[{session_id}] Stop solicitado. Encerrando automação sem fechar o driver.")
                     break
-                # --- Busca dados no banco local ---
-                cur = busca_dados_db()
-
-                
-                titulos, duplicatas, valores, nomes, situacoes = [], [], [], [], []
 
-                for row in cur:
-                    if should_stop(session_id):
-                        print(f"[{session_id}] Stop solicitado. Encerrando automação sem fechar o driver.")
-                        break
-                    try:
-                        eh_compativel, log, valor_normalizado = compara_valores(
-                            nome_db=unidecode(row[-1].strip().upper()),
-                            valor_db=row[3],
-                            empresa=row[-2],
-                            titulo=row[1],
-                            dados_honda=dados
-                        )
-
-                        if not log or '❌ Nenhum cliente correspondente encontrado.' in log: continue
-
-                        logs.append(log)
-
-                        # Se for compatível, guarda para exportação
-                        if eh_compativel:
-                            valor_ajustado_real = f'{valor_normalizado:,.2f}'.replace('.', '_').replace(',', '.').replace('_', ',')
-                            titulos.append(row[1])
-                            duplicatas.append(row[2])
-                            valores.append(valor_ajustado_real)
-                            nomes.append(row[-1])
-                            if '❌' in log:
-                                situacoes.append('Incompatível por causa do valor')
-                            else:
-                                situacoes.append('Compatível')
-                    except TypeError:
-                        continue
             except Exception as e:
-                logs.append(f'🚫 Erro ao consultar dados no banco de dados.\nDescrição: {str(e)}')
+                logs.append(f'🚫 Erro ao buscar os dados na loja de {user.nome_loja}.\nDescrição: {str(e)}')
+                pipeline.gravar(f'Log da loja {user.nome_loja}', cria_arquivo_log, user.nome_loja, logs)
+                falhas.append(f'Loja {user.nome_loja}: erro ao buscar os dados ({e})')
                 
                 sair_ihs(driver)
                 continue
 
-            try:
-                if should_stop(session_id):
-                    print(f"[{session_id}] Stop solicitado. Encerrando automação sem fechar o driver.")
-                    break
-                # --- Monta DataFrame com os dados compatíveis ---
-                cabecalhos = ['TITULO', 'DUPLICATA', 'VALOR']
-                cabecalhos_excel = ['NOME', 'TITULO', 'DUPLICATA', 'VALOR', 'SITUACAO']
-                data = {
-                    cabecalhos[0]: titulos,
-                    cabecalhos[1]: duplicatas,
-                    cabecalhos[2]: valores
-                }
-                data_excel = {
-                    cabecalhos_excel[0]: nomes,
-                    cabecalhos_excel[1]: titulos,
-                    cabecalhos_excel[2]: duplicatas,
-                    cabecalhos_excel[3]: valores,
-                    cabecalhos_excel[4]: situacoes,
-                }
-                df = pandas.DataFrame(data, columns=cabecalhos)
-                df_excel = pandas.DataFrame(data_excel, columns=cabecalhos_excel)
-
-                hoje = datetime.now().strftime("%d-%m-%Y")
-
-                # Salva logs e CSV por loja
-                cria_arquivo_log(user.nome_loja, logs)
-                if should_stop(session_id):
-                    print(f"[{session_id}] Stop solicitado. Encerrando automação sem fechar o driver.")
-                    break
-                # Caminhos base usando Path (melhor que strings com \\)
-                base_dir = P(r"\\172.17.67.14\findev$\Automação - CDC")
-                csv_dir = base_dir / "Arquivos_csv"
-                excel_dir = base_dir / "Arquivos_excel"
-
-                # Monta os nomes de arquivos de forma segura e legível
-                arquivo_csv = csv_dir / f"consolidado_{user.nome_loja}_{hoje}.csv"
-                arquivo_excel = excel_dir / f"resumo_{user.nome_loja}_{hoje}.xlsx"
+            sair_ihs(driver)
 
-                # Salva os arquivos
-                df.to_csv(arquivo_csv, index=False, sep=';', encoding='utf-8-sig')
-                df_excel.to_excel(arquivo_excel, index=False)
-
-                sair_ihs(driver)
+            # --- Conciliação e arquivos em segundo plano: o navegador já segue para a próxima loja ---
+            pipeline.gravar(
+                f'Loja {user.nome_loja}', concilia_e_grava_loja, user.nome_loja, dados, linhas_grid,
+                valores_extrato, pipeline.futuro(user.nome_loja, 'titulos'), logs
+            )
 
-                espera_personalizada(inicio_random=2, fim_random=4)
-            except Exception as e:
-                logs.append(f'🚫 Erro ao gerar o arquivo .csv da loja {user.nome_loja}.\nDescrição: {str(e)}')
-                
-                sair_ihs(driver)
-                continue
+            espera_personalizada()
 
     finally:
+        for erro in pipeline.finalizar():
+            print(f'🚫 Erro ao gerar os arquivos. {erro}')
+            falhas.append(erro)
         finish_state(session_id)
+        print(f'⏱️ Esperas da execução: {finalizar_motor()}')
         
     # --- Finalização ---
     end_time = time()
@@ -1150,10 +1274,18 @@ def conciliacao_cdc_honda_main(session_id: str, lojas: str):
 
     print(f'Progama finalizado em {tempo_total_min}m')
 
+    if falhas:
+        resultado = (False, 'Conciliação do CDC Honda com falhas.\n' + '\n'.join(falhas))
+    else:
+        resultado = (True, 'Conciliação do CDC Hond realizado corretamente.')
+
+    if not registrar_indicador:
+        return resultado
+
     try:
         resposta = cria_indicador_de_tempo_execucao(start_time, end_time, 'CONCILIAÇÃO DB COM HONDA')
         print(resposta)
     except Exception as e:
         return False, f'Erro ao registrar indicador de tempo de execução.\nDescrição: {str(e)}'
 
-    return True, 'Conciliação do CDC Hond realizado corretamente.'
\ No newline at end of file
+    return resultado
\ No newline at end of file
@@ -10,6 +10,7 @@ from APP.Core.fidc_selenium_integration import SeleniumIntegration
 from APP.DTO.FIDC_DTO import LoginDTO
 from APP.Core.fidc_excel_integration import mapear_emps_para_nfs
 from APP.Core.fidc_logic import fazer_pesquisa_com_autocomplete, processar_nfs_com_limite_valor
+from APP.Core.rastreador_downloads import aguardar_download, renomear_download
 from APP.Config.fidc_trata_emp import TrataEmpresa
 
 logger = logging.getLogger(__name__)
@@ -141,31 +142,23 @@ class FIDCAutomation:
             
             self.logger.info(f"💾 Tentando download: {nome_arquivo}")
             
-            # Clica no botão de PDF
-            bot.driver.execute_script("arguments[0].click();", botao_pdf)
-            sleep(5)  # Aguarda o download
-            
-            # Verifica se o arquivo foi baixado
-            arquivos_baixados = [f for f in os.listdir(download_dir) if f.endswith('.pdf')]
-            
-            if arquivos_baixados:
-                # Encontra o arquivo mais recente
-                arquivo_mais_recente = max(
-                    [os.path.join(download_dir, f) for f in arquivos_baixados],
-                    key=os.path.getctime
+            # Clica no botão de PDF e espera o arquivo exato terminar de baixar
+            try:
+                caminho_baixado = aguardar_download(
+                    download_dir,
+                    lambda: bot.driver.execute_script("arguments[0].click();", botao_pdf),
+                    timeout=60,
+                    extensoes=('.pdf',),
                 )
-                
-                # Renomeia o arquivo
-                if arquivo_mais_recente != caminho_completo:
-                    if os.path.exists(caminho_completo):
-                        os.remove(caminho_completo)
-                    os.rename(arquivo_mais_recente, caminho_completo)
-                
-                self.logger.info(f"✅ Download realizado: {nome_arquivo}")
-                return caminho_completo
-            else:
-                self.logger.warning("⚠️ Nenhum arquivo PDF foi baixado")
+            except TimeoutError as e:
+                self.logger.warning(f"⚠️ Nenhum arquivo PDF foi baixado: {e}")
                 return None
+
+            # Renomeia o arquivo
+            renomear_download(caminho_baixado, nome_arquivo)
+
+            self.logger.info(f"✅ Download realizado: {nome_arquivo}")
+            return caminho_completo
                 
         except Exception as e:
             self.logger.error(f"❌ Erro no download do boleto: {e}")
@@ -221,7 +214,6 @@ class FIDCAutomation:
                         if caminho_arquivo:
                             arquivos_baixados.append(caminho_arquivo)
                             boletos_baixados += 1
-                            sleep(2)  # Pausa entre downloads
             
             # Calcular resultados
             eficiencia = (resultados_processamento['nfs_processadas'] / len(nfs_excel)) * 100 if nfs_excel else 0
@@ -364,6 +356,7 @@ class FIDCAutomation:
                     "total_arquivos_baixados": len(todos_arquivos_baixados),
                     "diretorio_download": download_dir,
                     "arquivos_baixados": todos_arquivos_baixados,
+                    "metricas_rede": bot.metricas.resumo(),
                     "status": "completed"
                 }
                 
@@ -382,6 +375,7 @@ class FIDCAutomation:
                 self.logger.info(f"   • Total Boletos Baixados: {resultado_final['total_boletos_baixados']}")
                 self.logger.info(f"   • Eficiência Geral: {resultado_final['eficiencia_geral']:.1f}%")
                 self.logger.info(f"   • Arquivos em: {download_dir}")
+                bot.metricas.registrar_resumo()
                 
                 return resultado_final
                 
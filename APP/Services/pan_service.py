@@ -4,10 +4,12 @@ from datetime import datetime, timedelta
 from pathlib import Path
 import re
 import logging
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from dataclasses import dataclass
-import oracledb
-import os
+
+from APP.Config.settings import Config, get_oracle_connection
+from APP.Core.excel_parser import ler_excel
+from APP.Core.pan_indice import CacheWorkbooks, IndiceValoresPan
 
 logger = logging.getLogger(__name__)
 
@@ -16,20 +18,25 @@ class ResultadoPan:
     titulo: str
     duplicata: str
     valor: float
+    estrategia: Optional[str] = None  # estratégia da busca em fin_titulo que encontrou o título
     
     def to_dict(self):
         return {
             "TITULO": self.titulo,
             "DUPLICATA": self.duplicata,
-            "VALOR": f"{self.valor:.2f}".replace('.', ',')
+            "VALOR": f"{self.valor:.2f}".replace('.', ','),
+            "ESTRATEGIA": self.estrategia
         }
 
 class PanService:
     def __init__(self):
         self.base_dir_rede = r"\\172.17.67.14\Ares Motos\controladoria\financeiro\06.CONTAS A RECEBER\11.RELATÓRIOS BANCO PAN"
+        self.indice = IndiceValoresPan(Config.PAN_INDICE_DIR, self._converter_valor_para_float)
     
     def processar_extrato(self, caminho_arquivo: str, data_param: str = None) -> List[ResultadoPan]:
 
+        # Cada relatório é lido uma vez por execução (índice + extração do chassi)
+        self.indice.cache = CacheWorkbooks(Config.PAN_CACHE_WORKBOOKS_MB * 1024 * 1024)
         try:
             print(f"\n" + "="*60)
             print("🔍 INICIANDO PROCESSAMENTO DO EXTRATO PAN")
@@ -49,35 +56,30 @@ class PanService:
             
             print(f"✅ Valores PAN encontrados: {valores_pan}")
             
-            # 3. Busca em diretório de rede
-            resultados = []
+            # 3. Busca em diretório de rede: uma varredura para todos os valores
+            arquivos_por_valor = self._buscar_arquivos_para_valores(valores_pan, self._obter_datas_para_busca(data_param))
+            pendentes = []
                 
             for valor in valores_pan:
                 print(f"\n💰 PROCESSANDO VALOR: R$ {valor:,.2f}")
                 
-                # Buscar o arquivo correspondente ao valor (PASSANDO A DATA)
-                arquivo_encontrado = self._buscar_arquivo_por_valor(valor, data_param)
+                achado = arquivos_por_valor.get(valor)
                 
-                if arquivo_encontrado:
-                    # 4. Extração de informações do relatório
-                    chassi = self._extrair_chassi_do_relatorio(arquivo_encontrado, valor)
+                if achado:
+                    # 4. Extração de informações do relatório (na linha em que o valor foi encontrado)
+                    chassi = self._extrair_chassi_do_relatorio(achado['arquivo'], valor, achado['local'])
                     
                     if chassi:
                         print(f"✅ Chassi encontrado: {chassi}")
-                        # Consulta no banco de dados
-                        resultado_banco = self._consultar_banco_dados(chassi, valor)
-                        
-                        if resultado_banco:
-                            resultados.append(resultado_banco)
-                            print(f"✅✅✅ VALOR PROCESSADO COM SUCESSO: R$ {valor:,.2f}")
-                            print(f"   📝 Dados: Título {resultado_banco.titulo}, Duplicata {resultado_banco.duplicata}")
-                        else:
-                            print(f"⚠️  Dados não encontrados no banco para chassi {chassi}")
+                        pendentes.append((chassi, valor))
                     else:
                         print(f"⚠️  Chassi não encontrado no relatório")
                 else:
                     print(f"❌ Arquivo não encontrado para o valor R$ {valor:,.2f}")
             
+            # 5. Consulta no banco de todos os chassis encontrados de uma vez
+            resultados = self._resolver_pendentes(pendentes)
+            
             # DEBUG FINAL
             print(f"\n" + "="*60)
             print("🔍 DEBUG FINAL - TODOS OS RESULTADOS COLETADOS")
@@ -94,6 +96,8 @@ class PanService:
         except Exception as e:
             print(f"❌ ERRO NO PROCESSAMENTO: {e}")
             raise
+        finally:
+            self.indice.cache = None
     
     def _ler_extrato_itaú(self, caminho_arquivo: str) -> pd.DataFrame:
         """
@@ -103,7 +107,7 @@ class PanService:
             print(f"📁 Lendo arquivo: {caminho_arquivo}")
             
             # Lê a partir da linha 10 (índice 9)
-            df = pd.read_excel(caminho_arquivo, header=9)
+            df = ler_excel(caminho_arquivo, header=9)
             
             # Remove linhas totalmente vazias
             df = df.dropna(how='all')
@@ -212,48 +216,40 @@ class PanService:
             # print(f"      💥 Erro na conversão de '{valor}': {e}")
             return None
         
-    def _buscar_arquivo_por_valor(self, valor: float, data_param: str = None) -> Optional[Path]:
-
-        datas_busca = self._obter_datas_para_busca(data_param)
+    def _buscar_arquivos_para_valores(self, valores: List[float], datas_busca: List[str]) -> Dict[float, Dict[str, Any]]:
+        """
+        Varre as pastas de data uma única vez para todos os valores do extrato.
+        Cada arquivo é aberto no máximo uma vez e a varredura termina assim que
+        todos os valores tiverem arquivo.
         
-        print(f"   🔍 Buscando arquivo para R$ {valor:,.2f}")
+        Retorna valor -> {'arquivo', 'origem', 'local'}; 'local' traz planilha,
+        linha e coluna quando o valor foi encontrado no conteúdo.
+        """
+        print(f"   🔍 Buscando arquivos para {len(valores)} valores")
         print(f"   📅 Datas: {datas_busca}")
         
+        pastas = []
         for data_str in datas_busca:
             pasta_data = Path(self.base_dir_rede) / data_str
-            
-            if not pasta_data.exists():
+            if pasta_data.exists():
+                pastas.append(pasta_data)
+            else:
                 print(f"   ❌ Pasta não existe: {data_str}")
-                continue
-            
-            print(f"   📂 Verificando pasta: {data_str}")
-            
-            # Busca arquivos Excel na pasta
-            arquivos = list(pasta_data.glob("*.xlsx")) + list(pasta_data.glob("*.xls"))
-            arquivos = [arq for arq in arquivos if not arq.name.startswith('~$')]
-            
-            print(f"   📄 Arquivos encontrados: {len(arquivos)}")
-            
-            for arquivo in arquivos:
-                print(f"      🔎 Analisando: {arquivo.name}")
-                
-                # Verifica se o valor está no nome do arquivo
-                if self._valor_no_nome_arquivo(arquivo, valor):
-                    print(f"      ✅ ENCONTRADO no nome do arquivo!")
-                    return arquivo
-                
-                # Ou verifica se o valor está no conteúdo do arquivo
-                if self._valor_no_conteudo_arquivo(arquivo, valor):
-                    print(f"      ✅ ENCONTRADO no conteúdo do arquivo!")
-                    return arquivo
-                
-                print(f"      ❌ Valor não encontrado em {arquivo.name}")
-            
-            print(f"   ❌ Nenhum arquivo encontrado na data {data_str}")
         
-        print(f"   ❌❌❌ NENHUM ARQUIVO ENCONTRADO PARA R$ {valor:,.2f}")
-        return None
+        encontrados = self.indice.varrer(pastas, valores)
         
+        for valor, achado in encontrados.items():
+            arquivo = achado['arquivo']
+            if achado['origem'] == 'nome':
+                print(f"      ✅ R$ {valor:,.2f} ENCONTRADO no nome do arquivo: {arquivo.parent.name}/{arquivo.name}")
+            else:
+                local = achado['local']
+                print(f"      ✅ R$ {valor:,.2f} ENCONTRADO no conteúdo do arquivo: {arquivo.parent.name}/{arquivo.name} "
+                      f"({local['planilha']} {local['coluna']}[{local['linha']}])")
+        
+        print(f"   📊 Arquivos localizados para {len(encontrados)} de {len(valores)} valores")
+        return encontrados
+    
     def _obter_datas_para_busca(self, data_param: str = None) -> List[str]:
 
         if data_param:
@@ -292,150 +288,51 @@ class PanService:
         print(f"   📅 DATAS AUTOMÁTICAS EXPANDIDAS: {datas}")
         return datas
     
-    def _valor_no_nome_arquivo(self, arquivo: Path, valor: float) -> bool:
-        """
-        Verifica se o valor está no nome do arquivo
-        """
-        try:
-            nome_sem_ext = arquivo.stem
-            
-            # Procura o valor formatado de diferentes formas
-            valor_int = int(round(valor))
-            patterns = [
-                f"{valor:.2f}".replace('.', ','),  # 1234,56
-                f"{valor:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),  # 1.234,56
-                str(valor_int),  # Parte inteira
-                f"{valor:.0f}",  # Sem decimais
-            ]
-            
-            for pattern in patterns:
-                if pattern in nome_sem_ext:
-                    return True
-            
-            return False
-        except:
-            return False
+    # Chassi (VIN): 17 caracteres alfanuméricos, sem I, O e Q
+    _RE_CHASSI = r'^[A-HJ-NPR-Z0-9]{17}$'
     
-    def _valor_no_conteudo_arquivo(self, arquivo: Path, valor: float, tolerancia: float = 0.10) -> bool:
+    def _extrair_chassi_do_relatorio(self, arquivo: Path, valor: float, local: Optional[Dict[str, Any]] = None) -> Optional[str]:
 
         try:
-            print(f"      📖 LENDO CONTEÚDO COMPLETO DO ARQUIVO: {arquivo.name}")
+            # Reaproveita a leitura feita na indexação (cache da execução)
+            planilhas = self.indice.ler_planilhas(arquivo)
             
-            # Tenta ler TODAS as planilhas do arquivo
-            try:
-                planilhas = pd.read_excel(arquivo, sheet_name=None, engine='openpyxl')
-                print(f"      📊 Total de planilhas: {len(planilhas)}")
-            except Exception as e:
-                print(f"      ❌ Erro ao ler todas as planilhas: {e}")
-                # Se falhar, tenta ler apenas a primeira planilha
-                try:
-                    df = pd.read_excel(arquivo, engine='openpyxl')
-                    planilhas = {'Sheet1': df}
-                    print(f"      📊 Lida apenas a primeira planilha")
-                except Exception as e2:
-                    print(f"      ❌❌ Erro crítico ao ler arquivo: {e2}")
-                    return False
-            
-            # BUSCA AGUESSIVA: Procura em TODAS as células de TODAS as planilhas
-            for sheet_name, df in planilhas.items():
-                if df.empty:
-                    continue
-                    
-                print(f"      🔍 Buscando na planilha '{sheet_name}': {df.shape[0]} linhas x {df.shape[1]} colunas")
-                
-                # Converte TODO o DataFrame para string para busca mais abrangente
-                df_str = df.astype(str)
-                
-                # Procura o valor em TODAS as células
-                encontrou = False
-                for col_idx, col_name in enumerate(df.columns):
-                    for row_idx in range(len(df)):
-                        valor_celula = df_str.iloc[row_idx, col_idx]
-                        
-                        # Pula células vazias
-                        if valor_celula in ['nan', 'None', 'NaT', '']:
-                            continue
-                        
-                        # Tenta extrair números da célula
-                        try:
-                            # Remove caracteres não numéricos (exceto ponto, vírgula e sinal)
-                            valor_limpo = re.sub(r'[^\d,\-\.]', '', valor_celula)
-                            
-                            if not valor_limpo:
-                                continue
-                                
-                            # Converte para float
-                            valor_float = self._converter_valor_para_float(valor_limpo)
-                            
-                            if valor_float is not None:
-                                # Verifica se é igual ao valor procurado (com tolerância)
-                                if abs(valor_float - valor) <= tolerancia:
-                                    print(f"      ✅✅✅ VALOR ENCONTRADO!")
-                                    print(f"         Planilha: {sheet_name}")
-                                    print(f"         Célula: {col_name}[{row_idx + 2}]")  # +2 porque Excel começa em 1 e tem header
-                                    print(f"         Valor na célula: {valor_celula}")
-                                    print(f"         Valor convertido: {valor_float}")
-                                    print(f"         Valor procurado: {valor}")
-                                    return True
-                        except:
-                            continue
-                
-                # Também procura o valor como string (formato brasileiro)
-                for col_idx, col_name in enumerate(df.columns):
-                    for row_idx in range(len(df)):
-                        valor_celula = df_str.iloc[row_idx, col_idx]
-                        
-                        # Procura o valor formatado como string
-                        valor_str_procurado = f"{valor:.2f}".replace('.', ',')  # 1234,56
-                        if valor_str_procurado in valor_celula:
-                            print(f"      ✅✅✅ VALOR ENCONTRADO COMO STRING!")
-                            print(f"         Planilha: {sheet_name}")
-                            print(f"         Célula: {col_name}[{row_idx + 2}]")
-                            print(f"         Conteúdo: {valor_celula}")
-                            print(f"         Padrão procurado: {valor_str_procurado}")
-                            return True
-            
-            print(f"      ❌ Valor NÃO encontrado no arquivo")
-            return False
+            # Estratégia 0: chassi na mesma linha em que o valor foi encontrado
+            if local and local.get('planilha') in planilhas:
+                chassi = self._chassi_na_linha(planilhas[local['planilha']], local['linha'] - 2)  # -2: header + base 1 do Excel
+                if chassi:
+                    print(f"      ✅ Chassi encontrado na linha {local['linha']} do valor: {chassi}")
+                    return chassi
             
-        except Exception as e:
-            print(f"      ❌❌ ERRO NA BUSCA NO CONTEÚDO: {e}")
-            return False
-    
-    def _extrair_chassi_do_relatorio(self, arquivo: Path, valor: float) -> Optional[str]:
-
-        try:
-            df = pd.read_excel(arquivo)
+            df = next(iter(planilhas.values()))
             
             # Estratégia 1: Procurar coluna que contenha "chassi"
             for col in df.columns:
                 if 'chassi' in str(col).lower():
                     # Retorna o primeiro chassi válido encontrado
-                    for chassi in df[col].dropna():
-                        chassi_str = str(chassi).strip()
-                        if len(chassi_str) == 17:  # Chassi normalmente tem 17 caracteres
-                            print(f"      ✅ Chassi encontrado na coluna '{col}': {chassi_str}")
-                            return chassi_str
+                    candidatos = df[col].dropna().astype(str).str.strip()
+                    candidatos = candidatos[candidatos.str.len() == 17]  # Chassi normalmente tem 17 caracteres
+                    if not candidatos.empty:
+                        print(f"      ✅ Chassi encontrado na coluna '{col}': {candidatos.iloc[0]}")
+                        return candidatos.iloc[0]
             
             # Estratégia 2: Se não encontrar coluna "chassi", usar lógica específica
             if len(df.columns) >= 8:
                 # Supondo que o chassi está na coluna H (índice 7)
-                coluna_chassi = df.columns[7]
-                for chassi in df[coluna_chassi].dropna():
-                    chassi_str = str(chassi).strip()
-                    if len(chassi_str) == 17:
-                        print(f"      ✅ Chassi encontrado na coluna fixa H: {chassi_str}")
-                        return chassi_str
+                candidatos = df.iloc[:, 7].dropna().astype(str).str.strip()
+                candidatos = candidatos[candidatos.str.len() == 17]
+                if not candidatos.empty:
+                    print(f"      ✅ Chassi encontrado na coluna fixa H: {candidatos.iloc[0]}")
+                    return candidatos.iloc[0]
             
             # Estratégia 3: Procurar em qualquer coluna por valores que parecem chassis
             print(f"      🔍 Procurando chassi em todas as colunas...")
-            for col in df.columns:
-                for valor_celula in df[col].dropna():
-                    valor_str = str(valor_celula).strip()
-                    # Verifica se parece um chassi (17 caracteres alfanuméricos)
-                    if len(valor_str) == 17 and valor_str.isalnum():
-                        print(f"      ✅ Possível chassi encontrado na coluna '{col}': {valor_str}")
-                        return valor_str
+            if len(df.columns):
+                empilhado = pd.concat([df[col].dropna().astype(str).str.strip() for col in df.columns], ignore_index=True)
+                candidatos = empilhado[empilhado.str.match(self._RE_CHASSI, case=False)]
+                if not candidatos.empty:
+                    print(f"      ✅ Possível chassi encontrado: {candidatos.iloc[0]}")
+                    return candidatos.iloc[0]
             
             print(f"      ❌ Nenhum chassi válido encontrado no arquivo")
             return None
@@ -444,145 +341,198 @@ class PanService:
             print(f"❌ Erro ao extrair chassi: {e}")
             return None
     
+    def _chassi_na_linha(self, df: pd.DataFrame, linha_idx: int) -> Optional[str]:
+        """
+        Procura o chassi só na linha do valor: primeiro na coluna 'chassi',
+        depois na coluna H e por fim em qualquer coluna da linha.
+        """
+        if linha_idx < 0 or linha_idx >= len(df):
+            return None
+        
+        linha = df.iloc[linha_idx].dropna().astype(str).str.strip()
+        linha = linha[linha.str.match(self._RE_CHASSI, case=False)]
+        if linha.empty:
+            return None
+        
+        for col in linha.index:
+            if 'chassi' in str(col).lower():
+                return linha[col]
+        if len(df.columns) >= 8 and df.columns[7] in linha.index:
+            return linha[df.columns[7]]
+        return linha.iloc[0]
+    
+    def _resolver_pendentes(self, pendentes: List[Tuple[str, float]]) -> List[ResultadoPan]:
+        """
+        Resolve no banco todos os pares (chassi, valor) da execução de uma vez
+        e devolve os resultados na ordem dos valores do extrato.
+        """
+        if not pendentes:
+            return []
+        
+        print(f"\n🗄️  CONSULTANDO BANCO EM LOTE: {len(pendentes)} chassis")
+        resolvidos = self._consultar_banco_dados_lote(pendentes)
+        
+        resultados = []
+        for chassi, valor in pendentes:
+            resultado_banco = resolvidos.get((chassi, valor))
+            if resultado_banco:
+                resultados.append(resultado_banco)
+                print(f"✅✅✅ VALOR PROCESSADO COM SUCESSO: R$ {valor:,.2f}")
+                print(f"   📝 Dados: Título {resultado_banco.titulo}, Duplicata {resultado_banco.duplicata}")
+            else:
+                print(f"⚠️  Dados não encontrados no banco para chassi {chassi}")
+        return resultados
+    
     def _consultar_banco_dados(self, chassi: str, valor: float) -> Optional[ResultadoPan]:
-
+        """Consulta de um único par (chassi, valor); mantida para compatibilidade"""
+        return self._consultar_banco_dados_lote([(chassi, valor)]).get((chassi, valor))
+    
+    def _consultar_banco_dados_lote(self, pares: List[Tuple[str, float]]) -> Dict[Tuple[str, float], ResultadoPan]:
+        """
+        Resolve chassi -> cliente -> título para vários pares com uma única conexão.
+        
+        Os clientes de todos os chassis vêm em uma consulta e o melhor título
+        de cada par sai de uma única consulta ranqueada em fin_titulo.
+        """
+        resolvidos: Dict[Tuple[str, float], ResultadoPan] = {}
+        pares = list(dict.fromkeys(pares))
+        if not pares:
+            return resolvidos
+        
         conn = None
         try:
-            # Configuração da conexão Oracle
-            user_oracle = os.getenv('USER_ORACLE')
-            password = os.getenv('PASSWORD_ORACLE')
-            dsn = os.getenv('DSN')
-
-            if not all([user_oracle, password, dsn]):
+            if not all([Config.USER_ORACLE, Config.PASSWORD_ORACLE, Config.DSN]):
                 print("❌ Variáveis de ambiente Oracle não configuradas")
-                return None
-
-            # Estabelece conexão
-            try:
-                oracledb.init_oracle_client(lib_dir=r'C:\instantclient')
-            except:
-                pass  # Client já inicializado
-
-            conn = oracledb.connect(
-                user=user_oracle,
-                password=password,
-                dsn=dsn
-            )
-
+                return resolvidos
+            
+            conn = get_oracle_connection()
             cur = conn.cursor()
-
-            # 1. Buscar cliente pelo chassi
-            cur.execute(
-                "SELECT CLIENTE FROM ofi_ficha_proprietario WHERE chassi = :chassi AND PROPRIETARIO_ATUAL = 'S'",
-                {"chassi": chassi}
-            )
-            resultado_cliente = cur.fetchone()
-
-            if not resultado_cliente:
-                print(f"❌ Cliente não encontrado para chassi: {chassi}")
-                
-                # TENTATIVA ALTERNATIVA: Buscar por qualquer proprietário (não só o atual)
-                cur.execute(
-                    "SELECT CLIENTE FROM ofi_ficha_proprietario WHERE chassi = :chassi",
-                    {"chassi": chassi}
-                )
-                resultado_cliente = cur.fetchone()
-                
-                if not resultado_cliente:
-                    print(f"❌❌ Chassi não encontrado em nenhum proprietário: {chassi}")
-                    return None
-                
-                print(f"⚠️  Cliente encontrado (proprietário não atual): {resultado_cliente[0]}")
-
-            cliente = resultado_cliente[0]
-            print(f"✅ Cliente encontrado: {cliente}")
-
-            # 2. Buscar título/duplicata - ESTRATÉGIA MELHORADA
-            resultados_titulos = []
             
-            # PRIMEIRO: Busca exata com duplicata diferente de '00'
-            cur.execute(
-                """SELECT TITULO, DUPLICATA, VAL_TITULO 
-                FROM fin_titulo 
-                WHERE CLIENTE = :cliente 
-                AND TIPO = 'CR'
-                AND ROUND(VAL_TITULO, 2) = ROUND(:valor, 2)
-                AND DUPLICATA != '00'
-                ORDER BY DUPLICATA""",
-                {"cliente": cliente, "valor": valor}
-            )
-            resultados_titulos.extend(cur.fetchall())
-
-            # SEGUNDO: Se não encontrou, busca qualquer duplicata
-            if not resultados_titulos:
-                cur.execute(
-                    """SELECT TITULO, DUPLICATA, VAL_TITULO 
-                    FROM fin_titulo 
-                    WHERE CLIENTE = :cliente 
-                    AND ROUND(VAL_TITULO, 2) = ROUND(:valor, 2)
-                    ORDER BY CASE WHEN DUPLICATA != '00' THEN 1 ELSE 2 END, DUPLICATA""",
-                    {"cliente": cliente, "valor": valor}
-                )
-                resultados_titulos.extend(cur.fetchall())
-
-            # TERCEIRO: Se ainda não encontrou, busca com tolerância de 1 real
-            if not resultados_titulos:
-                cur.execute(
-                    """SELECT TITULO, DUPLICATA, VAL_TITULO 
-                    FROM fin_titulo 
-                    WHERE CLIENTE = :cliente 
-                    AND ABS(VAL_TITULO - :valor) <= 1.00
-                    ORDER BY ABS(VAL_TITULO - :valor), 
-                                CASE WHEN DUPLICATA != '00' THEN 1 ELSE 2 END, 
-                                DUPLICATA""",
-                    {"cliente": cliente, "valor": valor}
-                )
-                resultados_titulos.extend(cur.fetchall())
-
-            # QUARTA: Se ainda não encontrou, busca qualquer título do cliente (último recurso)
-            if not resultados_titulos:
-                cur.execute(
-                    """SELECT TITULO, DUPLICATA, VAL_TITULO 
-                    FROM fin_titulo 
-                    WHERE CLIENTE = :cliente 
-                    AND TIPO = 'CR'
-                    ORDER BY DATA_EMISSAO DESC, 
-                                CASE WHEN DUPLICATA != '00' THEN 1 ELSE 2 END
-                    FETCH FIRST 1 ROWS ONLY""",
-                    {"cliente": cliente}
-                )
-                resultados_titulos.extend(cur.fetchall())
-
-            if resultados_titulos:
-                # Pega o primeiro resultado (mais relevante)
-                titulo, duplicata, val_titulo = resultados_titulos[0]
-                
-                # Log detalhado
-                if len(resultados_titulos) > 1:
-                    print(f"📊 Múltiplos títulos encontrados ({len(resultados_titulos)}), usando o mais relevante")
-                
-                print(f"✅✅✅ DADOS ENCONTRADOS NO BANCO: Título {titulo}, Duplicata {duplicata}")
-                return ResultadoPan(
+            # 1. Buscar clientes de todos os chassis (proprietário atual primeiro)
+            clientes = self._buscar_clientes_por_chassi(cur, list(dict.fromkeys(c for c, _ in pares)))
+            
+            alvos = []
+            for chassi, valor in pares:
+                if chassi not in clientes:
+                    print(f"❌❌ Chassi não encontrado em nenhum proprietário: {chassi}")
+                    continue
+                cliente, atual = clientes[chassi]
+                if not atual:
+                    print(f"⚠️  Cliente encontrado (proprietário não atual): {cliente}")
+                print(f"✅ Cliente encontrado: {cliente} (chassi {chassi})")
+                alvos.append((chassi, valor, cliente))
+            
+            # 2. Uma consulta ranqueada em fin_titulo escolhe o melhor título de cada par
+            encontrados = self._buscar_titulos_ranqueados(cur, alvos)
+            for idx, (titulo, duplicata, val_titulo, match_rank) in encontrados.items():
+                chassi, valor, _ = alvos[idx]
+                estrategia = self.ESTRATEGIAS_TITULO.get(match_rank)
+                print(f"✅✅✅ DADOS ENCONTRADOS NO BANCO: Título {titulo}, Duplicata {duplicata} ({estrategia})")
+                resolvidos[(chassi, valor)] = ResultadoPan(
                     titulo=str(titulo),
                     duplicata=str(duplicata),
-                    valor=float(val_titulo)
+                    valor=float(val_titulo),
+                    estrategia=estrategia
                 )
-
-            print(f"❌ Nenhum título encontrado no banco para cliente {cliente}, valor {valor}")
-            return None
-
+            pendentes = [idx for idx in range(len(alvos)) if idx not in encontrados]
+            
+            for idx in pendentes:
+                _, valor, cliente = alvos[idx]
+                print(f"❌ Nenhum título encontrado no banco para cliente {cliente}, valor {valor}")
+            
+            return resolvidos
+        
         except Exception as e:
             print(f"❌ Erro na consulta ao banco: {e}")
-            return None
+            return resolvidos
         finally:
             if conn:
                 conn.close()
     
+    # Estratégia de cada match_rank da consulta de títulos (ordem de prioridade)
+    ESTRATEGIAS_TITULO = {
+        1: "exato_duplicata",   # TIPO CR, valor exato, duplicata diferente de '00'
+        2: "exato",             # valor exato, qualquer duplicata
+        3: "tolerancia_1_real", # diferença de até R$ 1,00
+        4: "ultimo_titulo_cr",  # último título CR do cliente (último recurso)
+    }
+    
+    # Limite de pares por instrução (cada par usa binds na CTE)
+    _TAMANHO_LOTE = 200
+    
+    _SQL_TITULOS_RANQUEADOS = """
+        WITH alvos AS ({alvos}),
+        candidatos AS (
+            SELECT a.IDX, t.TITULO, t.DUPLICATA, t.VAL_TITULO, t.DATA_EMISSAO,
+                   ABS(t.VAL_TITULO - a.VALOR) AS DIFERENCA,
+                   CASE
+                       WHEN t.TIPO = 'CR' AND ROUND(t.VAL_TITULO, 2) = ROUND(a.VALOR, 2) AND t.DUPLICATA != '00' THEN 1
+                       WHEN ROUND(t.VAL_TITULO, 2) = ROUND(a.VALOR, 2) THEN 2
+                       WHEN ABS(t.VAL_TITULO - a.VALOR) <= 1.00 THEN 3
+                       WHEN t.TIPO = 'CR' THEN 4
+                   END AS MATCH_RANK
+            FROM alvos a
+            JOIN fin_titulo t ON t.CLIENTE = a.CLIENTE
+        ),
+        ranqueados AS (
+            SELECT c.IDX, c.TITULO, c.DUPLICATA, c.VAL_TITULO, c.MATCH_RANK,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY c.IDX
+                       ORDER BY c.MATCH_RANK,
+                                CASE WHEN c.MATCH_RANK = 3 THEN c.DIFERENCA END,
+                                CASE WHEN c.MATCH_RANK = 4 THEN c.DATA_EMISSAO END DESC,
+                                CASE WHEN c.DUPLICATA != '00' THEN 1 ELSE 2 END,
+                                c.DUPLICATA
+                   ) AS RN
+            FROM candidatos c
+            WHERE c.MATCH_RANK IS NOT NULL
+        )
+        SELECT IDX, TITULO, DUPLICATA, VAL_TITULO, MATCH_RANK
+        FROM ranqueados
+        WHERE RN = 1"""
+    
+    def _buscar_clientes_por_chassi(self, cur, chassis: List[str]) -> Dict[str, Tuple[Any, bool]]:
+        """Retorna chassi -> (cliente, proprietário atual?) usando uma consulta por lote"""
+        clientes: Dict[str, Tuple[Any, bool]] = {}
+        for inicio in range(0, len(chassis), self._TAMANHO_LOTE):
+            lote = chassis[inicio:inicio + self._TAMANHO_LOTE]
+            binds = {f"c{i}": chassi for i, chassi in enumerate(lote)}
+            cur.execute(
+                f"""SELECT CHASSI, CLIENTE, PROPRIETARIO_ATUAL
+                FROM ofi_ficha_proprietario
+                WHERE CHASSI IN ({', '.join(':' + nome for nome in binds)})""",
+                binds
+            )
+            for chassi, cliente, atual in cur.fetchall():
+                atual = atual == 'S'
+                if chassi not in clientes or (atual and not clientes[chassi][1]):
+                    clientes[chassi] = (cliente, atual)
+        return clientes
+    
+    def _buscar_titulos_ranqueados(self, cur, alvos: List[Tuple[str, float, Any]]) -> Dict[int, Tuple[Any, Any, Any, int]]:
+        """
+        Avalia as quatro estratégias de busca em fin_titulo numa única instrução.
+        Devolve idx do alvo -> (titulo, duplicata, val_titulo, match_rank) do melhor título.
+        """
+        encontrados: Dict[int, Tuple[Any, Any, Any, int]] = {}
+        for inicio in range(0, len(alvos), self._TAMANHO_LOTE):
+            selects = []
+            binds = {}
+            for n, idx in enumerate(range(inicio, min(inicio + self._TAMANHO_LOTE, len(alvos)))):
+                selects.append(f"SELECT {idx} AS IDX, :cl{n} AS CLIENTE, CAST(:v{n} AS NUMBER) AS VALOR FROM dual")
+                binds[f"cl{n}"] = alvos[idx][2]
+                binds[f"v{n}"] = alvos[idx][1]
+            
+            cur.execute(self._SQL_TITULOS_RANQUEADOS.format(alvos=' UNION ALL '.join(selects)), binds)
+            for idx, titulo, duplicata, val_titulo, match_rank in cur.fetchall():
+                encontrados[int(idx)] = (titulo, duplicata, val_titulo, int(match_rank))
+        return encontrados
+    
     def _debug_conteudo_arquivo(self, arquivo: Path, max_linhas: int = 5):
 
         try:
             print(f"\n      🧪 DEBUG DO ARQUIVO: {arquivo.name}")
-            planilhas = pd.read_excel(arquivo, sheet_name=None, engine='openpyxl')
+            planilhas = ler_excel(arquivo, sheet_name=None)
             
             for sheet_name, df in planilhas.items():
                 if df.empty:
@@ -602,6 +552,8 @@ class PanService:
 
     def processar_extrato_com_data(self, caminho_arquivo: str, data_busca: str) -> List[ResultadoPan]:
       
+        # Cada relatório é lido uma vez por execução (índice + extração do chassi)
+        self.indice.cache = CacheWorkbooks(Config.PAN_CACHE_WORKBOOKS_MB * 1024 * 1024)
         try:
             print(f"\n" + "="*60)
             print(f"🔍 INICIANDO PROCESSAMENTO DO EXTRATO PAN")
@@ -620,34 +572,29 @@ class PanService:
             
             print(f"✅ Valores PAN encontrados: {valores_pan}")
             
-            # 3. Busca em diretório de rede COM DATA ESPECÍFICA
-            resultados = []
+            # 3. Busca em diretório de rede COM DATA ESPECÍFICA: uma varredura para todos os valores
+            arquivos_por_valor = self._buscar_arquivos_para_valores(valores_pan, [data_busca])
+            pendentes = []
             
             for valor in valores_pan:
                 print(f"\n💰 PROCESSANDO VALOR: R$ {valor:,.2f}")
                 
-                # Buscar o arquivo correspondente ao valor NA DATA ESPECÍFICA
-                arquivo_encontrado = self._buscar_arquivo_por_valor_com_data(valor, data_busca)
+                achado = arquivos_por_valor.get(valor)
                 
-                if arquivo_encontrado:
-                    # 4. Extração de informações do relatório
-                    chassi = self._extrair_chassi_do_relatorio(arquivo_encontrado, valor)
+                if achado:
+                    # 4. Extração de informações do relatório (na linha em que o valor foi encontrado)
+                    chassi = self._extrair_chassi_do_relatorio(achado['arquivo'], valor, achado['local'])
                     
                     if chassi:
                         print(f"✅ Chassi encontrado: {chassi}")
-                        # Consulta no banco de dados
-                        resultado_banco = self._consultar_banco_dados(chassi, valor)
-                        
-                        if resultado_banco:
-                            resultados.append(resultado_banco)
-                            print(f"✅✅✅ VALOR PROCESSADO COM SUCESSO: R$ {valor:,.2f}")
-                            print(f"   📝 Dados: Título {resultado_banco.titulo}, Duplicata {resultado_banco.duplicata}")
-                        else:
-                            print(f"⚠️  Dados não encontrados no banco para chassi {chassi}")
+                        pendentes.append((chassi, valor))
                     else:
                         print(f"⚠️  Chassi não encontrado no relatório")
                 else:
                     print(f"❌ Arquivo não encontrado para o valor R$ {valor:,.2f} na data {data_busca}")
+            
+            # 5. Consulta no banco de todos os chassis encontrados de uma vez
+            resultados = self._resolver_pendentes(pendentes)
 
             # DEBUG FINAL
             print(f"\n" + "="*60)
@@ -665,40 +612,5 @@ class PanService:
         except Exception as e:
             print(f"❌ ERRO NO PROCESSAMENTO: {e}")
             raise
-    
-    def _buscar_arquivo_por_valor_com_data(self, valor: float, data_busca: str) -> Optional[Path]:
-
-        print(f"   🔍 Buscando arquivo para R$ {valor:,.2f}")
-        print(f"   📅 DATA ESPECÍFICA: {data_busca}")
-        
-        pasta_data = Path(self.base_dir_rede) / data_busca
-        
-        if not pasta_data.exists():
-            print(f"   ❌ Pasta não existe: {data_busca}")
-            return None
-        
-        print(f"   📂 Verificando pasta: {data_busca}")
-        
-        # Busca arquivos Excel na pasta
-        arquivos = list(pasta_data.glob("*.xlsx")) + list(pasta_data.glob("*.xls"))
-        arquivos = [arq for arq in arquivos if not arq.name.startswith('~$')]
-        
-        print(f"   📄 Arquivos encontrados: {len(arquivos)}")
-        
-        for arquivo in arquivos:
-            print(f"      🔎 Analisando: {arquivo.name}")
-            
-            # Verifica se o valor está no nome do arquivo
-            if self._valor_no_nome_arquivo(arquivo, valor):
-                print(f"      ✅ ENCONTRADO no nome do arquivo!")
-                return arquivo
-            
-            # Ou verifica se o valor está no conteúdo do arquivo
-            if self._valor_no_conteudo_arquivo(arquivo, valor):
-                print(f"      ✅ ENCONTRADO no conteúdo do arquivo!")
-                return arquivo
-            
-            print(f"      ❌ Valor não encontrado em {arquivo.name}")
-        
-        print(f"   ❌❌❌ NENHUM ARQUIVO ENCONTRADO PARA R$ {valor:,.2f} na data {data_busca}")
-        return None
\ No newline at end of file
+        finally:
+            self.indice.cache = None
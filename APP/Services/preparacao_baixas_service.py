@@ -7,6 +7,8 @@ from pathlib import Path as P
 from datetime import datetime
 from time import sleep
 import pandas as pd
+from APP.Core.excel_parser import ler_excel
+from APP.Config.lojas_linx import MAPA_EMPRESA
 import pdfplumber
 import oracledb
 import random
@@ -140,14 +142,6 @@ def extract_text_pdfplumber(nome_loja, pdf_path):
         return False, f'Erro ao extrair os dados do pdf.\nDescrição: {str(e)}'
 
 
-# mapeia loja -> (banco, empresa)
-MAPA_EMPRESA = {
-    "JUAZEIRO":     (21018, 2),
-    "TERRA_SANTA":  (21018, 2),
-    "CRATO":        (51017, 5),
-    "ARACATI":      (31049, 3),
-}
-
 def verifica_dados_linx(loja: str, dir_path: str | os.PathLike):
     try:
         loja_u = loja.upper()
@@ -163,7 +157,7 @@ def verifica_dados_linx(loja: str, dir_path: str | os.PathLike):
             return False, f"Arquivo não encontrado: {arquivo_origem}"
 
         # 2) leia o Excel do ARQUIVO, não da pasta
-        df_src = pd.read_excel(arquivo_origem, engine="openpyxl")
+        df_src = ler_excel(arquivo_origem, usecols=["NUMERO NOTA", "VALOR"])
 
         # 3) prepare colunas de interesse
         numeros_notas_honda = df_src['NUMERO NOTA'].astype(str)
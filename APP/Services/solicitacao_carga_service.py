@@ -3,7 +3,10 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.by import By
 from APP.DTO.ihs_dto import User
+from APP.Core.excel_parser import ler_excel
 from APP.Config.ihs_config import _ensure_driver, start_state, should_stop, finish_state
+from APP.Core.motor_espera import espera_personalizada, iniciar_motor, finalizar_motor, condicao_frame
+from APP.Core.execucao_paralela import executar_lojas_em_paralelo, resumir_resultados
 from APP.Core.solicitacao_carga_core import Path
 from openpyxl import load_workbook, Workbook
 from typing import Dict, List
@@ -11,7 +14,6 @@ from datetime import datetime
 from time import sleep, time
 import pandas as pd
 import logging
-import random
 import os
 
 
@@ -32,9 +34,7 @@ def preencher_campo(driver, value, texto):
     campo = driver.find_element(By.CSS_SELECTOR, value)
     campo.click()
     espera_personalizada(
-        lambda: campo.send_keys(texto),
-        inicio_random=2,
-        fim_random=4
+        lambda: campo.send_keys(texto)
     )
 
 
@@ -50,9 +50,7 @@ def clicar_em_um_botao(driver, value):
         None
     """
     espera_personalizada(
-        lambda: driver.find_element(By.CSS_SELECTOR, value).send_keys(Keys.ENTER),
-        inicio_random=2,
-        fim_random=4
+        lambda: driver.find_element(By.CSS_SELECTOR, value).send_keys(Keys.ENTER)
     )
 
 
@@ -181,39 +179,6 @@ def cria_indicador_de_tempo_execucao(
         raise PermissionError(f"Feche o arquivo '{arquivo}' no Excel e tente novamente.")
 
 
-def espera_personalizada(*acoes, retorno=False, inicio_random=3, fim_random=8):
-    """
-    Executa uma ou mais ações com tentativas repetidas até que tenham sucesso. Caso tenha retorno, adicione a função que deve receber retorno como a última.
-
-    Parâmetros:
-        *acoes (callable): Funções ou lambdas que executam ações.
-        **retorno (bool): Variável boolena para verificar se é necessário retornar algo.
-
-    Retorno:
-        None
-    """
-    contador = 0
-    while True:
-        try:
-            # espera aleatória para simular comportamento humano
-            sleep(random.randint(inicio_random, fim_random))
-
-            # executa todas menos a última
-            for acao in acoes[:-1] if retorno else acoes:
-                acao()
-
-            # se tiver retorno, executa a última e devolve
-            if retorno:
-                return acoes[-1]()
-            
-            break
-        except Exception:
-            if contador == 5:
-                break
-            contador += 1
-            continue
-
-
 def sair_ihs(driver, value):
     driver.switch_to.default_content()
     driver.find_element(By.CSS_SELECTOR, value).click()
@@ -274,7 +239,8 @@ def tela(lojas: str) -> Dict[str, List[str]]:
         dict[str, list[str]]
     """
     # 1) Lê o Excel
-    df = pd.read_excel(ARQ, dtype=str)  # dtype=str evita NaN -> float
+    # Planilha de senhas: cache só em memória, nunca gravado no disco local
+    df = ler_excel(ARQ, persistir=False, dtype=str)  # dtype=str evita NaN -> float
     esperadas = {"LOJAS", "CODIGOS", "USUARIOS", "SENHAS"}
     if not esperadas.issubset(set(df.columns)):
         raise ValueError(f"Colunas esperadas: {esperadas} | Encontradas: {set(df.columns)}")
@@ -325,7 +291,36 @@ def tela(lojas: str) -> Dict[str, List[str]]:
 
     return {"LOJAS": lojas_out, "CODIGOS": codigos, "USUARIOS": usuarios, "SENHAS": senhas}
 
-def solicitacao_carga_main(session_id: str, lojas):
+def solicitacao_carga_paralelo(session_id: str, lojas, max_paralelo: int):
+    """
+    Solicita a carga com uma loja por navegador, até `max_paralelo` ao mesmo tempo.
+
+    Retorno:
+        tuple: (ok, mensagem com o resultado de cada loja)
+    """
+    try:
+        usuarios = get_all_users(lojas)
+    except Exception as e:
+        return False, f'Erro ao buscar os usuários.\nDescrição: {str(e)}'
+
+    start_state(session_id)
+    try:
+        resultados = executar_lojas_em_paralelo(
+            session_id,
+            [user.nome_loja for user in usuarios],
+            lambda sessao, loja, pasta: solicitacao_carga_main(sessao, loja, pasta_downloads=pasta),
+            portal='IHS',
+            max_paralelo=max_paralelo
+        )
+    finally:
+        finish_state(session_id)
+
+    return resumir_resultados(resultados)
+
+def solicitacao_carga_main(session_id: str, lojas, *, paralelo: int = 1, pasta_downloads=None):
+    if paralelo > 1:
+        return solicitacao_carga_paralelo(session_id, lojas, paralelo)
+
         # Data atual formatada
     hoje = datetime.today().strftime("%Y-%m-%d")
 
@@ -349,7 +344,8 @@ def solicitacao_carga_main(session_id: str, lojas):
     path = Path()
 
     try:
-        driver, wdw, PASTA_DOWNLOADS = _ensure_driver(session_id=session_id)
+        driver, wdw, PASTA_DOWNLOADS = _ensure_driver(session_id=session_id, pasta_downlod=pasta_downloads, automacao='solicitacao_carga')
+        iniciar_motor(driver, tentativas=6)
         start_state(session_id)
 
         # Busca todos os usuários cadastrados
@@ -367,13 +363,13 @@ def solicitacao_carga_main(session_id: str, lojas):
                 # ===============================
                 #             LOGIN
                 # ===============================
-                espera_personalizada(inicio_random=1,fim_random=3)
+                espera_personalizada()
                 driver.find_element(By.CSS_SELECTOR, path.Login.campo_code).send_keys(user.codigo)
-                espera_personalizada(inicio_random=1,fim_random=3)
+                espera_personalizada()
                 driver.find_element(By.CSS_SELECTOR, path.Login.campo_user).send_keys(user.usuario)
-                espera_personalizada(inicio_random=1,fim_random=3)
+                espera_personalizada()
                 driver.find_element(By.CSS_SELECTOR, path.Login.campo_password).send_keys(user.senha)
-                espera_personalizada(inicio_random=1,fim_random=3)
+                espera_personalizada()
 
                 submit = wdw.until(
                     EC.element_to_be_clickable((By.CSS_SELECTOR, path.Login.btn_entrar))
@@ -407,13 +403,13 @@ def solicitacao_carga_main(session_id: str, lojas):
                     pass
                 
                 clica_na_aba(wdw, path.MenuPrincipal.aba_consorcio, 'consórcio')  # Consórcio
-                espera_personalizada(inicio_random=1, fim_random=3)
+                espera_personalizada()
                 clica_na_aba(wdw, path.MenuPrincipal.aba_formularios_download, 'formulários e download')
 
-                espera_personalizada(inicio_random=1, fim_random=3)
+                espera_personalizada()
                 clica_na_aba(wdw, path.MenuPrincipal.aba_consorcio_side_menu, 'consórcio - formulários/download')
 
-                espera_personalizada(inicio_random=1, fim_random=3)
+                espera_personalizada()
                 clica_na_aba(wdw, path.MenuPrincipal.aba_solicitacao_carga, 'solicitação carga de arquivos')
 
                 if should_stop(session_id):
@@ -426,8 +422,7 @@ def solicitacao_carga_main(session_id: str, lojas):
                 espera_personalizada(
                     lambda: driver.switch_to.default_content(),
                     lambda: driver.switch_to.frame(0),
-                    inicio_random=2,
-                    fim_random=4
+                    condicao=condicao_frame(0)
                 )
 
                 check_box = WebDriverWait(driver, timeout=15).until(
@@ -447,7 +442,8 @@ def solicitacao_carga_main(session_id: str, lojas):
                 # ===============================
                 alert = espera_personalizada(
                     lambda: driver.switch_to.alert,
-                    retorno=True
+                    retorno=True,
+                    condicao=EC.alert_is_present()
                 )
                 alert.accept()
 
@@ -461,8 +457,7 @@ def solicitacao_carga_main(session_id: str, lojas):
                 espera_personalizada(
                     lambda: driver.switch_to.default_content(),
                     lambda: driver.switch_to.frame(0),
-                    inicio_random=2,
-                    fim_random=4
+                    condicao=condicao_frame(0)
                 )
 
                 # ===============================
@@ -473,12 +468,12 @@ def solicitacao_carga_main(session_id: str, lojas):
                     break
                 hoje = datetime.now().strftime("%d/%m/%y")
 
-                sleep(random.randint(2, 4))
+                espera_personalizada()
 
                 preencher_campo(driver, path.Frame.entry_a, hoje)
                 preencher_campo(driver, path.Frame.entry_de, hoje)
 
-                sleep(random.randint(2, 4))
+                espera_personalizada()
                 clicar_pelo_atributo(driver, 'value', 'confirmar', path.Frame.btn_confirmar)
 
                 if should_stop(session_id):
@@ -490,11 +485,12 @@ def solicitacao_carga_main(session_id: str, lojas):
                 # ===============================
                 alert = espera_personalizada(
                     lambda: driver.switch_to.alert,
-                    retorno=True
+                    retorno=True,
+                    condicao=EC.alert_is_present()
                 )
                 alert.accept()
 
-                sleep(random.randint(2, 4))
+                espera_personalizada()
                 # ===============================
                 #          SAIR DA LOJA
                 # ===============================
@@ -508,5 +504,6 @@ def solicitacao_carga_main(session_id: str, lojas):
                 continue
     finally:
         finish_state(session_id)
+        print(f'⏱️ Esperas da execução: {finalizar_motor()}')
 
     return True, 'Solicitação de Carga realizada, confira os arquivos, para saber se ele criou tudo corretamente.'
@@ -0,0 +1,145 @@
+"""
+Conferência de regressão da conciliação CDC (motor_conciliacao.conciliar).
+
+Roda a mesma massa fixa pelo motor em lote e pelo laço que a conciliação da
+loja fazia antes dele (compara_valores título a título + bloco de documentos
+não pagos) e compara logs, CSV (consolidado) e Excel (resumo). A massa cobre:
+
+    - match forte com valor igual (✅) e dentro da tolerância (⚠️);
+    - match forte no limite do thr_exato, com erro de digitação;
+    - match forte com valor fora da tolerância (Incompatível por causa do valor);
+    - match parcial (entre thr_parcial e thr_exato: só log);
+    - nome sem correspondência (ignorado);
+    - documentos não pagos da grade (único, com lote e fora do extrato).
+
+Além da igualdade entre os dois caminhos, confere a quantidade esperada de
+cada caso, para a massa não deixar de cobri-los sem ninguém perceber.
+
+Uso:
+    python -m benchmarks.conciliacao_regressao
+
+Sai com código 1 se houver divergência.
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pandas as pd  # noqa: E402
+from unidecode import unidecode  # noqa: E402
+
+from APP.Core.indice_nomes import IndiceNomes  # noqa: E402
+from APP.Core.motor_conciliacao import conciliar, frame_grade, frame_honda  # noqa: E402
+from APP.Services.conciliacao_cdc_honda_service import compara_valores  # noqa: E402
+
+HONDA = {
+    "JOSE DA SILVA": 1500.00,
+    "MARIA OLIVEIRA SANTOS": 2300.50,
+    "ANTONIO PEREIRA LIMA": 980.00,
+    "FRANCISCA ALVES COSTA": 4100.00,
+    "PEDRO SOUZA BEZERRA": 700.00,
+}
+
+# (NOME, VAL_TITULO, EMPRESA, TITULO, DUPLICATA)
+TITULOS = [
+    ("José da Silva ", 1500.00, 2, 1001, "1001-1"),        # forte, valor igual
+    ("MARIA OLIVEIRA SANTOS", 2280.50, 2, 1002, "1002-1"),  # forte, dentro da tolerância
+    ("PEDRO SOUSA BEZERA", 700.00, 2, 1003, "1003-1"),      # forte no limite (92%)
+    ("ANTONIO PEREIRA LIMA", 1200.00, 2, 1004, "1004-1"),   # forte, valor fora da tolerância
+    ("FRANCISCA A COSTA", 4100.00, 2, 1005, "1005-1"),      # parcial (89%)
+    ("CARLOS EDUARDO MENDES", 350.00, 2, 1006, "1006-1"),   # sem correspondência
+    ("JOSE DA SILVA", 1530.00, 2, 1007, "1007-2"),          # mesmo cliente, outro título
+]
+
+# (pagina, linha, lote, documento, valor, valor_parseado)
+GRADE = [
+    (1, 1, "123", "D1", "500,00", 500.00),   # único, com lote, fora do extrato -> não pago
+    (1, 2, "0", "D2", "80,00", 80.00),       # único, sem lote -> ignorado
+    (1, 3, "124", "D3", "90,00", 90.00),     # aparece duas vezes -> pago
+    (1, 4, "124", "D3", "90,00", 90.00),
+    (1, 5, "125", "D4", "650,10", 650.10),   # único, mas está no extrato
+    (2, 1, "126", "D5", "1.234,56", 1234.56),  # único, com lote, fora do extrato -> não pago
+]
+EXTRATO = [650.10, 77.00]
+
+ESPERADO = {
+    "✅": 2,
+    "⚠️": 2,
+    "❌ Cliente": 1,
+    "❌ Nome incompatível": 1,
+    "❌ Documento não pago": 2,
+}
+
+
+def laco_compara_valores(honda, titulos, extrato, linhas_grid):
+    """O laço da conciliação da loja antes do motor em lote (referência)."""
+    logs = []
+    documentos = [linha["documento"] for linha in linhas_grid]
+    nao_pagos = {d for d in documentos if documentos.count(d) == 1}
+    if nao_pagos:
+        logs.append(f"{'=' * 60}\n")
+        for linha in linhas_grid:
+            if linha["documento"] in nao_pagos and linha["lote"] != "0":
+                if linha["valor_parseado"] not in extrato:
+                    logs.append(f"❌ Documento não pago: {linha['documento']}")
+        logs.append(f"{'=' * 60}\n")
+
+    consolidado, resumo = [], []
+    indice = IndiceNomes(honda)
+    for row in titulos.itertuples(index=False):
+        eh_compativel, log, valor_normalizado = compara_valores(
+            nome_db=unidecode(row.NOME.strip().upper()),
+            valor_db=row.VAL_TITULO,
+            empresa=row.EMPRESA,
+            titulo=row.TITULO,
+            dados_honda=honda,
+            indice=indice,
+        )
+        if not log:
+            continue
+        logs.append(log)
+        if eh_compativel:
+            valor = f"{valor_normalizado:,.2f}".replace(".", "_").replace(",", ".").replace("_", ",")
+            situacao = "Incompatível por causa do valor" if "❌" in log else "Compatível"
+            consolidado.append([row.TITULO, row.DUPLICATA, valor])
+            resumo.append([row.NOME, row.TITULO, row.DUPLICATA, valor, situacao])
+    return logs, consolidado, resumo
+
+
+def main() -> int:
+    titulos = pd.DataFrame(TITULOS, columns=["NOME", "VAL_TITULO", "EMPRESA", "TITULO", "DUPLICATA"])
+    linhas_grid = [dict(zip(["pagina", "linha", "lote", "documento", "valor", "valor_parseado"], linha))
+                   for linha in GRADE]
+
+    resultado = conciliar(frame_honda(HONDA), titulos, EXTRATO, frame_grade(linhas_grid))
+    logs_ref, consolidado_ref, resumo_ref = laco_compara_valores(HONDA, titulos, EXTRATO, linhas_grid)
+
+    divergencias = []
+    if resultado.logs != logs_ref:
+        divergencias.append("logs")
+        for i, (motor, ref) in enumerate(zip(resultado.logs, logs_ref)):
+            if motor != ref:
+                print(f"   linha {i}:\n      motor: {motor!r}\n      laço:  {ref!r}")
+        if len(resultado.logs) != len(logs_ref):
+            print(f"   {len(resultado.logs)} linhas no motor x {len(logs_ref)} no laço")
+    if resultado.consolidado.values.tolist() != consolidado_ref:
+        divergencias.append("CSV (consolidado)")
+    if resultado.resumo.values.tolist() != resumo_ref:
+        divergencias.append("Excel (resumo)")
+
+    for prefixo, quantidade in ESPERADO.items():
+        obtida = sum(log.startswith(prefixo) for log in resultado.logs)
+        if obtida != quantidade:
+            divergencias.append(f"'{prefixo}': {obtida} linha(s), esperado {quantidade}")
+
+    for log in resultado.logs:
+        print(f"   {log.strip()}")
+    if divergencias:
+        print(f"❌ Conciliação divergente: {', '.join(divergencias)}")
+        return 1
+    print(f"✅ Motor igual ao laço de compara_valores ({len(TITULOS)} títulos, {len(GRADE)} linhas da grade)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
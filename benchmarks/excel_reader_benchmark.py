@@ -0,0 +1,164 @@
+"""
+Benchmark de leitura de planilhas: openpyxl x calamine.
+
+Gera arquivos com o formato dos relatórios usados nas automações (relatório PAN,
+extrato Itaú com cabeçalho na linha 10, planilha FIDC e planilha de senhas) e
+mede o tempo de parse de cada engine via APP.Core.excel_parser.ler_excel, sem o
+cache compartilhado. Arquivos reais podem ser incluídos com --arquivos.
+
+Uso:
+    python -m benchmarks.excel_reader_benchmark
+    python -m benchmarks.excel_reader_benchmark --repeticoes 5 --arquivos "C:/relatorios/*.xlsx" --saida excel.json
+"""
+import argparse
+import glob
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from APP.Core.excel_parser import CALAMINE_DISPONIVEL, ler_excel  # noqa: E402
+
+
+def _chassi(rnd: random.Random) -> str:
+    return "9C2" + "".join(rnd.choice("ABCDEFGHJKLMNPRSTUVWXYZ0123456789") for _ in range(14))
+
+
+def gerar_relatorio_pan(caminho: Path, linhas: int, rnd: random.Random) -> None:
+    inicio = datetime(2025, 1, 1)
+    df = pd.DataFrame({
+        "CONTRATO": [f"{rnd.randint(10**9, 10**10 - 1)}" for _ in range(linhas)],
+        "CLIENTE": [f"CLIENTE {i}" for i in range(linhas)],
+        "CPF/CNPJ": [f"{rnd.randint(10**10, 10**11 - 1)}" for _ in range(linhas)],
+        "DATA": [inicio + timedelta(days=rnd.randint(0, 300)) for _ in range(linhas)],
+        "PARCELA": [rnd.randint(1, 48) for _ in range(linhas)],
+        "VALOR FINANCIADO": [round(rnd.uniform(5_000, 60_000), 2) for _ in range(linhas)],
+        "VALOR LIQUIDO": [round(rnd.uniform(1_000, 50_000), 2) for _ in range(linhas)],
+        "CHASSI": [_chassi(rnd) for _ in range(linhas)],
+        "MODELO": [rnd.choice(["CG 160", "BIZ 125", "POP 110", "XRE 300"]) for _ in range(linhas)],
+        "LOJA": [rnd.choice(["JUAZEIRO", "CRATO", "TERRA SANTA"]) for _ in range(linhas)],
+    })
+    with pd.ExcelWriter(caminho, engine="openpyxl") as writer:
+        df.to_excel(writer, sheet_name="Relatorio", index=False)
+        df.head(linhas // 10).to_excel(writer, sheet_name="Resumo", index=False)
+
+
+def gerar_extrato_itau(caminho: Path, linhas: int, rnd: random.Random) -> None:
+    topo = [["Extrato Conta Corrente"], ["Agência 0000 Conta 00000-0"]] + [[""]] * 7
+    corpo = [["Data", "Lançamento", "Razão Social", "CPF/CNPJ", "Valor (R$)", "Saldo (R$)"]]
+    for i in range(linhas):
+        corpo.append([
+            (datetime(2025, 1, 1) + timedelta(days=i % 30)).strftime("%d/%m/%Y"),
+            rnd.choice(["PIX RECEBIDO", "TED BANCO PAN", "SISPAG FORNECEDORES", "TAR PACOTE"]),
+            f"EMPRESA {rnd.randint(1, 500)}",
+            f"{rnd.randint(10**13, 10**14 - 1)}",
+            round(rnd.uniform(-5_000, 50_000), 2),
+            round(rnd.uniform(0, 500_000), 2),
+        ])
+    pd.DataFrame(topo + corpo).to_excel(caminho, index=False, header=False)
+
+
+def gerar_planilha_fidc(caminho: Path, linhas: int, rnd: random.Random) -> None:
+    df = pd.DataFrame({
+        "EMP": [rnd.choice([2, 3, 5, 21]) for _ in range(linhas)],
+        "Fornecedor": [f"FORNECEDOR {rnd.randint(1, 300)}" for _ in range(linhas)],
+        "Nota Fiscal": [rnd.randint(1000, 999999) for _ in range(linhas)],
+        "Vencimento": [datetime(2025, 1, 1) + timedelta(days=rnd.randint(0, 90)) for _ in range(linhas)],
+        "Valor": [round(rnd.uniform(100, 90_000), 2) for _ in range(linhas)],
+    })
+    df.to_excel(caminho, sheet_name="FIDC Contas a pagar.", index=False)
+
+
+def gerar_planilha_senhas(caminho: Path, linhas: int, rnd: random.Random) -> None:
+    df = pd.DataFrame({
+        "LOJAS": [f"LOJA {i}" for i in range(linhas)],
+        "CODIGOS": [str(rnd.randint(1, 99)) for _ in range(linhas)],
+        "USUARIOS": [f"usuario{i}" for i in range(linhas)],
+        "SENHAS": [f"senha{i}" for i in range(linhas)],
+    })
+    df.to_excel(caminho, index=False)
+
+
+# nome -> (gerador, linhas, parâmetros de leitura usados no código)
+FORMATOS = {
+    "relatorio_pan": (gerar_relatorio_pan, 20_000, {"sheet_name": None}),
+    "extrato_itau": (gerar_extrato_itau, 2_000, {"header": 9}),
+    "fidc_contas_pagar": (gerar_planilha_fidc, 5_000, {"sheet_name": "FIDC Contas a pagar."}),
+    "senhas_ihs": (gerar_planilha_senhas, 30, {"dtype": str}),
+}
+
+
+def medir(caminho: Path, engine: str, repeticoes: int, parametros: dict) -> dict:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        ler_excel(caminho, engine=engine, cache=False, **parametros)
+        tempos.append(time.perf_counter() - inicio)
+    return {
+        "min_s": round(min(tempos), 4),
+        "mediana_s": round(statistics.median(tempos), 4),
+        "max_s": round(max(tempos), 4),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de leitura Excel: openpyxl x calamine")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--escala", type=float, default=1.0, help="Multiplicador do número de linhas geradas")
+    parser.add_argument("--arquivos", nargs="*", default=[], help="Arquivos reais (glob) a incluir na medição")
+    parser.add_argument("--saida", help="Arquivo JSON com o relatório")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    engines = ["openpyxl"] + (["calamine"] if CALAMINE_DISPONIVEL else [])
+    if not CALAMINE_DISPONIVEL:
+        print("⚠️ python-calamine não instalado: medindo apenas openpyxl")
+
+    rnd = random.Random(args.seed)
+    resultados = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        casos = []
+        for nome, (gerador, linhas, parametros) in FORMATOS.items():
+            caminho = Path(tmp) / f"{nome}.xlsx"
+            gerador(caminho, max(1, int(linhas * args.escala)), rnd)
+            casos.append((nome, caminho, parametros))
+        for padrao in args.arquivos:
+            for arquivo in sorted(glob.glob(padrao)):
+                casos.append((Path(arquivo).name, Path(arquivo), {"sheet_name": None}))
+
+        for nome, caminho, parametros in casos:
+            linha = {"arquivo": nome, "bytes": caminho.stat().st_size}
+            for engine in engines:
+                linha[engine] = medir(caminho, engine, args.repeticoes, parametros)
+            if "calamine" in linha:
+                linha["aceleracao"] = round(linha["openpyxl"]["mediana_s"] / max(linha["calamine"]["mediana_s"], 1e-9), 2)
+            resultados.append(linha)
+
+            texto = " | ".join(f"{engine}: {linha[engine]['mediana_s']:.3f}s" for engine in engines)
+            extra = f" | {linha['aceleracao']}x" if "aceleracao" in linha else ""
+            print(f"📊 {nome:<24} {linha['bytes'] / 1024:>9.0f} KB | {texto}{extra}")
+
+    relatorio = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "pandas": pd.__version__,
+        "repeticoes": args.repeticoes,
+        "resultados": resultados,
+    }
+    if args.saida:
+        Path(args.saida).write_text(json.dumps(relatorio, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"💾 Relatório salvo em {args.saida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""
+Benchmark do casamento de nomes Linx x Honda (compara_valores).
+
+Gera nomes de clientes da Honda e linhas do banco (Linx) com nomes idênticos,
+com erros de digitação, abreviados e sem correspondência, e compara:
+
+    - laço original: fuzz.ratio do fuzzywuzzy contra todos os nomes, com
+      strip/upper/lower a cada comparação (medido numa amostra e extrapolado);
+    - IndiceNomes: nomes pré-normalizados, atalho para nome idêntico e uma
+      varredura no rapidfuzz com corte mínimo.
+
+A conferência usa um laço de referência com o mesmo scorer do índice (score
+inteiro, primeiro nome no empate) e acusa qualquer divergência a partir do
+corte (thr_parcial). A concordância com o fuzzywuzzy original também é
+mostrada: sem python-Levenshtein (como em produção) ele usa o difflib, cujo
+score difere da distância Indel do rapidfuzz em alguns pares. Essa diferença
+é uma mudança de score aceita, não um erro do índice.
+
+Uso:
+    python -m benchmarks.fuzzy_nomes_benchmark
+    python -m benchmarks.fuzzy_nomes_benchmark --linhas 10000 --nomes 500 --amostra-original 500 --saida fuzzy.json
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fuzzywuzzy import fuzz  # noqa: E402
+
+from APP.Core.indice_nomes import IndiceNomes, normalizar_nome  # noqa: E402
+
+PRENOMES = ["JOSE", "MARIA", "ANTONIO", "FRANCISCO", "ANA", "FRANCISCA", "JOAO", "RAIMUNDA",
+            "PEDRO", "LUIZ", "PAULO", "CARLOS", "MANOEL", "ANTONIA", "FRANCISCO", "MARCOS",
+            "RAIMUNDO", "LUCAS", "EDUARDO", "CICERO", "RITA", "JOANA", "DAMIAO", "SEVERINO"]
+SOBRENOMES = ["SILVA", "SANTOS", "OLIVEIRA", "SOUZA", "LIMA", "PEREIRA", "FERREIRA", "ALVES",
+              "RODRIGUES", "COSTA", "GOMES", "RIBEIRO", "MARTINS", "CARVALHO", "ALMEIDA", "LOPES",
+              "SOARES", "FERNANDES", "VIEIRA", "BARBOSA", "ROCHA", "DIAS", "NASCIMENTO", "ANDRADE",
+              "MOREIRA", "NUNES", "MARQUES", "MACHADO", "MENDES", "FREITAS", "CAVALCANTE", "BEZERRA"]
+
+
+def gerar_nome(rnd: random.Random) -> str:
+    partes = [rnd.choice(PRENOMES)]
+    if rnd.random() < 0.4:
+        partes.append(rnd.choice(PRENOMES))
+    partes += rnd.sample(SOBRENOMES, rnd.randint(1, 3))
+    return " ".join(partes)
+
+
+def variar(nome: str, rnd: random.Random) -> str:
+    """Nome como costuma vir do Linx: erro de digitação, letra faltando ou sobrenome abreviado."""
+    tipo = rnd.random()
+    if tipo < 0.4:
+        i = rnd.randrange(len(nome))
+        return nome[:i] + rnd.choice("ABCDEFGHIJLMNOPRSTUVZ") + nome[i + 1:]
+    if tipo < 0.7:
+        i = rnd.randrange(len(nome))
+        return nome[:i] + nome[i + 1:]
+    partes = nome.split()
+    if len(partes) > 2:
+        partes[1] = partes[1][0]
+    return " ".join(partes)
+
+
+def gerar_cenario(args, rnd: random.Random):
+    honda = {}
+    while len(honda) < args.nomes:
+        honda.setdefault(gerar_nome(rnd), round(rnd.uniform(500, 20000), 2))
+    nomes_honda = list(honda)
+
+    linhas = []
+    for _ in range(args.linhas):
+        sorteio = rnd.random()
+        if sorteio < args.exatos:
+            linhas.append(rnd.choice(nomes_honda))
+        elif sorteio < args.exatos + args.variados:
+            linhas.append(variar(rnd.choice(nomes_honda), rnd))
+        else:
+            linhas.append(gerar_nome(rnd))
+    return honda, linhas
+
+
+def melhor_original(alvo: str, dados_honda: dict):
+    """O laço que compara_valores fazia (fuzzywuzzy, normalizando a cada par)."""
+    alvo = alvo.strip().upper()
+    melhor_nome, melhor_score = None, -1
+    for nome in dados_honda:
+        score = fuzz.ratio(alvo.lower(), nome.strip().upper().lower())
+        if score > melhor_score:
+            melhor_nome, melhor_score = nome, score
+    return melhor_nome, melhor_score
+
+
+def melhor_referencia(alvo: str, indice: IndiceNomes):
+    """Laço completo com o mesmo scorer do índice (rapidfuzz), para conferir o resultado."""
+    from rapidfuzz import fuzz as rf_fuzz
+    alvo = normalizar_nome(alvo)
+    melhor_nome, melhor_score = None, -1
+    for nome, normalizado in zip(indice.nomes, indice.normalizados):
+        score = int(round(rf_fuzz.ratio(alvo, normalizado)))
+        if score > melhor_score:
+            melhor_nome, melhor_score = nome, score
+    return melhor_nome, melhor_score
+
+
+def decisao(nome, score, corte):
+    return (nome, score) if score >= corte else (None, 0)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark do casamento de nomes Linx x Honda")
+    parser.add_argument("--linhas", type=int, default=10000, help="Linhas do banco (Linx)")
+    parser.add_argument("--nomes", type=int, default=500, help="Nomes de clientes da Honda")
+    parser.add_argument("--exatos", type=float, default=0.5, help="Fração de nomes idênticos")
+    parser.add_argument("--variados", type=float, default=0.3, help="Fração de nomes com variação")
+    parser.add_argument("--corte", type=int, default=80, help="thr_parcial de compara_valores")
+    parser.add_argument("--amostra-original", type=int, default=500, help="Linhas medidas no laço original")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--saida", help="Arquivo JSON com o relatório")
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    honda, linhas = gerar_cenario(args, rnd)
+    print(f"🧪 {len(linhas)} linhas Linx x {len(honda)} nomes Honda")
+
+    inicio = time.perf_counter()
+    indice = IndiceNomes(honda)
+    montagem_s = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    resultados_indice = [indice.melhor(nome, score_cutoff=args.corte) for nome in linhas]
+    indice_s = time.perf_counter() - inicio
+
+    amostra = linhas[:args.amostra_original]
+    inicio = time.perf_counter()
+    resultados_original = [decisao(*melhor_original(nome, honda), args.corte) for nome in amostra]
+    original_amostra_s = time.perf_counter() - inicio
+    original_s = original_amostra_s * len(linhas) / max(len(amostra), 1)
+
+    divergencias_referencia = None
+    try:
+        referencia = [decisao(*melhor_referencia(nome, indice), args.corte) for nome in linhas]
+        divergencias_referencia = sum(1 for a, b in zip(referencia, resultados_indice) if a != b)
+    except ImportError:
+        print("⚠️ rapidfuzz não instalado: o índice usou o fuzzywuzzy (sem conferência de referência)")
+
+    concordancia_original = sum(1 for a, b in zip(resultados_original, resultados_indice) if a[0] == b[0])
+
+    print(f"⏱️ Laço original: {original_s:.2f}s (extrapolado de {len(amostra)} linhas em {original_amostra_s:.2f}s)")
+    print(f"⏱️ IndiceNomes: montagem {montagem_s * 1000:.1f} ms + consultas {indice_s:.3f}s "
+          f"({original_s / max(indice_s + montagem_s, 1e-9):.0f}x)")
+    if divergencias_referencia is not None:
+        simbolo = "✅" if divergencias_referencia == 0 else "❌"
+        print(f"{simbolo} Divergências com o laço de referência: {divergencias_referencia}")
+    print(f"📊 Mesmo nome escolhido que o fuzzywuzzy original: {concordancia_original}/{len(amostra)}")
+
+    if args.saida:
+        relatorio = {
+            "gerado_em": datetime.now().isoformat(timespec="seconds"),
+            "linhas": len(linhas),
+            "nomes": len(honda),
+            "corte": args.corte,
+            "original_s": round(original_s, 3),
+            "original_amostra": len(amostra),
+            "indice_montagem_s": round(montagem_s, 4),
+            "indice_consultas_s": round(indice_s, 4),
+            "divergencias_referencia": divergencias_referencia,
+            "concordancia_original": concordancia_original,
+        }
+        Path(args.saida).write_text(json.dumps(relatorio, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"💾 Relatório salvo em {args.saida}")
+    return 0 if not divergencias_referencia else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
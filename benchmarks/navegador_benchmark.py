@@ -0,0 +1,138 @@
+"""
+Benchmark de carregamento de páginas: perfil completo x perfil enxuto do Chrome.
+
+Abre cada página com os dois perfis (APP.Core.perfil_navegador) e mede o tempo
+do driver.get, os marcos da Navigation Timing (DOMContentLoaded e load), o
+número de requisições e os bytes transferidos. Por padrão mede as telas de login
+do IHS e do portal FIDC; telas que exigem login (ex.: a grade "consultar cc
+concessionaria") podem ser medidas a partir de páginas salvas com --html.
+
+Uso:
+    python -m benchmarks.navegador_benchmark
+    python -m benchmarks.navegador_benchmark --repeticoes 5 --headless --html grade_cc.html --saida navegador.json
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from selenium import webdriver  # noqa: E402
+from selenium.webdriver.chrome.service import Service  # noqa: E402
+
+from APP.Core.chromedriver import resolver_chromedriver  # noqa: E402
+from APP.Core.perfil_navegador import aplicar_perfil_enxuto, bloquear_recursos  # noqa: E402
+
+URLS_PADRAO = {
+    "ihs_login": "https://www3.honda.com.br/corp/ihs/portal/#/login",
+    "fidc_login": "https://web.accesstage.com.br/santander-montadoras-ui/#/login",
+}
+
+JS_METRICAS = """
+const nav = performance.getEntriesByType('navigation')[0] || {};
+const recursos = performance.getEntriesByType('resource');
+return {
+    dom_s: (nav.domContentLoadedEventEnd || 0) / 1000,
+    load_s: (nav.loadEventEnd || 0) / 1000,
+    requisicoes: recursos.length + 1,
+    bytes: recursos.reduce((t, r) => t + (r.transferSize || 0), nav.transferSize || 0)
+};
+"""
+
+
+def criar_driver(enxuto: bool, headless: bool) -> webdriver.Chrome:
+    options = webdriver.ChromeOptions()
+    if enxuto:
+        aplicar_perfil_enxuto(options, headless=headless)
+    elif headless:
+        options.add_argument("--headless=new")
+        options.add_argument("--window-size=1366,768")
+    driver = webdriver.Chrome(service=Service(resolver_chromedriver()), options=options)
+    driver.set_page_load_timeout(90)
+    if enxuto:
+        bloquear_recursos(driver)
+    return driver
+
+
+def medir(driver: webdriver.Chrome, url: str, repeticoes: int) -> dict:
+    amostras = []
+    for _ in range(repeticoes):
+        driver.get("about:blank")
+        driver.delete_all_cookies()
+        driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+        inicio = time.perf_counter()
+        driver.get(url)
+        tempo_get = time.perf_counter() - inicio
+        time.sleep(0.5)  # deixa o loadEventEnd ser registrado em páginas com hash routing
+        metricas = driver.execute_script(JS_METRICAS)
+        metricas["get_s"] = tempo_get
+        amostras.append(metricas)
+
+    def mediana(chave):
+        return round(statistics.median(a[chave] for a in amostras), 3)
+
+    return {
+        "get_s": mediana("get_s"),
+        "dom_s": mediana("dom_s"),
+        "load_s": mediana("load_s"),
+        "requisicoes": int(mediana("requisicoes")),
+        "kb": round(mediana("bytes") / 1024, 1),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de carregamento: perfil completo x enxuto")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--headless", action="store_true", help="Roda os dois perfis em headless")
+    parser.add_argument("--url", action="append", default=[], help="URL extra (nome=url ou só a url)")
+    parser.add_argument("--html", action="append", default=[], help="Página salva (ex.: grade do IHS) a medir")
+    parser.add_argument("--sem-padrao", action="store_true", help="Não mede as telas de login padrão")
+    parser.add_argument("--saida", help="Arquivo JSON com o relatório")
+    args = parser.parse_args()
+
+    paginas = {} if args.sem_padrao else dict(URLS_PADRAO)
+    for item in args.url:
+        nome, separador, url = item.partition("=")
+        if not separador or "://" in nome:
+            nome, url = item, item
+        paginas[nome] = url
+    for arquivo in args.html:
+        caminho = Path(arquivo).resolve()
+        paginas[caminho.stem] = caminho.as_uri()
+
+    resultados = []
+    for perfil, enxuto in (("completo", False), ("enxuto", True)):
+        driver = criar_driver(enxuto, args.headless)
+        try:
+            for nome, url in paginas.items():
+                try:
+                    linha = {"pagina": nome, "perfil": perfil, **medir(driver, url, args.repeticoes)}
+                except Exception as e:
+                    linha = {"pagina": nome, "perfil": perfil, "erro": str(e)}
+                resultados.append(linha)
+                if "erro" in linha:
+                    print(f"❌ {nome:<16} {perfil:<9} {linha['erro']}")
+                else:
+                    print(f"📊 {nome:<16} {perfil:<9} get {linha['get_s']:.2f}s | load {linha['load_s']:.2f}s | "
+                          f"{linha['requisicoes']} req | {linha['kb']:.0f} KB")
+        finally:
+            driver.quit()
+
+    relatorio = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "headless": args.headless,
+        "repeticoes": args.repeticoes,
+        "resultados": resultados,
+    }
+    if args.saida:
+        Path(args.saida).write_text(json.dumps(relatorio, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"💾 Relatório salvo em {args.saida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,332 @@
+"""
+Benchmark sintético do processamento PAN.
+
+Gera uma árvore no formato de `base_dir_rede` (uma pasta por data, no padrão
+dd-mm-aaaa), com relatórios .xlsx contendo valores e chassis, e um extrato Itaú
+com cabeçalho na linha 10. Em seguida mede, de ponta a ponta e por fase:
+
+    - PanService.processar_extrato: leitura, filtro, busca, chassi e banco
+    - PanProcessor.processar_pan_multidata: extração dos valores e busca
+
+O Oracle é substituído por um SQLite local com as mesmas tabelas
+(ofi_ficha_proprietario e fin_titulo), executando as mesmas consultas.
+Cada cenário roda "frio" (índice e cache vazios) e "quente" (segunda execução).
+
+Uso:
+    python -m benchmarks.pan_benchmark
+    python -m benchmarks.pan_benchmark --datas 5 --arquivos 50 --linhas 2000 --valores 30 --acerto 0.8 --saida pan.json
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext, redirect_stdout
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+RAIZ = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(RAIZ))
+
+_ALFABETO_CHASSI = "ABCDEFGHJKLMNPRSTUVWXYZ0123456789"
+_FORMATO_DATA = "%d-%m-%Y"
+
+
+# ---------- Geração dos dados ----------
+def _chassi(rnd: random.Random) -> str:
+    return "9C2" + "".join(rnd.choice(_ALFABETO_CHASSI) for _ in range(14))
+
+
+def _nome_sem_digitos(i: int) -> str:
+    # Nomes sem números: dígitos no nome contam como acerto na busca por nome do arquivo
+    letras = ""
+    i += 1
+    while i:
+        i, resto = divmod(i - 1, 26)
+        letras = chr(ord("a") + resto) + letras
+    return letras
+
+
+def gerar_cenario(destino: Path, args, rnd: random.Random) -> dict:
+    base_dir = destino / "rede"
+    data_base = datetime.strptime(args.data, _FORMATO_DATA)
+    datas = [(data_base + timedelta(days=d - args.datas // 2)).strftime(_FORMATO_DATA) for d in range(args.datas)]
+
+    # Valores do extrato: parte deles estará em algum relatório (taxa de acerto)
+    qtd_acertos = int(round(args.valores * args.acerto))
+    valores = rnd.sample(range(100_000, 5_000_000), args.valores)  # centavos, sem repetição
+    valores_acerto = [v / 100 for v in valores[:qtd_acertos]]
+    valores_falha = [v / 100 + 10_000_000 for v in valores[qtd_acertos:]]  # fora da faixa dos relatórios
+
+    # Onde cada valor com acerto vai parar: (data, arquivo, linha)
+    destinos = {
+        valor: (rnd.choice(datas), rnd.randrange(args.arquivos), rnd.randrange(args.linhas))
+        for valor in valores_acerto
+    }
+    por_arquivo = defaultdict(dict)
+    for valor, (data, arquivo, linha) in destinos.items():
+        por_arquivo[(data, arquivo)][linha] = valor
+
+    chassis_acerto = {}
+    for data in datas:
+        pasta = base_dir / data
+        pasta.mkdir(parents=True, exist_ok=True)
+        for i in range(args.arquivos):
+            linhas = args.linhas
+            valores_linha = [round(rnd.uniform(20_000, 99_000), 2) for _ in range(linhas)]  # sem colisão com o extrato
+            chassis = [_chassi(rnd) for _ in range(linhas)]
+            for linha, valor in por_arquivo.get((data, i), {}).items():
+                valores_linha[linha] = valor
+                chassis_acerto[valor] = chassis[linha]
+
+            df = pd.DataFrame({
+                "CONTRATO": [f"C{rnd.randint(10**8, 10**9 - 1)}" for _ in range(linhas)],
+                "CLIENTE": [f"CLIENTE {rnd.randint(1, 9999)}" for _ in range(linhas)],
+                "CPF": [f"{rnd.randint(10**10, 10**11 - 1)}" for _ in range(linhas)],
+                "DATA": [data] * linhas,
+                "PARCELA": [rnd.randint(1, 48) for _ in range(linhas)],
+                "PLANO": [rnd.choice(["CDC", "LEASING"]) for _ in range(linhas)],
+                "VALOR LIQUIDO": valores_linha,
+                "CHASSI": chassis,  # coluna H, como nos relatórios do banco
+            })
+            with pd.ExcelWriter(pasta / f"relatorio_pan_{_nome_sem_digitos(i)}.xlsx", engine="openpyxl") as writer:
+                for planilha in range(args.planilhas):
+                    df.to_excel(writer, sheet_name=f"Plan{planilha + 1}", index=False)
+
+    # Extrato Itaú: 9 linhas de cabeçalho livre, títulos na linha 10
+    extrato = destino / "extrato_itau.xlsx"
+    topo = [["Extrato Conta Corrente", "", ""]] + [["", "", ""]] * 8
+    corpo = [["Data", "Lançamento", "Valor (R$)"]]
+    for valor in valores_acerto + valores_falha:
+        corpo.append([args.data, "TED BANCO PAN SA", f"{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")])
+    for _ in range(args.valores):
+        corpo.append([args.data, "PIX RECEBIDO", f"{rnd.uniform(10, 900):.2f}".replace(".", ",")])
+    pd.DataFrame(topo + corpo).to_excel(extrato, index=False, header=False)
+
+    # Arquivo de entrada do PanProcessor: uma coluna com os valores procurados
+    entrada_processor = destino / "valores_processor.xlsx"
+    pd.DataFrame({"VALOR": valores_acerto + valores_falha}).to_excel(entrada_processor, index=False)
+
+    # Banco local: cada chassi encontrado tem cliente e título com o mesmo valor
+    banco = destino / "erp.sqlite"
+    conn = sqlite3.connect(banco)
+    conn.executescript("""
+        CREATE TABLE ofi_ficha_proprietario (CHASSI TEXT, CLIENTE INTEGER, PROPRIETARIO_ATUAL TEXT);
+        CREATE TABLE fin_titulo (TITULO TEXT, DUPLICATA TEXT, VAL_TITULO REAL, CLIENTE INTEGER,
+                                 TIPO TEXT, DATA_EMISSAO TEXT);
+        CREATE INDEX ix_prop ON ofi_ficha_proprietario (CHASSI);
+        CREATE INDEX ix_tit ON fin_titulo (CLIENTE);
+    """)
+    for n, (valor, chassi) in enumerate(chassis_acerto.items(), start=1):
+        conn.execute("INSERT INTO ofi_ficha_proprietario VALUES (?, ?, 'S')", (chassi, n))
+        conn.execute("INSERT INTO fin_titulo VALUES (?, '01', ?, ?, 'CR', '2025-01-01')", (f"T{n}", valor, n))
+        conn.execute("INSERT INTO fin_titulo VALUES (?, '00', ?, ?, 'CR', '2024-01-01')", (f"T{n}E", valor + 0.5, n))
+    conn.commit()
+    conn.close()
+
+    return {
+        "base_dir": base_dir,
+        "datas": datas,
+        "extrato": extrato,
+        "entrada_processor": entrada_processor,
+        "banco": banco,
+        "acertos_esperados": len(valores_acerto),
+    }
+
+
+# ---------- Oracle local ----------
+class _CursorSQLite:
+    """Executa o SQL do serviço no SQLite (dual e NUMBER não existem lá)."""
+
+    def __init__(self, conn):
+        self._cur = conn.cursor()
+
+    def execute(self, sql, binds=None):
+        sql = sql.replace(" FROM dual", "").replace("AS NUMBER)", "AS REAL)")
+        self._cur.execute(sql, binds or {})
+
+    def fetchall(self):
+        return self._cur.fetchall()
+
+    def fetchone(self):
+        return self._cur.fetchone()
+
+
+class _ConexaoSQLite:
+    def __init__(self, caminho):
+        self._conn = sqlite3.connect(caminho)
+
+    def cursor(self):
+        return _CursorSQLite(self._conn)
+
+    def close(self):
+        self._conn.close()
+
+
+# ---------- Medição ----------
+class Cronometro:
+    def __init__(self):
+        self.fases = defaultdict(float)
+        self.chamadas = defaultdict(int)
+
+    @contextmanager
+    def fase(self, nome):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.fases[nome] += time.perf_counter() - inicio
+            self.chamadas[nome] += 1
+
+    def envolver(self, objeto, metodo, nome):
+        original = getattr(objeto, metodo)
+
+        def medido(*args, **kwargs):
+            with self.fase(nome):
+                return original(*args, **kwargs)
+
+        setattr(objeto, metodo, medido)
+
+    def resumo(self, total):
+        return {
+            "total_s": round(total, 4),
+            "fases_s": {nome: round(t, 4) for nome, t in self.fases.items()},
+            "chamadas": dict(self.chamadas),
+        }
+
+
+def medir_pan_service(cenario, rodada):
+    from APP.Services import pan_service
+
+    servico = pan_service.PanService()
+    servico.base_dir_rede = str(cenario["base_dir"])
+
+    cron = Cronometro()
+    cron.envolver(servico, "_ler_extrato_itaú", "leitura_extrato")
+    cron.envolver(servico, "_filtrar_lancamentos_pan", "filtro")
+    cron.envolver(servico, "_buscar_arquivos_para_valores", "busca")
+    cron.envolver(servico, "_extrair_chassi_do_relatorio", "chassi")
+    cron.envolver(servico, "_consultar_banco_dados_lote", "banco")
+
+    inicio = time.perf_counter()
+    resultados = servico.processar_extrato(str(cenario["extrato"]), cenario["datas"][len(cenario["datas"]) // 2])
+    total = time.perf_counter() - inicio
+
+    resumo = cron.resumo(total)
+    resumo["resultados"] = len(resultados)
+    resumo["rodada"] = rodada
+    return resumo
+
+
+def medir_pan_processor(cenario, rodada):
+    from APP.Core.pan_processor import PanProcessor
+
+    processor = PanProcessor()
+    cron = Cronometro()
+    cron.envolver(processor, "_extrair_valores_excel", "extracao_valores")
+
+    inicio = time.perf_counter()
+    resultados = processor.processar_pan_multidata(
+        str(cenario["entrada_processor"]), str(cenario["base_dir"]), cenario["datas"]
+    )
+    total = time.perf_counter() - inicio
+
+    resumo = cron.resumo(total)
+    resumo["fases_s"]["busca"] = round(total - resumo["fases_s"].get("extracao_valores", 0.0), 4)
+    resumo["resultados"] = len(resultados)
+    resumo["rodada"] = rodada
+    return resumo
+
+
+def _versao_codigo():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, text=True).strip()
+    except Exception:
+        return None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark sintético do processamento PAN")
+    parser.add_argument("--data", default=datetime.now().strftime(_FORMATO_DATA), help="Data do extrato (dd-mm-aaaa)")
+    parser.add_argument("--datas", type=int, default=3, help="Quantidade de pastas de data geradas")
+    parser.add_argument("--arquivos", type=int, default=10, help="Relatórios por pasta de data")
+    parser.add_argument("--planilhas", type=int, default=1, help="Planilhas por relatório")
+    parser.add_argument("--linhas", type=int, default=500, help="Linhas por planilha")
+    parser.add_argument("--valores", type=int, default=10, help="Lançamentos PAN no extrato")
+    parser.add_argument("--acerto", type=float, default=0.8, help="Fração dos valores presente nos relatórios")
+    parser.add_argument("--rodadas", type=int, default=2, help="Execuções por cenário (a primeira é a fria)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--saida", default="pan_benchmark.json", help="Arquivo JSON com o relatório")
+    parser.add_argument("--verboso", action="store_true", help="Mostra os prints dos serviços")
+    args = parser.parse_args()
+    silencio = nullcontext if args.verboso else (lambda: redirect_stdout(io.StringIO()))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        # Índice e cache isolados, definidos antes de importar a aplicação
+        os.environ["PAN_INDICE_DIR"] = str(tmp / "indice")
+        os.environ["EXCEL_CACHE_DIR"] = str(tmp / "excel_cache")
+
+        inicio = time.perf_counter()
+        cenario = gerar_cenario(tmp, args, random.Random(args.seed))
+        print(f"🧪 Cenário gerado em {time.perf_counter() - inicio:.1f}s: "
+              f"{args.datas} datas x {args.arquivos} arquivos x {args.linhas} linhas")
+
+        from APP.Config.settings import Config
+        from APP.Services import pan_service
+
+        Config.USER_ORACLE = Config.USER_ORACLE or "benchmark"
+        Config.PASSWORD_ORACLE = Config.PASSWORD_ORACLE or "benchmark"
+        Config.DSN = Config.DSN or "benchmark"
+        pan_service.get_oracle_connection = lambda: _ConexaoSQLite(cenario["banco"])
+
+        relatorio = {
+            "gerado_em": datetime.now().isoformat(timespec="seconds"),
+            "versao_codigo": _versao_codigo(),
+            "python": sys.version.split()[0],
+            "parametros": {k: v for k, v in vars(args).items() if k != "saida"},
+            "acertos_esperados": cenario["acertos_esperados"],
+            "pan_service": [],
+            "pan_processor": [],
+        }
+
+        for rodada in range(args.rodadas):
+            nome = "fria" if rodada == 0 else f"quente_{rodada}"
+            with silencio():
+                resumo = medir_pan_service(cenario, nome)
+            relatorio["pan_service"].append(resumo)
+            print(f"⏱️ PanService ({nome}): {resumo['total_s']:.3f}s {resumo['fases_s']} "
+                  f"-> {resumo['resultados']}/{cenario['acertos_esperados']}")
+
+        # Só o extrato do PanProcessor passa pelo cache de planilhas (os relatórios
+        # são lidos em bytes e analisados no pool de parse, sem cache). Limpar a
+        # memória tira do extrato o acerto deixado pelo PanService; a cópia em
+        # disco continua, então a rodada "fria" dele não é fria para o extrato.
+        from APP.Core.excel_cache import cache_excel
+        cache_excel.limpar_memoria()
+
+        for rodada in range(args.rodadas):
+            nome = "fria" if rodada == 0 else f"quente_{rodada}"
+            with silencio():
+                resumo = medir_pan_processor(cenario, nome)
+            relatorio["pan_processor"].append(resumo)
+            print(f"⏱️ PanProcessor ({nome}): {resumo['total_s']:.3f}s {resumo['fases_s']} "
+                  f"-> {resumo['resultados']} registros")
+
+        relatorio["excel_cache"] = cache_excel.estatisticas()
+
+    Path(args.saida).write_text(json.dumps(relatorio, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"💾 Relatório salvo em {args.saida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -288,5 +288,14 @@ if __name__ == "__main__":
     print(f"🐛 Debug: {debug}")
     print(f"📁 Instance Dir: {INSTANCE_DIR}")
 
+    # Navegadores do IHS pré-abertos (DRIVER_POOL_AQUECIDOS); no debug, só no processo do reloader.
+    # Só aquece com a extensão do captcha pré-instalada (sem ela cada navegador pede confirmação)
+    if not debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        from APP.Config.ihs_config import pool_ihs
+        from APP.Config.settings import Config
+        from APP.Core.perfil_navegador import extensao_captcha, modelo_perfil
+        if extensao_captcha() or modelo_perfil():
+            pool_ihs(Config.NAVEGADOR_ENXUTO).aquecer()
+
     
     app.run(port=port, host=host, debug=debug, threaded=True)
\ No newline at end of file
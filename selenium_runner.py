@@ -3,6 +3,8 @@ import os, time, threading
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
+from APP.Core.driver_pool import obter_pool
+from APP.Core.chromedriver import resolver_chromedriver
 
 _driver_lock = threading.Lock()
 
@@ -36,15 +38,19 @@ def _build_options() -> Options:
     return opts
 
 def _new_driver():
-    service = Service(executable_path=os.getenv("CHROMEDRIVER_PATH", "/usr/bin/chromedriver"))
+    service = Service(executable_path=resolver_chromedriver(os.getenv("CHROME_BIN", "/usr/bin/chromium")))
     return webdriver.Chrome(service=service, options=_build_options())
 
+def _pool():
+    return obter_pool("runner", _new_driver)
+
 def quick_visit(url: str = "https://example.com") -> dict:
     with _driver_lock:
         for attempt in (1, 2):
             d = None
+            falhou = False
             try:
-                d = _new_driver()
+                d = _pool().emprestar()
                 d.set_page_load_timeout(45)
                 d.get(url)
 
@@ -56,11 +62,10 @@ def quick_visit(url: str = "https://example.com") -> dict:
                 cur = d.current_url
                 return {"ok": True, "title": title, "url": cur}
             except Exception as e:
+                falhou = True
                 if attempt == 2:
                     return {"ok": False, "error": f"{e}"}
                 time.sleep(1.0)
             finally:
-                try:
-                    if d: d.quit()
-                except Exception:
-                    pass
+                # devolve ao pool; depois de um erro o navegador é descartado
+                if d: _pool().devolver(d, descartar=falhou)